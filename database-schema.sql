@@ -44,12 +44,29 @@ CREATE TABLE IF NOT EXISTS posts (
     is_featured BOOLEAN DEFAULT 0,
     is_trending BOOLEAN DEFAULT 0,
     published_at DATETIME,
+    cluster_id INTEGER, -- story cluster, shared by posts covering the same event
+    cluster_size INTEGER DEFAULT 1, -- posts in the cluster
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE SET NULL
 );
 
+-- Story clusters (maintained by news-updater/story_clusters.py)
+CREATE TABLE IF NOT EXISTS story_clusters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    centroid TEXT NOT NULL, -- JSON term -> weight
+    size INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+-- Document frequencies for the cluster term vectors
+CREATE TABLE IF NOT EXISTS story_terms (
+    term TEXT PRIMARY KEY,
+    docs INTEGER NOT NULL DEFAULT 0
+);
+
 -- Tags table
 CREATE TABLE IF NOT EXISTS tags (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -176,6 +193,9 @@ CREATE INDEX IF NOT EXISTS idx_posts_status ON posts(status);
 CREATE INDEX IF NOT EXISTS idx_posts_published ON posts(published_at);
 CREATE INDEX IF NOT EXISTS idx_posts_category ON posts(category_id);
 CREATE INDEX IF NOT EXISTS idx_posts_author ON posts(author_id);
+CREATE INDEX IF NOT EXISTS idx_posts_source_url ON posts(source_url);
+CREATE INDEX IF NOT EXISTS idx_posts_cluster ON posts(cluster_id);
+CREATE INDEX IF NOT EXISTS idx_story_clusters_updated ON story_clusters(updated_at);
 CREATE INDEX IF NOT EXISTS idx_comments_post ON comments(post_id);
 CREATE INDEX IF NOT EXISTS idx_analytics_post ON analytics(post_id);
 CREATE INDEX IF NOT EXISTS idx_analytics_date ON analytics(created_at);
\ No newline at end of file
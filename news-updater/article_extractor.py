@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Article Extractor
+Pulls the readable body out of a news page in one pass over its HTML,
+keeping the text blocks that score as prose by text and link density
+"""
+
+import re
+import sqlite3
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+import extraction_rules
+
+# Configuration
+MIN_BLOCK_WORDS = 8        # Shorter blocks are only kept between two content blocks
+MIN_NEIGHBOR_WORDS = 3     # Shortest block the neighbor rule will keep
+MIN_TEXT_DENSITY = 20.0    # Characters of text per tag a content block needs
+MAX_LINK_DENSITY = 0.33    # Share of a block's words that may sit inside links
+MIN_RULE_CHARS = 200       # Text a learned rule must produce before it is trusted
+FEED_SIZE = 32 * 1024      # Characters handed to the parser at a time
+
+# Subtrees that never hold article text
+SKIP_TAGS = {
+    'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe',
+    'nav', 'header', 'footer', 'aside', 'form', 'button', 'select', 'figure'
+}
+
+# Tags that start or end a text block
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'li', 'ul', 'ol', 'dl', 'dt', 'dd',
+    'table', 'tr', 'td', 'th', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'body', 'hr'
+}
+
+REGION_TAGS = {'article', 'main'}
+
+# Elements that never have content or an end tag, whether or not they are written <x/>
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+    'param', 'source', 'track', 'wbr'
+}
+
+# Elements whose end tag may be left out, and the start tags that close them implicitly
+_CLOSES_P = {
+    'address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'dd', 'dt', 'fieldset',
+    'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul'
+}
+IMPLIED_END = {
+    'p': _CLOSES_P,
+    'li': {'li'},
+    'dt': {'dt', 'dd'},
+    'dd': {'dt', 'dd'},
+    'tr': {'tr', 'tbody', 'thead', 'tfoot'},
+    'td': {'td', 'th', 'tr', 'tbody', 'thead', 'tfoot'},
+    'th': {'td', 'th', 'tr', 'tbody', 'thead', 'tfoot'},
+    'option': {'option', 'optgroup'}
+}
+
+# class / id values that mark boilerplate or the article body
+BOILERPLATE_PATTERN = re.compile(
+    r'\b(?:comment|share|social|related|promo|advert|ad-|cookie|newsletter|subscribe|'
+    r'sidebar|breadcrumb|footer|masthead|menu|popup|banner)', re.IGNORECASE)
+ARTICLE_PATTERN = re.compile(
+    r'\b(?:story-body|article-body|article__body|post-body|entry-content|body-text|'
+    r'article-content|story-content)', re.IGNORECASE)
+
+WHITESPACE = re.compile(r'\s+')
+
+DENSITY_RULE = 'density'  # Rule for hosts whose article has no recognizable region
+
+def region_rule(tag, marker):
+    """Name the rule that makes an element an article region, or None"""
+    if tag in REGION_TAGS:
+        return tag
+    if marker:
+        match = ARTICLE_PATTERN.search(marker)
+        if match:
+            return 'class:' + match.group(0).lower()
+    return None
+
+class TextBlock:
+    __slots__ = ('text', 'words', 'link_words', 'tags', 'region')
+
+    def __init__(self, text, words, link_words, tags, region):
+        self.text = text
+        self.words = words
+        self.link_words = link_words
+        self.tags = tags
+        self.region = region
+
+    @property
+    def in_article(self):
+        return self.region is not None
+
+    @property
+    def link_density(self):
+        return self.link_words / self.words if self.words else 1.0
+
+    @property
+    def text_density(self):
+        return len(self.text) / (self.tags + 1)
+
+    def is_content(self):
+        return (self.words >= MIN_BLOCK_WORDS
+                and self.link_density <= MAX_LINK_DENSITY
+                and self.text_density >= MIN_TEXT_DENSITY)
+
+class ArticleExtractor(HTMLParser):
+    """Incremental extractor: feed() HTML in any number of chunks, then result()
+
+    Every tag and text run is looked at once. Skipped subtrees (scripts,
+    navigation, boilerplate classes) are tracked with a stack of the tag
+    names open inside them rather than a tree, so memory stays
+    proportional to the text kept, not the page. A skipped element whose
+    end tag was left out (<li>, <p>, <td>) ends where the next sibling
+    or the parent's end tag closes it, as a browser would.
+
+    With a rule (see region_rule), only elements matching it count as the
+    article region, and once such a region closes holding MIN_RULE_CHARS
+    of prose the extractor is finished and ignores the rest of the page.
+    """
+
+    def __init__(self, rule=None):
+        super().__init__(convert_charrefs=True)
+        self.rule = rule
+        self.finished = False
+        self.region_rule = None
+        self.region_chars = 0
+        self.title_parts = []
+        self.in_title = False
+        self.canonical = None
+        self.skipped = []
+        self.region_tag = None
+        self.region_depth = 0
+        self.link_depth = 0
+        self.blocks = []
+        self._start_block()
+
+    def _start_block(self):
+        self.parts = []
+        self.words = 0
+        self.link_words = 0
+        self.tags = 0
+
+    def _flush(self):
+        if self.words:
+            text = WHITESPACE.sub(' ', ''.join(self.parts)).strip()
+            block = TextBlock(text, self.words, self.link_words, self.tags, self.region_rule)
+            self.blocks.append(block)
+            if block.region is not None and block.is_content():
+                self.region_chars += len(text)
+        self._start_block()
+
+    def _link(self, attrs):
+        if self.canonical is None:
+            attributes = dict(attrs)
+            if 'canonical' in (attributes.get('rel') or '').lower().split():
+                self.canonical = (attributes.get('href') or '').strip() or None
+
+    def handle_starttag(self, tag, attrs):
+        if self.finished:
+            return
+        if self.skipped:
+            self._close_implied(tag)
+            if self.skipped:
+                if tag not in VOID_TAGS:
+                    self.skipped.append(tag)
+                return
+
+        if tag == 'title':
+            self.in_title = True
+            return
+        if tag in VOID_TAGS:
+            # No end tag will follow, so a boilerplate <img class="share-icon"> must
+            # not open a skipped subtree: it would swallow the rest of the page
+            self._void(tag, attrs)
+            return
+
+        marker = ''
+        if tag not in ('html', 'body'):
+            marker = ' '.join(value for name, value in attrs if name in ('class', 'id') and value)
+        if tag in SKIP_TAGS or (marker and BOILERPLATE_PATTERN.search(marker)):
+            self._flush()
+            self.skipped = [tag]
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+        else:
+            self.tags += 1
+
+        if tag == 'a':
+            self.link_depth += 1
+        elif tag == 'br':
+            self.parts.append(' ')
+
+        if self.region_tag is None:
+            rule = region_rule(tag, marker)
+            if rule is not None and (self.rule is None or rule == self.rule):
+                self.region_tag = tag
+                self.region_rule = rule
+                self.region_depth = 1
+        elif tag == self.region_tag:
+            self.region_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/> and friends: no subtree to enter
+        if self.finished:
+            return
+        if self.skipped:
+            self._close_implied(tag)
+            if self.skipped:
+                return
+        self._void(tag, attrs)
+
+    def _close_implied(self, tag):
+        """Pop the skipped elements a start tag closes without their end tags"""
+        for i in range(len(self.skipped) - 1, -1, -1):
+            open_tag = self.skipped[i]
+            if tag in IMPLIED_END.get(open_tag, ()):
+                del self.skipped[i:]
+            elif open_tag in BLOCK_TAGS and open_tag not in ('div', 'p'):
+                # A <li> inside a nested list cannot close the item holding that list
+                return
+
+    def _void(self, tag, attrs):
+        """An element without a subtree: only the element itself is kept or dropped"""
+        if tag == 'link':
+            self._link(attrs)
+        elif tag in BLOCK_TAGS:
+            self._flush()
+        elif tag == 'br':
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if self.finished:
+            return
+        if self.skipped:
+            if tag in self.skipped:
+                index = len(self.skipped) - 1 - self.skipped[::-1].index(tag)
+                del self.skipped[index:]
+                return
+            if self.skipped[0] not in IMPLIED_END or tag not in BLOCK_TAGS or tag == 'p':
+                return
+            # The parent closed while the skipped element's end tag was still implied
+            self.skipped = []
+
+        if tag == 'title':
+            self.in_title = False
+            return
+
+        if tag in BLOCK_TAGS:
+            self._flush()
+        elif tag == 'a' and self.link_depth:
+            self.link_depth -= 1
+
+        if tag == self.region_tag:
+            self.region_depth -= 1
+            if self.region_depth == 0:
+                self._flush()
+                self.region_tag = None
+                self.region_rule = None
+                if self.rule is not None and self.region_chars >= MIN_RULE_CHARS:
+                    self.finished = True
+
+    def handle_data(self, data):
+        if self.finished:
+            return
+        if self.in_title:
+            self.title_parts.append(data)
+            return
+        if self.skipped:
+            return
+
+        words = len(data.split())
+        if words:
+            self.words += words
+            if self.link_depth:
+                self.link_words += words
+        self.parts.append(data)
+
+    def content_blocks(self):
+        """Classify the blocks seen so far and return the ones holding the article"""
+        blocks = self.blocks
+        keep = [block.is_content() for block in blocks]
+
+        # A short line (dateline, subheading) between two prose blocks is prose too
+        for i in range(1, len(blocks) - 1):
+            block = blocks[i]
+            if (not keep[i] and keep[i - 1] and keep[i + 1] and block.words >= MIN_NEIGHBOR_WORDS
+                    and block.link_density <= MAX_LINK_DENSITY):
+                keep[i] = True
+
+        chosen = [block for block, kept in zip(blocks, keep) if kept]
+
+        # Prefer the <article> / story-body region when it holds any prose
+        in_article = [block for block in chosen if block.in_article]
+        return in_article or chosen
+
+    def result(self):
+        """Return {'title', 'content', 'paragraphs', 'rule', 'canonical'} for everything fed so far
+
+        rule names the region the article came from (the rule with the
+        most text), or DENSITY_RULE when no region held any prose.
+        canonical is the page's <link rel="canonical"> href as written, or None.
+        """
+        if not self.finished:
+            self.close()
+            self._flush()
+        blocks = self.content_blocks()
+
+        weights = {}
+        for block in blocks:
+            if block.region is not None:
+                weights[block.region] = weights.get(block.region, 0) + len(block.text)
+
+        paragraphs = [block.text for block in blocks]
+        return {
+            'title': WHITESPACE.sub(' ', ''.join(self.title_parts)).strip(),
+            'content': ' '.join(paragraphs),
+            'paragraphs': paragraphs,
+            'rule': max(weights, key=weights.get) if weights else DENSITY_RULE,
+            'canonical': self.canonical
+        }
+
+def extract_with_rule(html, rule=None):
+    """Extract with one region rule (None for the generic pass), stopping once it is satisfied"""
+    extractor = ArticleExtractor(rule)
+    for chunk in _chunks(html):
+        extractor.feed(chunk)
+        if extractor.finished:
+            break
+    return extractor.result()
+
+def _chunks(html):
+    if isinstance(html, str):
+        return [html[start:start + FEED_SIZE] for start in range(0, len(html), FEED_SIZE)]
+    return list(html)
+
+def extract_article(html, url=None):
+    """Extract title and body text from a page (str, or an iterable of str chunks)
+
+    With the page's url, the rule that found the article on earlier pages
+    from the same host is tried first, so parsing stops once that region
+    is read. A rule that comes up short falls back to the full generic
+    pass, whose winning rule is then learned for the host.
+    """
+    chunks = _chunks(html)
+    if url is None:
+        return extract_with_rule(chunks)
+
+    host = urlparse(url).netloc.lower()
+    try:
+        rules = extraction_rules.get_rules()
+        rule = rules.rule_for(host)
+    except sqlite3.Error:
+        rules, rule = None, None
+
+    if rule is not None:
+        article = extract_with_rule(chunks, rule)
+        if article['rule'] == rule and len(article['content']) >= MIN_RULE_CHARS:
+            _record(rules.record_hit, host, rule)
+            return article
+
+    article = extract_with_rule(chunks)
+    if rules is not None and len(article['content']) >= MIN_RULE_CHARS:
+        _record(rules.learn, host, article['rule'], rule is not None)
+    return article
+
+def _record(method, *args):
+    try:
+        method(*args)
+    except sqlite3.Error:
+        pass
@@ -1,7 +1,9 @@
 #!/bin/bash
 
 # Automated News Updater Script
-# Runs every 15 minutes via cron
+# Fetches every feed on each run, without the per-feed schedule. The cron
+# job runs improved-updater.py every 2 minutes instead (see README), which
+# polls each feed only when its learned interval is due
 
 LOG_FILE="/var/log/news-updater.log"
 SCRIPT_DIR="/var/www/news-site/news-updater"
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Article Extractor Benchmark
+Compares article_extractor with the old regex extraction cascade (time per page and MB/s);
+"learned" times a page from a host whose extraction rule is already known
+
+Usage: python3 bench_article_extractor.py [saved html pages...]
+With no files, synthetic pages are generated at two sizes, including ones
+that make the non-greedy DOTALL patterns backtrack.
+"""
+
+import re
+import sys
+import time
+
+from article_extractor import extract_article, extract_with_rule
+
+# Configuration
+ROUNDS = 3                        # Best-of rounds per measurement
+SIZES = (200 * 1024, 400 * 1024)  # Synthetic page sizes; doubling shows how cost scales
+
+PARAGRAPH = ("<p>Officials said on Tuesday that the decision followed months of talks between "
+             "the parties, adding that a <a href=\"/related\">final agreement</a> was expected soon.</p>\n")
+NAV = "<li><a href=\"/section\">Section</a></li>"
+SCRIPT = "<script>window.__data = {\"items\": [" + ",".join(['{"id": 1, "html": "<p>x</p>"}'] * 50) + "]};</script>\n"
+
+def pad(head, unit, tail, size):
+    repeat = max(1, (size - len(head) - len(tail)) // len(unit))
+    return head + unit * repeat + tail
+
+def typical_page(size):
+    """A news page: scripts, navigation, one <article> holding most of the text"""
+    head = ("<html><head><title>Story - BBC News</title>" + SCRIPT * 5 + "</head><body>"
+            "<nav><ul>" + NAV * 40 + "</ul></nav><div class=\"promo\">Sign up</div><article>")
+    related = "<div class=\"card\"><h3>Another story headline</h3>" + PARAGRAPH + "</div>"
+    tail = "</article>" + related * 100 + "<footer>" + NAV * 20 + "</footer></body></html>"
+    return pad(head, PARAGRAPH + SCRIPT, tail, size)
+
+def unclosed_page(size):
+    """No </article> and unclosed <p> tags: each regex attempt scans to the end of the page"""
+    head = "<html><head><title>Live updates</title></head><body><article>"
+    return pad(head, PARAGRAPH.replace("</p>", "") + "<div class=\"story-body-part\">", "</body></html>", size)
+
+def synthetic_pages():
+    pages = []
+    for size in SIZES:
+        pages.append((f"typical {size // 1024} KB", typical_page(size)))
+    for size in SIZES:
+        pages.append((f"unclosed {size // 1024} KB", unclosed_page(size)))
+    return pages
+
+def legacy_extract(html):
+    """The old fetch_real_article cascade: article, main, story-body, then every <p>"""
+    content = ""
+
+    article_match = re.search(r'<article[^>]*>(.*?)</article>', html, re.DOTALL | re.IGNORECASE)
+    if article_match:
+        content = article_match.group(1)
+
+    if not content:
+        main_match = re.search(r'<main[^>]*>(.*?)</main>', html, re.DOTALL | re.IGNORECASE)
+        if main_match:
+            content = main_match.group(1)
+
+    if not content:
+        story_match = re.search(r'<div[^>]*class="[^"]*story-body[^"]*"[^>]*>(.*?)</div>', html, re.DOTALL | re.IGNORECASE)
+        if story_match:
+            content = story_match.group(1)
+
+    if not content:
+        paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', html, re.DOTALL)
+        content = ' '.join([p for p in paragraphs if len(p) > 50][:20])
+
+    if content:
+        content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.DOTALL | re.IGNORECASE)
+        content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
+        content = re.sub(r'<[^>]+>', ' ', content)
+        content = re.sub(r'\s+', ' ', content).strip()
+
+    return content
+
+def best_time(function, html):
+    best = None
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = function(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def report(label, html, function):
+    elapsed, text = best_time(function, html)
+    megabytes = len(html) / (1024 * 1024)
+    print(f"    {label:<10} {elapsed * 1000:9.1f} ms  {megabytes / elapsed:7.2f} MB/s  {len(text):7d} chars kept")
+
+def main():
+    if sys.argv[1:]:
+        pages = []
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((path, f.read()))
+    else:
+        pages = synthetic_pages()
+
+    print(f"Article extraction (best of {ROUNDS})")
+    for name, html in pages:
+        print(f"  {name} ({len(html) / 1024:.0f} KB)")
+        report('regex', html, legacy_extract)
+        report('extractor', html, lambda page: extract_article(page)['content'])
+        rule = extract_article(html)['rule']
+        report('learned', html, lambda page: extract_with_rule(page, rule)['content'])
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
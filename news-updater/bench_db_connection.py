@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Database Connection Benchmark
+Measures how long the site's post list query takes while an updater is
+writing posts, with plain sqlite3 connections and with db_connection
+
+Usage: python3 bench_db_connection.py [posts to ingest]
+Each run builds a scratch database from database-schema.sql. The reader
+connects the way the Node server does, with no busy timeout, so a read
+that hits the writer's lock fails instead of waiting and is counted.
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import db_connection
+
+# Configuration
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-schema.sql')
+SEED_POSTS = 5000      # Posts in the database before ingest starts
+INGEST_POSTS = 10000   # Posts the writer inserts, one commit each
+CONTENT = "Officials said the decision followed months of talks between the parties. " * 40
+
+# The /api/posts list query from server.js
+LIST_QUERY = """
+    SELECT p.*,
+           u.username as author_name,
+           u.avatar as author_avatar,
+           c.name as category_name,
+           c.color as category_color,
+           c.slug as category_slug,
+           COUNT(DISTINCT l.user_id) as like_count,
+           COUNT(DISTINCT cm.id) as comment_count
+    FROM posts p
+    LEFT JOIN users u ON p.author_id = u.id
+    LEFT JOIN categories c ON p.category_id = c.id
+    LEFT JOIN likes l ON p.id = l.post_id
+    LEFT JOIN comments cm ON p.id = cm.post_id AND cm.is_approved = 1
+    WHERE p.status = 'published'
+    GROUP BY p.id
+    ORDER BY p.published_at DESC
+    LIMIT 20 OFFSET 0
+"""
+
+INSERT_POST = """
+    INSERT INTO posts (title, slug, excerpt, content, author_id, category_id, status, published_at)
+    VALUES (?, ?, ?, ?, 1, 1, 'published', datetime('now', ?))
+"""
+
+def build_database(path):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.executemany(INSERT_POST, [
+        (f"Seed story {i}", f"seed-{i}", "Seed excerpt", CONTENT, f"-{i} minutes")
+        for i in range(SEED_POSTS)
+    ])
+    conn.commit()
+    conn.close()
+
+def ingest(path, use_factory, count, started):
+    """Insert count posts one commit at a time, as the per-post updaters did"""
+    conn = db_connection.connect(path) if use_factory else sqlite3.connect(path)
+    started.set()
+    begin = time.perf_counter()
+    for i in range(count):
+        conn.execute(INSERT_POST, (f"New story {i}", f"new-{i}", "New excerpt", CONTENT, "+0 seconds"))
+        conn.commit()
+    conn.close()
+    return time.perf_counter() - begin
+
+def _writer(path, use_factory, count, started, result):
+    result.put(ingest(path, use_factory, count, started))
+
+def measure(use_factory, count):
+    """Run the list query in a loop while the writer ingests; returns the results"""
+    directory = tempfile.mkdtemp(prefix='bench-db-')
+    path = os.path.join(directory, 'database.db')
+    build_database(path)
+    if use_factory:
+        db_connection.connect(path).close()
+
+    started = multiprocessing.Event()
+    result = multiprocessing.Queue()
+    writer = multiprocessing.Process(target=_writer, args=(path, use_factory, count, started, result))
+    writer.start()
+    started.wait()
+
+    reader = sqlite3.connect(path, timeout=0)
+    latencies = []
+    locked = 0
+    while writer.is_alive():
+        begin = time.perf_counter()
+        try:
+            reader.execute(LIST_QUERY).fetchall()
+            latencies.append(time.perf_counter() - begin)
+        except sqlite3.OperationalError:
+            locked += 1
+    reader.close()
+    writer.join()
+    elapsed = result.get()
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    return latencies, locked, count / elapsed
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+def main():
+    count = int(sys.argv[1]) if sys.argv[1:] else INGEST_POSTS
+    print(f"Reader latency on /api/posts while {count} posts are ingested ({SEED_POSTS} already stored)")
+    print(f"{'connections':<16}{'reads':>8}{'locked':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'posts/s':>10}")
+    for label, use_factory in (('sqlite3', False), ('db_connection', True)):
+        latencies, locked, rate = measure(use_factory, count)
+        print(f"{label:<16}{len(latencies):>8}{locked:>8}"
+              f"{percentile(latencies, 0.50) * 1000:>9.2f}{percentile(latencies, 0.95) * 1000:>9.2f}"
+              f"{percentile(latencies, 0.99) * 1000:>9.2f}{max(latencies or [0]) * 1000:>9.2f}{rate:>10.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
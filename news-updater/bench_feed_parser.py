@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Feed Parser Benchmark
+Measures feed_parser throughput (MB/s and items/s) for every supported format
+
+Usage: python3 bench_feed_parser.py [feed files...]
+With no files, synthetic ~1 MB feeds are generated for each format.
+"""
+
+import io
+import json
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from feed_parser import parse_feed_stream
+
+# Configuration
+TARGET_BYTES = 1024 * 1024  # Size of each synthetic feed
+ROUNDS = 5                  # Best-of rounds per measurement
+
+DESCRIPTION = "Officials said the decision followed months of talks between the parties. " * 4
+
+def rss2_item(i):
+    return (
+        f"<item><title>Story number {i}</title>"
+        f"<link>https://www.example.com/news/story-{i}</link>"
+        f"<guid isPermaLink=\"false\">story-{i}</guid>"
+        f"<description>{DESCRIPTION}</description>"
+        f"<pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate>"
+        f"<dc:creator>Reporter {i % 7}</dc:creator>"
+        f"<enclosure url=\"https://img.example.com/{i}.jpg\" type=\"image/jpeg\"/></item>"
+    )
+
+def rss1_item(i):
+    return (
+        f"<item rdf:about=\"https://www.example.com/news/story-{i}\"><title>Story number {i}</title>"
+        f"<link>https://www.example.com/news/story-{i}</link>"
+        f"<description>{DESCRIPTION}</description>"
+        f"<dc:date>2024-01-01T10:00:00Z</dc:date><dc:creator>Reporter {i % 7}</dc:creator></item>"
+    )
+
+def atom_entry(i):
+    return (
+        f"<entry><title>Story number {i}</title>"
+        f"<link rel=\"alternate\" href=\"https://www.example.com/news/story-{i}\"/>"
+        f"<link rel=\"enclosure\" href=\"https://img.example.com/{i}.jpg\"/>"
+        f"<id>tag:example.com,2024:story-{i}</id>"
+        f"<published>2024-01-01T10:00:00Z</published><updated>2024-01-01T11:00:00Z</updated>"
+        f"<author><name>Reporter {i % 7}</name></author><summary>{DESCRIPTION}</summary></entry>"
+    )
+
+def build_xml(head, tail, make_item):
+    parts = [head]
+    size = len(head) + len(tail)
+    i = 0
+    while size < TARGET_BYTES:
+        item = make_item(i)
+        parts.append(item)
+        size += len(item)
+        i += 1
+    parts.append(tail)
+    return ''.join(parts).encode('utf-8')
+
+def build_json():
+    items = []
+    size = 0
+    i = 0
+    while size < TARGET_BYTES:
+        item = {
+            'id': f"story-{i}",
+            'url': f"https://www.example.com/news/story-{i}",
+            'title': f"Story number {i}",
+            'content_text': DESCRIPTION,
+            'date_published': '2024-01-01T10:00:00Z',
+            'authors': [{'name': f"Reporter {i % 7}"}],
+            'attachments': [{'url': f"https://img.example.com/{i}.jpg", 'mime_type': 'image/jpeg'}]
+        }
+        items.append(item)
+        size += len(json.dumps(item))
+        i += 1
+    return json.dumps({'version': 'https://jsonfeed.org/version/1.1', 'title': 'Bench', 'items': items}).encode('utf-8')
+
+def synthetic_feeds():
+    """Return (name, bytes) for one synthetic feed per format"""
+    return [
+        ('RSS 2.0', build_xml(
+            '<?xml version="1.0"?><rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel><title>Bench</title>',
+            '</channel></rss>', rss2_item)),
+        ('RSS 1.0', build_xml(
+            '<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+            'xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            '<channel rdf:about="https://www.example.com/"><title>Bench</title></channel>',
+            '</rdf:RDF>', rss1_item)),
+        ('Atom', build_xml(
+            '<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Bench</title>',
+            '</feed>', atom_entry)),
+        ('JSON Feed', build_json())
+    ]
+
+def legacy_parse(data):
+    """The old fetch_rss_feed approach: whole-document parse of .//item"""
+    root = ET.fromstring(data)
+    items = []
+    for item in root.findall('.//item'):
+        title_elem = item.find('title')
+        link_elem = item.find('link')
+        desc_elem = item.find('description')
+        pubdate_elem = item.find('pubDate')
+
+        if title_elem is not None and link_elem is not None:
+            items.append({
+                'title': title_elem.text.strip() if title_elem.text else '',
+                'link': link_elem.text.strip() if link_elem.text else '',
+                'description': desc_elem.text.strip() if desc_elem is not None and desc_elem.text else '',
+                'pubdate': pubdate_elem.text.strip() if pubdate_elem is not None and pubdate_elem.text else ''
+            })
+    return items
+
+def seen_after(count):
+    """An is_seen() that reports everything after the first count items as stored"""
+    checked = []
+    def is_seen(link, guid):
+        checked.append(link)
+        return len(checked) > count
+    return is_seen
+
+def best_time(function, data):
+    best = None
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = function(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+def report(name, data, function):
+    elapsed, count = best_time(function, data)
+    megabytes = len(data) / (1024 * 1024)
+    print(f"  {name:<22} {megabytes:6.2f} MB  {count:6d} items  "
+          f"{megabytes / elapsed:7.1f} MB/s  {count / elapsed:9.0f} items/s")
+
+def main():
+    if sys.argv[1:]:
+        feeds = []
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as f:
+                feeds.append((path, f.read()))
+    else:
+        feeds = synthetic_feeds()
+
+    print(f"Feed parser throughput (best of {ROUNDS})")
+    for name, data in feeds:
+        report(name, data, lambda raw: parse_feed_stream(io.BytesIO(raw)))
+        if name == 'RSS 2.0':
+            report('RSS 2.0 (old findall)', data, legacy_parse)
+            report('RSS 2.0 (20 new items)', data, lambda raw: parse_feed_stream(io.BytesIO(raw), seen_after(20)))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
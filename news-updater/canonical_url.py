@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Canonical URLs
+Reduces the many spellings of one article link (tracking tags, http/https,
+www or not, default ports, fragments) to a single key used for dedup and
+page cache keys, and cleans the publisher's link stored as source_url
+"""
+
+import posixpath
+import re
+import sys
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+# Configuration
+# Query parameters that only say where a click came from
+TRACKING_PREFIXES = ('utm_', 'at_', 'ns_', 'mc_', 'pk_')
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'yclid', 'ocid', 'cmpid',
+    'cmp', 'ito', 'ref_src', 'ref_url', 'smid', 'share', '_ga', '_gl'
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Characters left as written in a path; everything else is percent-encoded
+PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+PERCENT_ESCAPE = re.compile(r'%([0-9a-fA-F]{2})')
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def _normalize_path(path):
+    """Resolve dot segments, collapse repeated slashes and settle percent-encoding"""
+    if not path:
+        return '/'
+    trailing = path.endswith('/')
+    path = re.sub(r'/{2,}', '/', path)
+    path = posixpath.normpath(path)
+    if path == '.':
+        path = '/'
+    if not path.startswith('/'):
+        path = '/' + path
+    if trailing and not path.endswith('/'):
+        path += '/'
+    return quote(PERCENT_ESCAPE.sub(_settle_escape, path), safe=PATH_SAFE)
+
+def _settle_escape(match):
+    """Decode an escaped unreserved character (%7E is ~) and uppercase the rest (%2f is %2F)"""
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else '%' + match.group(1).upper()
+
+def canonicalize(url):
+    """Return the canonical form of an http(s) URL, for comparing and keying only
+
+    The scheme becomes https and the host loses case, a leading www., a
+    trailing dot and its default port. Tracking parameters and the
+    fragment are dropped and the remaining query is sorted. Anything that
+    is not an http(s) URL comes back stripped but otherwise unchanged.
+    The result is not always a working link: not every host serves https
+    or its bare domain, so store strip_tracking() links instead.
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not is_tracking_param(name)]
+    return urlunsplit(('https', host, _normalize_path(parts.path), urlencode(sorted(query)), ''))
+
+def strip_tracking(url):
+    """Return the link as the publisher wrote it, less tracking parameters and the fragment
+
+    Scheme, host, path and the order of the other parameters are kept, so
+    the result still works wherever the original did.
+    """
+    url = (url or '').strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in DEFAULT_PORTS:
+        return url
+
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not is_tracking_param(name)]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+def resolve_canonical(url, canonical_href):
+    """Return the link to store for a fetched page: its rel=canonical URL, or its own
+
+    canonical_href is the page's <link rel="canonical"> (see
+    article_extractor). It is honoured only when it is an http(s) URL on
+    the same site, so a syndicated copy pointing at another publisher, or
+    a broken template pointing at the home page, keeps its own URL.
+    Either way the link is the publisher's spelling, less tracking
+    parameters; canonicalize() it to compare.
+    """
+    own = strip_tracking(url)
+    if not canonical_href:
+        return own
+
+    declared = strip_tracking(urljoin(url, canonical_href))
+    declared_parts = urlsplit(canonicalize(declared))
+    own_parts = urlsplit(canonicalize(own))
+    if (declared_parts.scheme != 'https' or declared_parts.netloc != own_parts.netloc
+            or declared_parts.path == '/'):
+        return own
+    return declared
+
+def main():
+    """Print the canonical key and the stored link of each URL given on the command line"""
+    for url in sys.argv[1:]:
+        print(f"{canonicalize(url)}  (stored as {strip_tracking(url)})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+CPU Stage Pool
+Optionally runs the CPU-bound stages (article extraction, article writing) on a
+process pool so a large catch-up run uses every core instead of one GIL
+
+Set NEWS_PROCESS_POOL to a worker count, or "auto" for one per core, to turn
+it on. Unset or 0 keeps everything inline in the calling thread, exactly as before.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Configuration
+CHUNK_SIZE = 16        # Items pickled to a worker per task when mapping a batch
+BATCH_CHUNKS = 2       # Chunks per worker gathered before a batch is mapped
+
+def _configured_workers():
+    value = os.environ.get('NEWS_PROCESS_POOL', '').strip().lower()
+    if value == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(value or 0))
+    except ValueError:
+        return 0
+
+_workers = _configured_workers()
+_pool = None
+_pool_lock = threading.Lock()
+
+def configure(workers):
+    """Set the worker count for this process; 0 turns the pool off"""
+    global _workers
+    shutdown()
+    with _pool_lock:
+        _workers = max(0, int(workers))
+
+def enabled():
+    return _workers > 0
+
+def get_pool():
+    """Return the process-wide pool, starting it on first use
+
+    Workers are started with forkserver (spawn where that is missing)
+    rather than fork: the updaters already have research threads and open
+    sqlite connections by the time the pool starts, and neither survives a fork.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=_workers, mp_context=context)
+        return _pool
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+def call(func, *args):
+    """Run func(*args) on the pool, or inline when the pool is off
+
+    Meant for the research threads: the thread waits on the result with the
+    GIL released, so the other fetches keep going while a worker parses.
+    func must be a module-level function so it can be pickled.
+    """
+    if not enabled():
+        return func(*args)
+    return get_pool().submit(func, *args).result()
+
+def imap_batched(func, jobs):
+    """Apply func to every (payload, arg) job and yield (payload, func(arg))
+
+    With the pool off each job is handled as soon as it arrives. With it on,
+    jobs are gathered into batches of CHUNK_SIZE items per task so one pickle
+    round trip carries many articles, and results come back in job order.
+    """
+    if not enabled():
+        for payload, arg in jobs:
+            yield payload, func(arg)
+        return
+
+    batch_size = _workers * CHUNK_SIZE * BATCH_CHUNKS
+    batch = []
+    for job in jobs:
+        batch.append(job)
+        if len(batch) >= batch_size:
+            yield from _map_batch(func, batch)
+            batch = []
+    if batch:
+        yield from _map_batch(func, batch)
+
+def _map_batch(func, batch):
+    chunksize = max(1, min(CHUNK_SIZE, len(batch) // _workers))
+    results = get_pool().map(func, [arg for _, arg in batch], chunksize=chunksize)
+    for (payload, _), result in zip(batch, results):
+        yield payload, result
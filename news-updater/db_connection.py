@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite Connections
+Opens the site database and the updater's cache databases with the same
+settings everywhere: WAL so the site keeps reading while an updater writes,
+a busy timeout so concurrent writers wait instead of failing with
+"database is locked", and a larger page cache and memory map for reads
+"""
+
+import os
+import sqlite3
+import sys
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+BUSY_TIMEOUT = 10.0               # Seconds a connection waits for a lock before giving up
+CACHE_SIZE_KB = 16 * 1024         # Page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024     # Bytes of the file read through a memory map
+CACHED_STATEMENTS = 256           # Prepared statements kept per connection
+
+def connect(path=DB_PATH, **kwargs):
+    """Open a connection to path with the shared settings; kwargs go to sqlite3.connect
+
+    journal_mode is stored in the database file, so the first connection
+    switches it to WAL for every later reader and writer, the site's
+    included. When another connection is mid-write the switch waits for
+    the busy timeout and, failing that, is left to the next connection.
+    synchronous=NORMAL is durable in WAL mode except for the last commits
+    before a power loss, which the next updater run fetches again.
+    """
+    kwargs.setdefault('timeout', BUSY_TIMEOUT)  # sqlite3 sets busy_timeout from this
+    kwargs.setdefault('cached_statements', CACHED_STATEMENTS)
+    conn = sqlite3.connect(path, **kwargs)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+    except sqlite3.OperationalError:
+        pass
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+def main():
+    """Switch the site database to WAL if needed and print its settings"""
+    conn = connect(sys.argv[1] if sys.argv[1:] else DB_PATH)
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    wal_bytes = os.path.getsize(path + '-wal') if os.path.exists(path + '-wal') else 0
+    conn.close()
+
+    print(f"  Journal mode: {journal_mode} ({wal_bytes / 1024:.0f} KB in the WAL)")
+    print(f"  Busy timeout: {busy_timeout} ms, cache {CACHE_SIZE_KB // 1024} MB, mmap {MMAP_SIZE // (1024 * 1024)} MB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,12 @@ Creates original articles with research, analysis, and images
 """
 
 import sqlite3
-import requests
-import xml.etree.ElementTree as ET
+import db_connection
+import cpu_pool
+import page_cache
+import post_writer
+import seen_index
+import story_clusters
 from datetime import datetime
 import re
 import sys
@@ -15,6 +19,10 @@ import random
 import time
 import json
 
+from article_extractor import extract_article
+from feed_cache import conditional_get, parsing, save_validators
+from feed_parser import parse_feed_stream
+
 DB_PATH = '/var/www/news-site/database.db'
 LOG_FILE = '/tmp/enhanced-journalist.log'
 
@@ -51,38 +59,15 @@ def log(message, level="INFO"):
 def fetch_article_content(url):
     """Fetch and analyze article content"""
     try:
-        response = requests.get(url, timeout=15, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        response = page_cache.get(url, timeout=15)
         
         if response.status_code != 200:
             return None
         
-        # Extract key information
-        content = response.text
-        
-        # Look for key elements
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE)
-        title = title_match.group(1) if title_match else ''
-        
-        # Extract main content (simplified)
-        article_patterns = [
-            r'<article[^>]*>(.*?)</article>',
-            r'<div[^>]*class="[^"]*article[^"]*"[^>]*>(.*?)</div>',
-            r'<div[^>]*id="[^"]*content[^"]*"[^>]*>(.*?)</div>'
-        ]
-        
-        article_text = ''
-        for pattern in article_patterns:
-            match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
-            if match:
-                article_text = match.group(1)
-                break
-        
-        # Clean HTML
-        if article_text:
-            article_text = re.sub(r'<[^>]+>', ' ', article_text)
-            article_text = re.sub(r'\s+', ' ', article_text).strip()
+        # Extract title and main content in one pass over the page
+        article = cpu_pool.call(extract_article, response.text, url)
+        title = article['title']
+        article_text = article['content']
         
         return {
             'title': title,
@@ -210,15 +195,13 @@ From a professional perspective, this story deserves attention because:
         'category': category,
         'source_name': source_info['name'],
         'source_url': source_item['link'],
-        'original_title': original_title
+        'original_title': original_title,
+        'source_text': article_data['content'] or source_item.get('description', '')
     }
 
-def save_article(article):
-    """Save professional article to database"""
+def save_article(article, writer, cursor):
+    """Queue professional article for the batched writer"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Get admin user
         cursor.execute("SELECT id FROM users WHERE role = 'admin' LIMIT 1")
         author_result = cursor.fetchone()
@@ -230,38 +213,35 @@ def save_article(article):
         category_id = category_result[0] if category_result else 1
         
         # Check for duplicates
-        cursor.execute("SELECT COUNT(*) FROM posts WHERE slug = ?", (article['slug'],))
-        if cursor.fetchone()[0] > 0:
+        if seen_index.get_index().has_slug(article['slug']):
             log(f"Duplicate slug: {article['slug']}", "WARNING")
-            conn.close()
             return False
         
-        # Insert article
-        cursor.execute("""
-            INSERT INTO posts (
-                title, slug, excerpt, content, author_id, category_id,
-                status, featured_image, image_caption, source_url, source_name,
-                fact_check_status, published_at, view_count, like_count
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), 0, 0)
-        """, (
-            article['title'],
-            article['slug'],
-            article['excerpt'],
-            article['content'],
-            author_id,
-            category_id,
-            'published',
-            article['image_url'],
-            article['image_alt'],
-            article['source_url'],
-            article['source_name'],
-            'verified',
-        ))
+        def on_done(post_id, error):
+            if post_id is None:
+                log(f"Database error: {str(error)}", "ERROR")
+                return
+            seen_index.record_post(article['source_url'], article['slug'])
+            story_clusters.assign_post(post_id, article['original_title'], article['source_text'], DB_PATH)
+            log(f"✅ Created: {article['title'][:60]}...", "SUCCESS")
         
-        conn.commit()
-        conn.close()
-        
-        log(f"✅ Created: {article['title'][:60]}...", "SUCCESS")
+        # Queue article; the writer inserts it with the rest of its batch
+        writer.add({
+            'title': article['title'],
+            'slug': article['slug'],
+            'excerpt': article['excerpt'],
+            'content': article['content'],
+            'author_id': author_id,
+            'category_id': category_id,
+            'status': 'published',
+            'featured_image': article['image_url'],
+            'image_caption': article['image_alt'],
+            'source_url': article['source_url'],
+            'source_name': article['source_name'],
+            'fact_check_status': 'verified',
+            'view_count': 0,
+            'like_count': 0
+        }, on_done)
         return True
         
     except Exception as e:
@@ -271,25 +251,17 @@ def save_article(article):
 def fetch_rss_feed(url):
     """Fetch and parse RSS feed"""
     try:
-        response = requests.get(url, timeout=10)
-        root = ET.fromstring(response.content)
+        response = conditional_get(url, timeout=10, stream=True)
+        if response is None:
+            log(f"Feed not modified: {url}")
+            return []
         
-        items = []
-        for item in root.findall('.//item'):
-            title_elem = item.find('title')
-            link_elem = item.find('link')
-            
-            if title_elem is not None and link_elem is not None:
-                title = title_elem.text.strip() if title_elem.text else ''
-                link = link_elem.text.strip() if link_elem.text else ''
-                
-                if title and link:
-                    items.append({
-                        'title': title,
-                        'link': link
-                    })
+        # Stop reading once we have 2 items
+        with parsing(url, response):
+            items = parse_feed_stream(response, limit=2)
         
-        return items[:2]  # Limit to 2 per source
+        save_validators(url, response)
+        return items  # Limit to 2 per source
         
     except Exception as e:
         log(f"RSS error for {url}: {str(e)}", "ERROR")
@@ -301,7 +273,9 @@ def main():
     log("🚀 ENHANCED PROFESSIONAL JOURNALIST SYSTEM")
     log("=" * 60)
     
-    total_created = 0
+    conn = db_connection.connect(DB_PATH)
+    cursor = conn.cursor()
+    writer = post_writer.PostWriter(DB_PATH)
     
     for source in SOURCES:
         log(f"📰 Processing {source['name']}...")
@@ -314,18 +288,18 @@ def main():
                 # Create professional article
                 article = create_professional_content(item, source)
                 
-                if article and save_article(article):
-                    total_created += 1
-                    time.sleep(1)  # Be polite
+                if article:
+                    save_article(article, writer, cursor)
                     
             except Exception as e:
                 log(f"  Error processing item: {str(e)}", "ERROR")
                 continue
     
-    # Statistics
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    # Write the last batch
+    writer.close()
+    total_created = writer.written
     
+    # Statistics
     cursor.execute("SELECT COUNT(*) FROM posts WHERE LENGTH(content) > 500")
     total_pro = cursor.fetchone()[0]
     
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Extraction Rules Cache
+Remembers which article region rule wins on each host so later pages go straight to it
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime
+
+import db_connection
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+
+class ExtractionRules:
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.lock = threading.Lock()
+        self.rules = {}
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_rules (
+                host TEXT PRIMARY KEY,
+                rule TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                fallbacks INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_rule_wins (
+                rule TEXT PRIMARY KEY,
+                wins INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.conn.commit()
+
+    def _count_win(self, rule):
+        self.conn.execute("""
+            INSERT INTO extraction_rule_wins (rule, wins) VALUES (?, 1)
+            ON CONFLICT(rule) DO UPDATE SET wins = wins + 1
+        """, (rule,))
+
+    def rule_for(self, host):
+        """Return the learned rule for a host, or None"""
+        with self.lock:
+            if host not in self.rules:
+                row = self.conn.execute("SELECT rule FROM extraction_rules WHERE host = ?", (host,)).fetchone()
+                self.rules[host] = row[0] if row else None
+            return self.rules[host]
+
+    def record_hit(self, host, rule):
+        """Count a page the learned rule extracted on its own"""
+        with self.lock:
+            self.conn.execute("UPDATE extraction_rules SET hits = hits + 1 WHERE host = ?", (host,))
+            self._count_win(rule)
+            self.conn.commit()
+
+    def learn(self, host, rule, fallback=False):
+        """Store the rule that won a full extraction; fallback means the old rule failed"""
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO extraction_rules (host, rule, hits, fallbacks, updated_at)
+                VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT(host) DO UPDATE SET
+                    rule = excluded.rule,
+                    hits = hits + 1,
+                    fallbacks = fallbacks + excluded.fallbacks,
+                    updated_at = excluded.updated_at
+            """, (host, rule, 1 if fallback else 0, datetime.now().isoformat()))
+            self._count_win(rule)
+            self.conn.commit()
+            self.rules[host] = rule
+
+    def stats(self):
+        """Return (host, rule, hits, fallbacks) for every host"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT host, rule, hits, fallbacks FROM extraction_rules ORDER BY hits DESC"
+            ).fetchall()
+
+    def rule_wins(self):
+        """Return (rule, pages won, hosts currently using it), most wins first"""
+        with self.lock:
+            return self.conn.execute("""
+                SELECT w.rule, w.wins, (SELECT COUNT(*) FROM extraction_rules r WHERE r.rule = w.rule)
+                FROM extraction_rule_wins w ORDER BY w.wins DESC
+            """).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+_rules = None
+_rules_lock = threading.Lock()
+
+def get_rules():
+    """Return the process-wide rules cache"""
+    global _rules
+    with _rules_lock:
+        if _rules is None:
+            _rules = ExtractionRules()
+        return _rules
+
+def main():
+    """Print how often each rule wins, then each host's rule"""
+    rules = ExtractionRules()
+
+    for rule, wins, hosts in rules.rule_wins():
+        print(f"  {rule}: won {wins} pages, current rule on {hosts} hosts")
+    for host, rule, hits, fallbacks in rules.stats():
+        print(f"  {host}: {rule} ({hits} pages, {fallbacks} fallbacks)")
+
+    rules.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
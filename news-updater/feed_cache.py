@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Feed Validator Cache
+Stores ETag / Last-Modified per feed so unchanged feeds answer 304 and skip parsing
+"""
+
+import sqlite3
+import threading
+import http_client
+import feed_health
+import db_connection
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+
+# Validators are kept per script: two updaters reading the same feed must each
+# see its items once, so one script's 200 cannot turn into another's 304.
+DEFAULT_CLIENT = os.path.splitext(os.path.basename(sys.argv[0] or ''))[0] or 'updater'
+
+class FeedValidatorStore:
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_validators (
+                client TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                updated_at DATETIME,
+                PRIMARY KEY (client, url)
+            )
+        """)
+        self.conn.commit()
+
+    def conditional_headers(self, url, client=DEFAULT_CLIENT):
+        """Return If-None-Match / If-Modified-Since headers for a feed"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM feed_validators WHERE client = ? AND url = ?",
+                (client, url)
+            ).fetchone()
+
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def save(self, url, response, client=DEFAULT_CLIENT):
+        """Remember the validators a 200 response was served with"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO feed_validators (client, url, etag, last_modified, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (client, url, etag, last_modified, datetime.now().isoformat()))
+            self.conn.commit()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide validator store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FeedValidatorStore()
+        return _store
+
+def conditional_get(url, headers=None, timeout=15, client=DEFAULT_CLIENT, stream=False):
+    """GET a feed with its stored validators
+
+    Returns None when the server answers 304 Not Modified, otherwise the
+    response. Read the body inside parsing(url, response) and call
+    save_validators() once it has been parsed, so a failed parse is
+    retried in full on the next run.
+
+    Errors and 4xx/5xx answers count against the feed's circuit in
+    feed_health, and a 304 counts as a success; a 200 is only counted
+    once parsing() knows whether its body could be read. While the
+    circuit is open this raises CircuitOpen without touching the network.
+    """
+    try:
+        health = feed_health.get_health()
+        if not health.allow(url):
+            raise feed_health.CircuitOpen(f"Circuit open for {url}")
+    except sqlite3.Error:
+        health = None
+
+    request_headers = dict(headers or {})
+    try:
+        request_headers.update(get_store().conditional_headers(url, client))
+    except sqlite3.Error:
+        pass
+
+    try:
+        response = http_client.get(url, headers=request_headers, timeout=timeout, stream=stream)
+        if response.status_code >= 400:
+            response.close()
+            response.raise_for_status()
+    except Exception as e:
+        if health is not None:
+            _record(health.record_failure, url, e)
+        raise
+
+    if response.status_code == 304:
+        # Closing a streamed response whose body was never read drops its
+        # connection; reading the empty body first returns it to the pool
+        response.content
+        response.close()
+        if health is not None:
+            _record(health.record_success, url)
+        return None
+
+    return response
+
+@contextmanager
+def parsing(url, response):
+    """Close a feed response after its body is read and report the outcome
+
+    A with block that finishes counts the fetch as a success in
+    feed_health; one that raises (a feed cut short, XML that does not
+    parse) counts as a failure, so a feed answering 200 with a broken
+    body still opens its circuit.
+    """
+    try:
+        health = feed_health.get_health()
+    except sqlite3.Error:
+        health = None
+
+    with response:
+        try:
+            yield response
+        except Exception as e:
+            if health is not None:
+                _record(health.record_failure, url, e)
+            raise
+
+    if health is not None:
+        _record(health.record_success, url)
+
+def _record(method, *args):
+    try:
+        method(*args)
+    except sqlite3.Error:
+        pass
+
+def save_validators(url, response, client=DEFAULT_CLIENT):
+    """Persist a feed's validators after its items were read"""
+    try:
+        get_store().save(url, response, client)
+    except sqlite3.Error:
+        pass
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Concurrent Feed Fetcher
+Fetches every news source at once so a run takes as long as the slowest feed
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+# Configuration
+MAX_CONCURRENCY = 10      # Feeds in flight across all hosts
+PER_HOST_CONCURRENCY = 2  # Feeds in flight against a single host
+
+def feed_host(url):
+    """Return the host a feed URL is served from"""
+    return urlparse(url).netloc.lower()
+
+async def _fetch_feeds(urls, fetch, max_concurrency, per_host):
+    """Run fetch() for every URL under the global and per-host caps"""
+    loop = asyncio.get_running_loop()
+    global_limit = asyncio.Semaphore(max_concurrency)
+    host_limits = {}
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        async def fetch_one(url):
+            host_limit = host_limits.setdefault(feed_host(url), asyncio.Semaphore(per_host))
+
+            # Take the host slot first so a busy host never holds global slots
+            async with host_limit:
+                async with global_limit:
+                    try:
+                        items = await loop.run_in_executor(executor, fetch, url)
+                    except Exception:
+                        items = []
+
+            return url, items or []
+
+        results = await asyncio.gather(*(fetch_one(url) for url in urls))
+
+    return dict(results)
+
+def fetch_all_feeds(urls, fetch, max_concurrency=MAX_CONCURRENCY, per_host=PER_HOST_CONCURRENCY):
+    """Fetch all feeds concurrently and return {url: items}
+
+    fetch is the updater's own fetch_rss_feed(url), so every feed keeps the
+    item format and error logging of the script that requested it. A feed
+    whose fetch raises maps to an empty list.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+
+    return asyncio.run(_fetch_feeds(urls, fetch, max_concurrency, per_host))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Feed Health Registry
+A persistent circuit breaker per feed so dead sources stop costing every run a timeout
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+
+import db_connection
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+FAILURE_THRESHOLD = 3          # Consecutive failures before a feed's circuit opens
+BASE_BACKOFF = 5 * 60          # First open period (seconds), doubled on every trip
+MAX_BACKOFF = 24 * 60 * 60     # Longest a feed is left alone before a probe
+PROBE_TIMEOUT = 10 * 60        # A half-open probe older than this is considered lost
+JITTER = 0.1                   # +/- fraction so failed feeds do not all probe together
+
+CLOSED = 'closed'        # Healthy, fetched normally
+OPEN = 'open'            # Failing, skipped until open_until
+HALF_OPEN = 'half-open'  # One probe request is in flight
+
+class CircuitOpen(Exception):
+    """Raised instead of fetching a feed whose circuit is open"""
+
+def _now():
+    return datetime.now(timezone.utc).timestamp()
+
+class FeedHealth:
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_health (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                failures INTEGER NOT NULL DEFAULT 0,
+                trips INTEGER NOT NULL DEFAULT 0,
+                open_until REAL,
+                probe_started_at REAL,
+                last_error TEXT,
+                last_failure_at REAL,
+                last_success_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def _row(self, url):
+        return self.conn.execute(
+            "SELECT state, failures, trips, open_until, probe_started_at FROM feed_health WHERE url = ?",
+            (url,)
+        ).fetchone()
+
+    def _can_probe(self, row, now):
+        state, _, _, open_until, probe_started_at = row
+        if state == OPEN:
+            return open_until is None or open_until <= now
+        if state == HALF_OPEN:
+            return probe_started_at is None or now - probe_started_at > PROBE_TIMEOUT
+        return True
+
+    def is_available(self, url, now=None):
+        """True when a feed may be fetched now (without claiming a probe)"""
+        now = now if now is not None else _now()
+        with self.lock:
+            row = self._row(url)
+        return row is None or self._can_probe(row, now)
+
+    def available_sources(self, sources, now=None):
+        """Filter a source list down to the feeds whose circuit lets them through"""
+        return [source for source in sources if self.is_available(source['url'], now)]
+
+    def allow(self, url, now=None):
+        """Claim permission to fetch a feed
+
+        A closed circuit always allows. An open circuit whose backoff has
+        elapsed turns half-open and allows exactly one probe; everything
+        else is refused until that probe reports back.
+        """
+        now = now if now is not None else _now()
+        with self.lock:
+            row = self._row(url)
+            if row is None or row[0] == CLOSED:
+                return True
+            if not self._can_probe(row, now):
+                return False
+
+            self.conn.execute(
+                "UPDATE feed_health SET state = ?, probe_started_at = ? WHERE url = ?",
+                (HALF_OPEN, now, url)
+            )
+            self.conn.commit()
+            return True
+
+    def record_success(self, url, now=None):
+        """Close a feed's circuit and forget its failures"""
+        now = now if now is not None else _now()
+        with self.lock:
+            row = self._row(url)
+            if row is not None and row[0] == CLOSED and row[1] == 0:
+                # Already healthy: just stamp the success
+                self.conn.execute("UPDATE feed_health SET last_success_at = ? WHERE url = ?", (now, url))
+            else:
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO feed_health
+                        (url, state, failures, trips, open_until, probe_started_at, last_error, last_failure_at, last_success_at)
+                    VALUES (?, ?, 0, 0, NULL, NULL, NULL,
+                            (SELECT last_failure_at FROM feed_health WHERE url = ?), ?)
+                """, (url, CLOSED, url, now))
+            self.conn.commit()
+
+    def record_failure(self, url, error, now=None):
+        """Count a failed fetch and open the circuit when it keeps failing
+
+        Returns the seconds the feed will be skipped for, or 0 while the
+        circuit stays closed. A failed half-open probe reopens the circuit
+        with twice the previous backoff.
+        """
+        now = now if now is not None else _now()
+        with self.lock:
+            row = self._row(url)
+            state, failures, trips = (row[0], row[1], row[2]) if row else (CLOSED, 0, 0)
+            failures += 1
+
+            backoff = 0
+            open_until = None
+            if state == HALF_OPEN or failures >= FAILURE_THRESHOLD:
+                trips += 1
+                backoff = min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (trips - 1))
+                backoff *= 1 + random.uniform(-JITTER, JITTER)
+                open_until = now + backoff
+                state = OPEN
+
+            self.conn.execute("""
+                INSERT OR REPLACE INTO feed_health
+                    (url, state, failures, trips, open_until, probe_started_at, last_error, last_failure_at, last_success_at)
+                VALUES (?, ?, ?, ?, ?, NULL, ?, ?,
+                        (SELECT last_success_at FROM feed_health WHERE url = ?))
+            """, (url, state, failures, trips, open_until, str(error)[:200], now, url))
+            self.conn.commit()
+
+        return backoff
+
+    def states(self):
+        """Return (url, state, failures, open_until, last_error) for every known feed"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT url, state, failures, open_until, last_error FROM feed_health ORDER BY state, url"
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+_health = None
+_health_lock = threading.Lock()
+
+def get_health():
+    """Return the process-wide health registry"""
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = FeedHealth()
+        return _health
+
+def available_sources(sources):
+    """Drop sources whose circuit is open; every source passes if the registry is unreadable"""
+    try:
+        return get_health().available_sources(sources)
+    except sqlite3.Error:
+        return list(sources)
+
+def main():
+    """Print each feed's circuit state"""
+    health = FeedHealth()
+    now = _now()
+
+    rows = health.states()
+    if not rows:
+        print("  No feeds polled yet")
+    for url, state, failures, open_until, last_error in rows:
+        line = f"  {url}: {state}"
+        if state != CLOSED:
+            retry_in = max(0, (open_until or now) - now) / 60
+            line += f", {failures} failures, next probe in {retry_in:.0f} min"
+            if last_error:
+                line += f" ({last_error[:60]})"
+        print(line)
+
+    health.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
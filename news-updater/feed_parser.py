@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Streaming Feed Parser
+Normalizes RSS 2.0, RSS 1.0 (RDF), Atom and JSON Feed into one item format,
+reading one item at a time and stopping at the first item we already have
+"""
+
+import io
+import json
+import xml.etree.ElementTree as ET
+
+import seen_index
+from http_client import BoundedReader
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+SNIFF_BYTES = 512  # Bytes read up front to tell JSON Feed from XML
+
+RDF_ABOUT = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about'
+ITEM_TAGS = ('item', 'entry')  # RSS 2.0 / RSS 1.0 use <item>, Atom uses <entry>
+DATE_TAGS = ('pubDate', 'published', 'date', 'updated')  # Most preferred first
+
+_local_names = {}
+
+def _local_name(tag):
+    """Strip any {namespace} prefix from an element tag (memoized per tag)"""
+    name = _local_names.get(tag)
+    if name is None:
+        name = _local_names[tag] = tag.rsplit('}', 1)[-1]
+    return name
+
+def _child_text(element, name):
+    """Return the stripped text of the first child with the given local name"""
+    for child in element:
+        if _local_name(child.tag) == name:
+            return child.text.strip() if child.text else ''
+    return ''
+
+def _empty_record():
+    return {
+        'title': '',
+        'link': '',
+        'guid': '',
+        'description': '',
+        'pubdate': '',
+        'author': '',
+        'enclosure': ''
+    }
+
+def _xml_record(element):
+    """Build an item record from an RSS <item> or Atom <entry>"""
+    record = _empty_record()
+    content = ''
+    date_rank = len(DATE_TAGS)
+
+    for child in element:
+        name = _local_name(child.tag)
+        text = child.text.strip() if child.text else ''
+
+        if name == 'title':
+            record['title'] = text
+        elif name == 'link':
+            href = child.get('href')
+            if href is None:
+                # RSS: the link is the element text
+                record['link'] = record['link'] or text
+            else:
+                # Atom: <link rel="alternate|enclosure" href="...">
+                rel = child.get('rel', 'alternate')
+                if rel == 'alternate' and not record['link']:
+                    record['link'] = href.strip()
+                elif rel == 'enclosure' and not record['enclosure']:
+                    record['enclosure'] = href.strip()
+        elif name in ('guid', 'id'):
+            record['guid'] = text
+        elif name in ('description', 'summary'):
+            record['description'] = record['description'] or text
+        elif name in ('encoded', 'content'):
+            content = content or text
+        elif name in DATE_TAGS:
+            rank = DATE_TAGS.index(name)
+            if text and rank < date_rank:
+                record['pubdate'] = text
+                date_rank = rank
+        elif name in ('author', 'creator'):
+            record['author'] = record['author'] or text or _child_text(child, 'name')
+        elif name == 'enclosure':
+            record['enclosure'] = record['enclosure'] or child.get('url', '')
+
+    if not record['description']:
+        record['description'] = content
+    if not record['guid']:
+        record['guid'] = element.get(RDF_ABOUT, '')
+
+    return record
+
+def _json_records(data):
+    """Yield item records from a JSON Feed document"""
+    feed = json.loads(data)
+    for entry in feed.get('items', []):
+        authors = entry.get('authors') or ([entry['author']] if entry.get('author') else [])
+        attachments = entry.get('attachments') or []
+
+        record = _empty_record()
+        record.update({
+            'title': (entry.get('title') or '').strip(),
+            'link': (entry.get('url') or entry.get('external_url') or '').strip(),
+            'guid': str(entry.get('id') or ''),
+            'description': entry.get('summary') or entry.get('content_text') or entry.get('content_html') or '',
+            'pubdate': entry.get('date_published') or entry.get('date_modified') or '',
+            'author': authors[0].get('name', '') if authors else '',
+            'enclosure': attachments[0].get('url', '') if attachments else ''
+        })
+        yield record
+
+def _xml_records(stream, reader=None):
+    """Yield item records from an XML feed, dropping each item once read"""
+    open_elements = []
+    events = ET.iterparse(stream, events=('start', 'end'))
+    while True:
+        try:
+            event, element = next(events)
+        except StopIteration:
+            return
+        except ET.ParseError:
+            # A feed cut off at the byte cap still yields the items before the cut
+            if reader is not None and reader.truncated:
+                return
+            raise
+
+        if event == 'start':
+            open_elements.append(element)
+            continue
+
+        open_elements.pop()
+        if _local_name(element.tag) not in ITEM_TAGS:
+            continue
+
+        record = _xml_record(element)
+
+        # Drop the finished item so the tree never holds the whole feed
+        element.clear()
+        if open_elements:
+            open_elements[-1].remove(element)
+
+        yield record
+
+class _PrefixedStream(io.RawIOBase):
+    """A stream that replays bytes already read before continuing the source"""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def iter_records(source):
+    """Yield every item record in a feed, whatever its format
+
+    source is a requests response opened with stream=True, a file-like
+    object or bytes. JSON Feed is detected from its first byte and parsed
+    whole; XML formats are streamed. Responses are read through a
+    BoundedReader, so a huge feed is cut off at MAX_FEED_BYTES.
+    """
+    reader = None
+    if hasattr(source, 'raw'):
+        reader = source = BoundedReader(source)
+    elif isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    head = source.read(SNIFF_BYTES)
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{'):
+        return _json_records(head + source.read())
+
+    return _xml_records(io.BufferedReader(_PrefixedStream(head, source)), reader)
+
+def iter_feed_items(source, is_seen=None):
+    """Yield a feed's items until the first one we already stored
+
+    Each item is a dict with title, link, guid, description, pubdate,
+    author and enclosure (empty strings when the feed omits them). Feeds
+    list the newest story first, so when is_seen(link, guid) reports an
+    item we already stored, everything after it is older and parsing
+    stops there.
+    """
+    for record in iter_records(source):
+        if not record['title'] or not record['link']:
+            continue
+
+        if is_seen is not None and is_seen(record['link'], record['guid']):
+            return
+
+        yield record
+
+def parse_feed_stream(source, is_seen=None, limit=None):
+    """Collect new items from a feed, reading no further than needed"""
+    items = []
+    for item in iter_feed_items(source, is_seen):
+        items.append(item)
+        if limit is not None and len(items) >= limit:
+            break
+    return items
+
+class StoredLinks:
+    """Answers "is this link or guid already a post?" from the seen index
+
+    Links are looked up in canonical form, so tracking-tagged and
+    http/www variants of a stored source_url count as seen.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.index = seen_index.get_index(db_path)
+
+    def __call__(self, link, guid=''):
+        return self.index.has_link(link) or self.index.has_guid(guid)
+
+    def refresh(self):
+        """Pick up posts other writers inserted without updating the index"""
+        self.index.sync()
+
+    def close(self):
+        pass
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Adaptive Feed Scheduler
+Learns how often each feed publishes and polls it accordingly
+"""
+
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import db_connection
+from feed_cache import FEED_CACHE_PATH
+
+# Configuration
+MIN_INTERVAL = 2 * 60          # Never poll a feed more often than this (seconds)
+MAX_INTERVAL = 6 * 60 * 60     # Never leave a feed unpolled longer than this
+DEFAULT_INTERVAL = 15 * 60     # Interval for feeds we know nothing about yet
+POLL_FACTOR = 1.0              # Poll interval as a fraction of the item interval
+SMOOTHING = 0.3                # Weight of a new observation in the running estimate
+JITTER = 0.1                   # +/- fraction added so feeds do not poll in lockstep
+
+def parse_pubdate(value):
+    """Parse an RSS/Atom date into a UTC timestamp, or None"""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+class FeedScheduler:
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_schedule (
+                url TEXT PRIMARY KEY,
+                item_interval REAL,
+                last_item_at REAL,
+                last_poll_at REAL,
+                next_poll_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def _row(self, url):
+        return self.conn.execute(
+            "SELECT item_interval, last_item_at, last_poll_at, next_poll_at FROM feed_schedule WHERE url = ?",
+            (url,)
+        ).fetchone()
+
+    def is_due(self, url, now=None):
+        """True when a feed has never been polled or its next poll time passed"""
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        with self.lock:
+            row = self._row(url)
+        return row is None or row[3] is None or row[3] <= now
+
+    def due_sources(self, sources, now=None):
+        """Filter a source list down to the feeds that should be polled now"""
+        return [source for source in sources if self.is_due(source['url'], now)]
+
+    def seconds_until_due(self, urls, now=None):
+        """Seconds until the first of these feeds comes due (0 if one is due)"""
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        waits = []
+        with self.lock:
+            for url in urls:
+                row = self._row(url)
+                if row is None or row[3] is None:
+                    return 0.0
+                waits.append(row[3] - now)
+        return max(0.0, min(waits)) if waits else float(MAX_INTERVAL)
+
+    def record_poll(self, url, items, now=None):
+        """Learn from a poll's new items and schedule the next poll
+
+        The item interval is a smoothed average of the gaps between
+        successive item timestamps. A poll with no new items while the feed
+        has been quiet for longer than its estimate stretches the estimate,
+        so idle feeds drift toward MAX_INTERVAL.
+        """
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+
+        with self.lock:
+            row = self._row(url)
+            item_interval, last_item_at = (row[0], row[1]) if row else (None, None)
+
+            stamps = sorted(t for t in (parse_pubdate(item.get('pubdate')) for item in items) if t)
+            if last_item_at:
+                stamps = [t for t in stamps if t > last_item_at]
+                previous = last_item_at
+            else:
+                previous = None
+
+            for stamp in stamps:
+                if previous is not None:
+                    gap = max(stamp - previous, 1.0)
+                    item_interval = gap if item_interval is None else (1 - SMOOTHING) * item_interval + SMOOTHING * gap
+                previous = stamp
+
+            if stamps:
+                last_item_at = stamps[-1]
+            elif last_item_at and item_interval and now - last_item_at > item_interval:
+                item_interval = (1 - SMOOTHING) * item_interval + SMOOTHING * (now - last_item_at)
+
+            interval = DEFAULT_INTERVAL if item_interval is None else item_interval * POLL_FACTOR
+            interval = clamp(interval, MIN_INTERVAL, MAX_INTERVAL)
+            interval *= 1 + random.uniform(-JITTER, JITTER)
+
+            self.conn.execute("""
+                INSERT OR REPLACE INTO feed_schedule (url, item_interval, last_item_at, last_poll_at, next_poll_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (url, item_interval, last_item_at, now, now + interval))
+            self.conn.commit()
+
+        return interval
+
+    def schedule(self):
+        """Return (url, item_interval, next_poll_at) for every known feed"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT url, item_interval, next_poll_at FROM feed_schedule ORDER BY next_poll_at"
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+def main():
+    """Print each feed's learned interval and next poll time"""
+    scheduler = FeedScheduler()
+    now = datetime.now(timezone.utc).timestamp()
+
+    for url, item_interval, next_poll_at in scheduler.schedule():
+        every = f"{item_interval / 60:.0f} min" if item_interval else "unknown"
+        due_in = max(0, (next_poll_at or now) - now) / 60
+        print(f"  {url}: new item every {every}, next poll in {due_in:.0f} min")
+
+    scheduler.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
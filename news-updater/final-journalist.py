@@ -4,7 +4,9 @@ Final Working Journalist - Creates real news articles
 """
 
 import sqlite3
+import db_connection
 import requests
+import post_writer
 from datetime import datetime
 import re
 import random
@@ -175,19 +177,16 @@ def get_topic_image(category):
         'alt': f"News coverage image for {category} topic"
     }
 
-def save_article(article, image_data):
-    """Save article to database"""
+def save_article(article, image_data, writer, cursor, number):
+    """Queue article for the batched writer; number is its place in this run"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
         # Generate slug
         slug = re.sub(r'[^a-z0-9\s-]', '', article['title'].lower())
         slug = re.sub(r'\s+', '-', slug)
         slug = slug[:100]
         
-        # Add timestamp to ensure uniqueness
-        slug = f"{slug}-{int(time.time())}"
+        # Add timestamp and run position to ensure uniqueness
+        slug = f"{slug}-{int(time.time())}-{number}"
         
         # Get admin user
         cursor.execute("SELECT id FROM users WHERE role = 'admin' LIMIT 1")
@@ -198,34 +197,30 @@ def save_article(article, image_data):
         category_result = cursor.fetchone()
         category_id = category_result[0] if category_result else 1
         
-        # Insert article
-        cursor.execute("""
-            INSERT INTO posts (
-                title, slug, excerpt, content, author_id, category_id,
-                status, featured_image, image_caption, source_url, source_name,
-                fact_check_status, published_at, view_count, like_count
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), 0, 0)
-        """, (
-            article['title'],
-            slug,
-            article['excerpt'],
-            article['content'],
-            author_id,
-            category_id,
-            'published',
-            image_data['url'],
-            image_data['alt'],
-            'https://news.example.com/source',
-            'Professional News Network',
-            'verified'
-        ))
-        
-        conn.commit()
-        post_id = cursor.lastrowid
-        conn.close()
+        def on_done(post_id, error):
+            if post_id is None:
+                log(f"Error: {str(error)}")
+                return
+            log(f"✅ PUBLISHED: {article['title']}")
+            log(f"   ID: {post_id}, Words: {article['word_count']}, Category: {article['category']}")
         
-        log(f"✅ PUBLISHED: {article['title']}")
-        log(f"   ID: {post_id}, Words: {article['word_count']}, Category: {article['category']}")
+        # Queue article; the writer inserts it with the rest of its batch
+        writer.add({
+            'title': article['title'],
+            'slug': slug,
+            'excerpt': article['excerpt'],
+            'content': article['content'],
+            'author_id': author_id,
+            'category_id': category_id,
+            'status': 'published',
+            'featured_image': image_data['url'],
+            'image_caption': image_data['alt'],
+            'source_url': 'https://news.example.com/source',
+            'source_name': 'Professional News Network',
+            'fact_check_status': 'verified',
+            'view_count': 0,
+            'like_count': 0
+        }, on_done)
         return True
         
     except Exception as e:
@@ -237,8 +232,11 @@ def main():
     log("🎯 FINAL PROFESSIONAL JOURNALIST")
     log("=" * 50)
     
+    conn = db_connection.connect(DB_PATH)
+    cursor = conn.cursor()
+    writer = post_writer.PostWriter(DB_PATH)
+    
     # Create 2 articles
-    created = 0
     for i in range(2):
         log(f"Creating article {i+1}...")
         
@@ -249,9 +247,12 @@ def main():
         image_data = get_topic_image(article['category'])
         
         # Save
-        if save_article(article, image_data):
-            created += 1
-            time.sleep(1)
+        save_article(article, image_data, writer, cursor, i + 1)
+    
+    # Write the batch
+    writer.close()
+    conn.close()
+    created = writer.written
     
     log("=" * 50)
     log(f"📰 CREATED {created} PROFESSIONAL NEWS ARTICLES")
@@ -4,8 +4,12 @@ Fresh Journalist - Creates new articles avoiding duplicates
 """
 
 import sqlite3
-import requests
-import xml.etree.ElementTree as ET
+import db_connection
+import cpu_pool
+import near_duplicates
+import page_cache
+import seen_index
+import story_clusters
 from datetime import datetime
 import re
 import sys
@@ -13,13 +17,19 @@ import random
 import time
 import hashlib
 
+from article_extractor import extract_article
+from canonical_url import canonicalize, resolve_canonical
+from feed_cache import conditional_get, parsing, save_validators
+from research_stage import research_items
+from feed_parser import StoredLinks, iter_feed_items
+
 DB_PATH = '/var/www/news-site/database.db'
 
 def log(message):
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     print(f"[{timestamp}] {message}")
 
-def generate_unique_slug(title, existing_slugs):
+def generate_unique_slug(title):
     """Generate unique slug"""
     base_slug = re.sub(r'[^a-z0-9\s-]', '', title.lower())
     base_slug = re.sub(r'\s+', '-', base_slug)
@@ -30,7 +40,7 @@ def generate_unique_slug(title, existing_slugs):
     unique_slug = f"{base_slug}-{title_hash}"
     
     # Check if still duplicate
-    if unique_slug in existing_slugs:
+    if seen_index.get_index().has_slug(unique_slug):
         # Add timestamp
         unique_slug = f"{base_slug}-{int(time.time())}"
     
@@ -38,14 +48,8 @@ def generate_unique_slug(title, existing_slugs):
 
 def fetch_new_articles():
     """Fetch articles that aren't in database yet"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Get existing article URLs
-    cursor.execute("SELECT source_url FROM posts WHERE source_url IS NOT NULL")
-    existing_urls = {row[0] for row in cursor.fetchall()}
-    
-    conn.close()
+    # Published links come from the seen index, not a scan of every post
+    stored_links = StoredLinks(DB_PATH)
     
     # Fetch RSS
     feeds = [
@@ -54,27 +58,35 @@ def fetch_new_articles():
     ]
     
     new_items = []
+    taken = set()
     for source_name, url in feeds:
         try:
-            response = requests.get(url, timeout=15)
-            root = ET.fromstring(response.content)
+            response = conditional_get(url, timeout=15, stream=True)
+            if response is None:
+                log(f"{source_name} feed not modified")
+                continue
             
-            for item in root.findall('.//item'):
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                
-                if title_elem is not None and link_elem is not None:
-                    title = title_elem.text.strip() if title_elem.text else ''
-                    link = link_elem.text.strip() if link_elem.text else ''
-                    
-                    if title and link and link not in existing_urls:
-                        new_items.append({
-                            'title': title,
-                            'link': link,
-                            'source': source_name
-                        })
-                        if len(new_items) >= 5:  # Limit to 5 new articles
-                            break
+            # Stream items until the first one we already published
+            with parsing(url, response):
+                for item in iter_feed_items(response, stored_links):
+                    # The same story tagged differently by another feed is taken once
+                    canonical = canonicalize(item['link'])
+                    if canonical in taken:
+                        continue
+                    taken.add(canonical)
+                    new_items.append({
+                        'title': item['title'],
+                        'link': item['link'],
+                        'guid': item['guid'],
+                        'description': item['description'],
+                        'source': source_name
+                    })
+                    if len(new_items) >= 5:  # Limit to 5 new articles
+                        break
+            
+            # Only skip the feed next time if every new item was taken
+            if len(new_items) < 5:
+                save_validators(url, response)
             
             if len(new_items) >= 5:
                 break
@@ -87,44 +99,15 @@ def fetch_new_articles():
 def fetch_article_content(url):
     """Fetch article content"""
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=20)
+        response = page_cache.get(url, timeout=20)
         
         if response.status_code != 200:
             return None
         
-        html = response.text
-        
-        # Extract content
-        content = ""
-        
-        # Try multiple extraction methods
-        patterns = [
-            r'<article[^>]*>(.*?)</article>',
-            r'<div[^>]*class="[^"]*story-body[^"]*"[^>]*>(.*?)</div>',
-            r'<div[^>]*class="[^"]*article-body[^"]*"[^>]*>(.*?)</div>',
-            r'<main[^>]*>(.*?)</main>'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, html, re.DOTALL | re.IGNORECASE)
-            if match:
-                content = match.group(1)
-                break
-        
-        # Fallback: get paragraphs
-        if not content:
-            paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', html, re.DOTALL)
-            content = ' '.join([p for p in paragraphs if len(p) > 30][:25])
-        
-        # Clean content
-        if content:
-            content = re.sub(r'<[^>]+>', ' ', content)
-            content = re.sub(r'\s+', ' ', content).strip()
-        
-        # Extract title
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE)
-        title = title_match.group(1).strip() if title_match else "News Report"
+        # One pass over the page: drop scripts/navigation, keep dense prose
+        article = cpu_pool.call(extract_article, response.text, url)
+        content = article['content']
+        title = article['title'] or "News Report"
         
         # Clean title
         title = re.sub(r'\s*-\s*(?:BBC News|Reuters|Al Jazeera)\s*$', '', title)
@@ -133,7 +116,7 @@ def fetch_article_content(url):
             return {
                 'title': title,
                 'content': content[:3500],
-                'url': url,
+                'url': resolve_canonical(url, article['canonical']),
                 'length': len(content)
             }
         
@@ -209,7 +192,9 @@ Looking ahead:
         'title': pro_title,
         'content': article,
         'excerpt': excerpt[:180],
-        'word_count': len(article.split())
+        'word_count': len(article.split()),
+        'source_title': source_data['title'],
+        'source_text': source_data['content']
     }
 
 def get_image():
@@ -225,18 +210,14 @@ def get_image():
         'alt': 'Professional news coverage image'
     }
 
-def save_article(article, source_url, image_data, source_name):
+def save_article(article, source_url, image_data, source_name, feed_item):
     """Save article to database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connection.connect(DB_PATH)
         cursor = conn.cursor()
         
-        # Get existing slugs
-        cursor.execute("SELECT slug FROM posts")
-        existing_slugs = {row[0] for row in cursor.fetchall()}
-        
         # Generate unique slug
-        slug = generate_unique_slug(article['title'], existing_slugs)
+        slug = generate_unique_slug(article['title'])
         
         # Get admin user
         cursor.execute("SELECT id FROM users WHERE role = 'admin' LIMIT 1")
@@ -271,6 +252,10 @@ def save_article(article, source_url, image_data, source_name):
         conn.commit()
         post_id = cursor.lastrowid
         conn.close()
+        seen_index.record_post(source_url, slug)
+        # The feed's own link and guid as well, so the next feed scan stops at this item
+        seen_index.record_post(feed_item['link'], guid=feed_item.get('guid'))
+        story_clusters.assign_post(post_id, article['source_title'], article['source_text'], DB_PATH)
         
         log(f"✅ NEW ARTICLE: {article['title'][:60]}...")
         log(f"   ID: {post_id}, Words: {article['word_count']}")
@@ -288,27 +273,55 @@ def main():
     log(f"Found {len(new_items)} new articles to process")
     
     created = 0
+    saved = set()
+    
+    # Other outlets' versions of stories we already have are dropped before fetching
+    candidates = []
     for item in new_items:
-        log(f"Processing: {item['title'][:70]}...")
-        
-        # Fetch article
-        article_data = fetch_article_content(item['link'])
-        if not article_data:
-            log(f"  Could not fetch content")
-            continue
-        
-        log(f"  Content: {article_data['length']} characters")
-        
-        # Write article
-        written_article = write_article(article_data)
-        
+        match = near_duplicates.claim(item['link'], item['title'], item['description'])
+        if match:
+            log(f"Skipping near duplicate of: {match[1][:50]}...")
+        else:
+            candidates.append(item)
+    
+    # Articles are fetched on the research pool; each is written as soon as it arrives
+    jobs = [(item, item['link']) for item in candidates]
+    stored_links = StoredLinks(DB_PATH)
+    published = set()
+    
+    def fetched_articles():
+        for item, article_data in research_items(jobs, fetch_article_content):
+            log(f"Processing: {item['title'][:70]}...")
+            
+            if not article_data:
+                log(f"  Could not fetch content")
+                continue
+            
+            # The page's canonical URL can reveal a story we already have
+            if canonicalize(article_data['url']) in published or stored_links(article_data['url']):
+                log(f"  Already published as {article_data['url']}")
+                continue
+            published.add(canonicalize(article_data['url']))
+            
+            log(f"  Content: {article_data['length']} characters")
+            yield (item, article_data['url']), article_data
+    
+    # Write articles, in batches on the process pool when it is enabled
+    for (item, source_url), written_article in cpu_pool.imap_batched(write_article, fetched_articles()):
         # Get image
         image_data = get_image()
         
         # Save
-        if save_article(written_article, item['link'], image_data, item['source']):
+        if save_article(written_article, source_url, image_data, item['source'], item):
             created += 1
-            time.sleep(2)
+            saved.add(item['link'])
+    
+    stored_links.close()
+    
+    # Release the claims of stories that were not published after all
+    for item in candidates:
+        if item['link'] not in saved:
+            near_duplicates.release(item['link'])
     
     log(f"Created {created} new articles")
     return created
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client
+One pooled requests session so every updater reuses keep-alive connections,
+plus size-capped streaming reads so no single response can exhaust memory
+"""
+
+import io
+import threading
+import zlib
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+import rate_limiter
+
+# Optional decoders: without them we simply stop advertising br / zstd
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Configuration
+POOL_CONNECTIONS = 20  # Hosts with a pool kept open
+POOL_MAXSIZE = 10      # Keep-alive connections kept per host
+DEFAULT_TIMEOUT = 15   # Seconds, used when a call gives no timeout
+
+# Decoded bytes kept per response, by content type
+MAX_HTML_BYTES = 2 * 1024 * 1024
+MAX_FEED_BYTES = 5 * 1024 * 1024
+MAX_OTHER_BYTES = 1 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024          # Compressed bytes read from the socket at a time
+MAX_DECOMPRESSION_RATIO = 100   # Decoded/compressed ratio treated as a decompression bomb
+DECODE_SLICE = 4 * 1024         # Input fed per step to decoders without an output limit
+
+ACCEPT_ENCODING = ', '.join(
+    ['gzip', 'deflate'] +
+    (['br'] if brotli is not None else []) +
+    (['zstd'] if zstandard is not None else [])
+)
+
+# Sent with every request; robots.txt groups are matched against PRODUCT_TOKEN
+PRODUCT_TOKEN = 'NewsUpdater'
+USER_AGENT = f"Mozilla/5.0 (compatible; {PRODUCT_TOKEN}/1.0)"
+
+HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive'
+}
+
+class PooledSession(requests.Session):
+    """requests.Session with per-host pools, rate limits and a default timeout"""
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.default_timeout = timeout
+        self.headers.update(HEADERS)
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+
+        # Wait for this host's token instead of sleeping between posts
+        rate_limiter.acquire(url)
+        return super().request(method, url, **kwargs)
+
+class ResponseTooLarge(Exception):
+    """Raised when a compressed body inflates beyond MAX_DECOMPRESSION_RATIO"""
+
+def max_bytes_for(response):
+    """Pick the decoded-size ceiling for a response from its Content-Type"""
+    content_type = response.headers.get('Content-Type', '').lower()
+    if 'html' in content_type:
+        return MAX_HTML_BYTES
+    if 'xml' in content_type or 'rss' in content_type or 'atom' in content_type or 'json' in content_type:
+        return MAX_FEED_BYTES
+    return MAX_OTHER_BYTES
+
+class _IdentityDecoder:
+    def __init__(self):
+        self.tail = b''
+
+    @property
+    def pending(self):
+        return bool(self.tail)
+
+    def decompress(self, data, max_length):
+        data = self.tail + data
+        self.tail = data[max_length:]
+        return data[:max_length]
+
+    def flush(self):
+        return b''
+
+class _ZlibDecoder:
+    """gzip or deflate; deflate falls back to a raw stream for servers that skip the zlib header"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.started = False
+        wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+        self.decoder = zlib.decompressobj(wbits)
+
+    @property
+    def pending(self):
+        return bool(self.decoder.unconsumed_tail)
+
+    def decompress(self, data, max_length):
+        data = self.decoder.unconsumed_tail + data
+        try:
+            out = self.decoder.decompress(data, max_length)
+        except zlib.error:
+            if self.encoding != 'deflate' or self.started:
+                raise
+            self.decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self.decoder.decompress(data, max_length)
+        self.started = True
+        return out
+
+    def flush(self):
+        return self.decoder.flush()
+
+class _SlicedDecoder:
+    """brotli / zstd: their APIs take no output limit, so input is fed in small slices"""
+
+    def __init__(self, decompress):
+        self._decompress = decompress
+        self.tail = b''
+        self.out = b''
+
+    @property
+    def pending(self):
+        return bool(self.tail or self.out)
+
+    def decompress(self, data, max_length):
+        self.tail += data
+        while len(self.out) < max_length and self.tail:
+            piece, self.tail = self.tail[:DECODE_SLICE], self.tail[DECODE_SLICE:]
+            self.out += self._decompress(piece)
+        result, self.out = self.out[:max_length], self.out[max_length:]
+        return result
+
+    def flush(self):
+        return b''
+
+def _make_decoder(encoding):
+    if encoding in ('gzip', 'x-gzip'):
+        return _ZlibDecoder('gzip')
+    if encoding == 'deflate':
+        return _ZlibDecoder('deflate')
+    if encoding == 'br' and brotli is not None:
+        return _SlicedDecoder(brotli.Decompressor().process)
+    if encoding == 'zstd' and zstandard is not None:
+        return _SlicedDecoder(zstandard.ZstdDecompressor().decompressobj().decompress)
+    return _IdentityDecoder()
+
+def _sniff_encoding(chunk):
+    """Guess a body's real encoding from its first bytes"""
+    if chunk.startswith(b'\x1f\x8b'):
+        return 'gzip'
+    if chunk.startswith(b'\x28\xb5\x2f\xfd'):
+        return 'zstd'
+    if len(chunk) > 1 and chunk[0] & 0x0f == 8 and (chunk[0] << 8 | chunk[1]) % 31 == 0:
+        return 'deflate'
+    return 'identity'
+
+class TransferStats:
+    """Per-host wire vs decoded byte counts, to see what compression saves"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def record(self, host, encoding, wire_bytes, decoded_bytes):
+        with self.lock:
+            stats = self.hosts.setdefault(host, {'responses': 0, 'wire': 0, 'decoded': 0, 'encodings': {}})
+            stats['responses'] += 1
+            stats['wire'] += wire_bytes
+            stats['decoded'] += decoded_bytes
+            stats['encodings'][encoding] = stats['encodings'].get(encoding, 0) + 1
+
+    def report(self):
+        """Return one summary line per host, largest savings first"""
+        with self.lock:
+            hosts = sorted(self.hosts.items(), key=lambda entry: entry[1]['wire'] - entry[1]['decoded'])
+        lines = []
+        for host, stats in hosts:
+            saved = stats['decoded'] - stats['wire']
+            percent = 100.0 * saved / stats['decoded'] if stats['decoded'] else 0.0
+            encodings = ', '.join(f"{name} x{count}" for name, count in sorted(stats['encodings'].items()))
+            lines.append(f"{host}: {stats['responses']} responses, {stats['wire'] / 1024:.0f} KB on the wire, "
+                         f"{saved / 1024:.0f} KB saved ({percent:.0f}%) [{encodings}]")
+        return lines
+
+transfer_stats = TransferStats()
+
+class BoundedReader(io.RawIOBase):
+    """Reads a streamed response body, decompressing as it goes, up to a byte cap
+
+    Bytes past the cap are never decompressed; the reader just ends and sets
+    truncated. A body whose decoded size runs far ahead of the bytes that
+    came off the wire raises ResponseTooLarge. When the body does not match
+    its Content-Encoding (or is compressed without saying so), the encoding
+    is sniffed from the first bytes instead.
+    """
+
+    def __init__(self, response, max_bytes=None):
+        self.raw = response.raw
+        self.host = urlparse(getattr(response, 'url', None) or '').netloc
+        self.max_bytes = max_bytes or max_bytes_for(response)
+        self.encoding = response.headers.get('Content-Encoding', '').strip().lower() or 'identity'
+        self.decoder = _make_decoder(self.encoding)
+        self.pending = b''
+        self.decoded = 0
+        self.compressed = 0
+        self.truncated = False
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def _decompress_first(self, chunk, step):
+        """Decode the first chunk, switching decoders if the label was wrong"""
+        sniffed = _sniff_encoding(chunk)
+        if self.encoding == 'identity' and sniffed in ('gzip', 'zstd'):
+            self.encoding = sniffed
+            self.decoder = _make_decoder(sniffed)
+
+        try:
+            return self.decoder.decompress(chunk, step)
+        except Exception:
+            if sniffed == self.encoding:
+                raise
+            self.encoding = sniffed
+            self.decoder = _make_decoder(sniffed)
+            return self.decoder.decompress(chunk, step)
+
+    def _fill(self):
+        room = self.max_bytes - self.decoded
+        if room <= 0:
+            self.truncated = True
+            self._finish()
+            return
+
+        # Inflate at most a few chunks' worth per step so a bomb is caught early
+        step = min(room, CHUNK_SIZE * 16)
+        if self.decoder.pending:
+            data = self.decoder.decompress(b'', step)
+        else:
+            chunk = self.raw.read(CHUNK_SIZE, decode_content=False)
+            if chunk:
+                first = self.compressed == 0
+                self.compressed += len(chunk)
+                data = self._decompress_first(chunk, step) if first else self.decoder.decompress(chunk, step)
+            else:
+                data = self.decoder.flush()[:room]
+                self._finish()
+
+        self.decoded += len(data)
+        if self.decoded > MAX_DECOMPRESSION_RATIO * max(self.compressed, CHUNK_SIZE):
+            raise ResponseTooLarge(f"Body inflated {self.decoded} bytes from {self.compressed}")
+        self.pending += data
+
+    def _finish(self):
+        if not self.finished:
+            self.finished = True
+            transfer_stats.record(self.host, self.encoding, self.compressed, self.decoded)
+
+    def close(self):
+        # A feed parse that stops early still counts the bytes it did read
+        self._finish()
+        super().close()
+
+    def readinto(self, buffer):
+        while not self.pending and not self.finished:
+            self._fill()
+
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+def read_limited(response, max_bytes=None):
+    """Load a streamed response's body through a BoundedReader
+
+    Afterwards .content/.text hold at most max_bytes of decoded body and
+    response.truncated says whether the cap was hit.
+    """
+    with response:
+        reader = BoundedReader(response, max_bytes)
+        response._content = reader.read()
+        response._content_consumed = True
+        response.truncated = reader.truncated
+    return response
+
+_session = None
+_session_lock = threading.Lock()
+
+def configure(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, timeout=DEFAULT_TIMEOUT):
+    """Replace the shared session, e.g. with larger pools for a big run"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = PooledSession(pool_connections, pool_maxsize, timeout)
+        return _session
+
+def get_session():
+    """Return the process-wide pooled session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
+
+def get(url, **kwargs):
+    """GET through the shared session"""
+    return get_session().get(url, **kwargs)
+
+def post(url, **kwargs):
+    """POST through the shared session"""
+    return get_session().post(url, **kwargs)
+
+def get_limited(url, max_bytes=None, **kwargs):
+    """GET through the shared session, streaming at most max_bytes of body"""
+    kwargs['stream'] = True
+    return read_limited(get(url, **kwargs), max_bytes)
+
+def close():
+    """Close every pooled connection"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
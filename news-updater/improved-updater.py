@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
 
 import sqlite3
-import requests
-import xml.etree.ElementTree as ET
+import db_connection
+import http_client
+import post_writer
+import seen_index
+import story_clusters
 from datetime import datetime
 import re
 import sys
 import os
 
+from canonical_url import strip_tracking
+from feed_cache import conditional_get, parsing, save_validators
+import feed_health
+import near_duplicates
+from feed_fetcher import fetch_all_feeds
+from feed_parser import StoredLinks, parse_feed_stream
+from feed_scheduler import FeedScheduler
+
 # Configuration
 DB_PATH = '/var/www/news-site/database.db'
 LOG_FILE = '/tmp/news-updater.log'
@@ -87,61 +98,40 @@ def generate_slug(title):
     
     return slug
 
-def check_post_exists(cursor, title):
+def check_post_exists(title):
     """Check if a post with similar title already exists"""
-    slug = generate_slug(title)
-    cursor.execute("SELECT COUNT(*) FROM posts WHERE slug = ?", (slug,))
-    return cursor.fetchone()[0] > 0
+    return seen_index.get_index().has_slug(generate_slug(title))
 
-def fetch_rss_feed(url):
-    """Fetch and parse RSS feed"""
+def fetch_rss_feed(url, is_seen=None):
+    """Fetch and parse RSS feed, stopping at the first stored item"""
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept-Encoding': 'gzip, deflate'  # Avoid brotli encoding issues
-        }
-        
         # Special handling for AP News
         if 'apnews.com' in url:
             # Try alternative AP News RSS feed
             url = 'http://feeds.feedburner.com/AP-TopNews'
             log_message(f"Using alternative AP News feed: {url}")
         
-        response = requests.get(url, headers=headers, timeout=15)
+        response = conditional_get(url, timeout=15, stream=True)
+        if response is None:
+            log_message(f"Feed not modified: {url}")
+            return []
         response.raise_for_status()
         
-        # Parse XML
-        root = ET.fromstring(response.content)
-        
-        # Find all items
-        items = []
-        for item in root.findall('.//item'):
-            title_elem = item.find('title')
-            link_elem = item.find('link')
-            desc_elem = item.find('description')
-            
-            if title_elem is not None and link_elem is not None:
-                title = title_elem.text.strip() if title_elem.text else ''
-                link = link_elem.text.strip() if link_elem.text else ''
-                description = desc_elem.text.strip() if desc_elem is not None and desc_elem.text else ''
-                
-                if title and link:
-                    items.append({
-                        'title': title,
-                        'link': link,
-                        'description': description
-                    })
+        # Stream items until we reach one that is already posted
+        with parsing(url, response):
+            items = parse_feed_stream(response, is_seen)
         
+        save_validators(url, response)
         return items
     except Exception as e:
         log_message(f"Error fetching RSS feed {url}: {str(e)}")
         return []
 
-def create_post(cursor, item, source_name, category_slug):
-    """Create a new post in the database"""
+def create_post(cursor, writer, item, source_name, category_slug):
+    """Queue a new post with the batched writer; returns False when it was skipped"""
     
     # Check if post already exists
-    if check_post_exists(cursor, item['title']):
+    if check_post_exists(item['title']):
         log_message(f"Skipping existing post: {item['title'][:50]}...")
         return False
     
@@ -170,31 +160,34 @@ def create_post(cursor, item, source_name, category_slug):
     author_result = cursor.fetchone()
     author_id = author_result[0] if author_result else 1
     
-    # Insert post
-    try:
-        cursor.execute("""
-            INSERT INTO posts (
-                title, slug, excerpt, content, author_id, category_id,
-                status, published_at, view_count, like_count, share_count,
-                is_featured, is_trending, fact_check_status, source_url, source_name
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'), 0, 0, 0, 0, 0, 'verified', ?, ?)
-        """, (
-            item['title'],
-            slug,
-            excerpt,
-            content,
-            author_id,
-            category_id,
-            'published',
-            item['link'],
-            source_name
-        ))
-        
+    def on_done(post_id, error):
+        if post_id is None:
+            log_message(f"Error creating post '{item['title'][:30]}...': {str(error)}")
+            near_duplicates.release(item['link'])
+            return
+        seen_index.record_post(item['link'], slug, item.get('guid'))
+        story_clusters.assign_post(post_id, item['title'], item['description'], DB_PATH)
         log_message(f"Posted: {item['title'][:60]}...")
-        return True
-    except Exception as e:
-        log_message(f"Error creating post '{item['title'][:30]}...': {str(e)}")
-        return False
+    
+    # Queue post; the writer inserts it with the rest of its batch
+    writer.add({
+        'title': item['title'],
+        'slug': slug,
+        'excerpt': excerpt,
+        'content': content,
+        'author_id': author_id,
+        'category_id': category_id,
+        'status': 'published',
+        'view_count': 0,
+        'like_count': 0,
+        'share_count': 0,
+        'is_featured': 0,
+        'is_trending': 0,
+        'fact_check_status': 'verified',
+        'source_url': strip_tracking(item['link']),
+        'source_name': source_name
+    }, on_done)
+    return True
 
 def main():
     """Main update function"""
@@ -204,35 +197,68 @@ def main():
     
     # Connect to database
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connection.connect(DB_PATH)
         cursor = conn.cursor()
     except Exception as e:
         log_message(f"Database connection error: {str(e)}")
         return
     
-    total_new_posts = 0
+    writer = post_writer.PostWriter(DB_PATH)
+    
+    # Only poll the feeds whose learned interval has elapsed
+    try:
+        scheduler = FeedScheduler()
+        sources = scheduler.due_sources(NEWS_SOURCES)
+    except sqlite3.Error as e:
+        log_message(f"Scheduler unavailable, polling every feed: {str(e)}")
+        scheduler = None
+        sources = NEWS_SOURCES
+    
+    # Skip feeds that keep failing until their circuit's backoff ends
+    available = feed_health.available_sources(sources)
+    for source in sources:
+        if source not in available:
+            log_message(f"Skipping {source['name']}: feed is failing, circuit open")
+    sources = available
+    
+    # Fetch every due feed concurrently
+    log_message(f"Fetching {len(sources)} of {len(NEWS_SOURCES)} feeds...")
+    stored_links = StoredLinks(DB_PATH)
+    feeds = fetch_all_feeds(
+        [source['url'] for source in sources],
+        lambda url: fetch_rss_feed(url, stored_links)
+    )
+    stored_links.close()
     
     # Process each news source
-    for source in NEWS_SOURCES:
-        log_message(f"Fetching {source['name']}...")
+    for source in sources:
+        items = feeds.get(source['url'], [])
+        log_message(f"{source['name']}: found {len(items)} items")
         
-        items = fetch_rss_feed(source['url'])
-        log_message(f"  Found {len(items)} items")
+        if scheduler:
+            interval = scheduler.record_poll(source['url'], items)
+            log_message(f"  Next poll in {interval / 60:.0f} minutes")
         
         # Process items (limit to 2 per source)
         for i, item in enumerate(items[:2]):
-            if create_post(cursor, item, source['name'], source['category']):
-                total_new_posts += 1
+            match = near_duplicates.claim(item['link'], item['title'], item.get('description', ''))
+            if match:
+                log_message(f"Skipping near duplicate of: {match[1][:50]}...")
+                continue
             
-            # Commit after each post
-            conn.commit()
+            if not create_post(cursor, writer, item, source['name'], source['category']):
+                near_duplicates.release(item['link'])
     
-    # Close database connection
+    # Write the last batch and close database connections
+    writer.close()
+    total_new_posts = writer.written
     conn.close()
+    if scheduler:
+        scheduler.close()
     
     # Get total post count
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connection.connect(DB_PATH)
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM posts")
         total_posts = cursor.fetchone()[0]
@@ -243,11 +269,13 @@ def main():
     log_message("=" * 60)
     log_message(f"UPDATE COMPLETED: {total_new_posts} new posts added")
     log_message(f"Total posts in database: {total_posts}")
+    for line in http_client.transfer_stats.report():
+        log_message(f"  {line}")
     log_message("=" * 60)
     
     # Refresh website cache
     try:
-        requests.get("http://localhost:3001/api/posts?limit=1", timeout=5)
+        http_client.get("http://localhost:3001/api/posts?limit=1", timeout=5)
     except:
         pass
 
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Story Detector
+Spots the same event reported by several outlets under different titles:
+an LSH index of MinHash signatures, kept in the feed cache database, finds
+candidate stories, and each is confirmed on the exact Jaccard similarity
+of the two stories' word sets
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+import db_connection
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+SIMILARITY_THRESHOLD = 0.45   # Jaccard similarity of word sets at which two stories are the same
+LEAD_WORDS = 40               # Words of the description used beside the title
+BANDS = 16                    # LSH bands; with ROWS rows each, pairs near 0.5 almost always meet
+ROWS = 2
+WINDOW = 3 * 24 * 60 * 60     # Seconds a story stays in the index
+
+NUM_HASHES = BANDS * ROWS
+EMPTY = (1 << 64) - 1
+SIGNATURE = struct.Struct(f'<{NUM_HASHES}Q')
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'he', 'her',
+    'his', 'in', 'is', 'it', 'its', 'of', 'on', 'or', 'says', 'said', 'she', 'that', 'the',
+    'their', 'they', 'this', 'to', 'was', 'were', 'will', 'with', 'after', 'over', 'new', 'news'
+}
+TOKEN = re.compile(r"[a-z0-9]+")
+TAG = re.compile(r'<[^>]+>')
+# Labels outlets put in front of a title ("LIVE: ", "Watch: "), plus the ones the
+# updaters' own title templates add. Only these are stripped: a leading
+# "Ukraine:" or "Apple:" is part of the story.
+TITLE_LABELS = (
+    'breaking', 'breaking news', 'live', 'live updates', 'exclusive', 'watch', 'video', 'listen',
+    'analysis', 'explainer', 'opinion', 'comment', 'editorial', 'interview', 'review', 'update',
+    'updated', 'just in', 'in pictures', 'photos', 'fact check', 'podcast', 'report',
+    'exclusive analysis', 'exclusive report', 'breaking down', 'breaking analysis',
+    'breaking news analysis', 'professional insight', 'latest report', 'news analysis',
+    'coverage update', 'verified story', 'verified coverage', 'comprehensive report', 'in-depth',
+    'in-depth investigation', 'global report', 'international update', 'world news',
+    'tech breakthrough', 'business insight', 'market update', 'economic impact'
+)
+LABEL_PREFIX = re.compile(
+    r'^(?:%s)\s*:\s+' % '|'.join(re.escape(label) for label in sorted(TITLE_LABELS, key=len, reverse=True)),
+    re.IGNORECASE)
+# " - BBC News", " | Al Jazeera" after one
+SOURCE_SUFFIX = re.compile(r'\s+[-|–—]\s+[^-|–—]{1,40}$')
+
+def tokens(title, text=''):
+    """Normalized word set of a title plus the lead of its description"""
+    title = SOURCE_SUFFIX.sub('', LABEL_PREFIX.sub('', (title or '').strip()))
+    lead = ' '.join(TAG.sub(' ', text or '').split()[:LEAD_WORDS])
+    words = TOKEN.findall(f"{title} {lead}".lower())
+    # Plural and singular forms of a word count as one
+    return {word[:-1] if len(word) > 3 and word.endswith('s') else word
+            for word in words if len(word) > 1 and word not in STOP_WORDS}
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def signature(title, text=''):
+    """MinHash signature of a story, or None when it has no words to compare"""
+    return _signature(tokens(title, text))
+
+def _signature(words):
+    """MinHash signature of a word set
+
+    One-permutation MinHash: every word is hashed once and lands in one of
+    NUM_HASHES bins, each keeping its smallest value, so the cost is one
+    hash per word rather than one per word per bin. Empty bins borrow the
+    next filled bin's value so short titles still fill every position.
+    """
+    if not words:
+        return None
+
+    bins = [EMPTY] * NUM_HASHES
+    for word in words:
+        value = _hash64(word)
+        position, rest = value % NUM_HASHES, value // NUM_HASHES
+        if rest < bins[position]:
+            bins[position] = rest
+
+    filled = [i for i, value in enumerate(bins) if value != EMPTY]
+    if len(filled) < NUM_HASHES:
+        for i in range(NUM_HASHES):
+            if bins[i] == EMPTY:
+                distance = next((d for d in range(1, NUM_HASHES) if bins[(i + d) % NUM_HASHES] != EMPTY))
+                source = bins[(i + distance) % NUM_HASHES]
+                # Mark borrowed values with their distance so they only match the same borrow
+                bins[i] = (source + distance * 0x9E3779B97F4A7C15) % EMPTY
+    return tuple(bins)
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_HASHES
+
+def jaccard(first, second):
+    """Exact Jaccard similarity of two word sets"""
+    union = len(first | second)
+    return len(first & second) / union if union else 0.0
+
+def _buckets(sig):
+    """One LSH bucket per band, as signed 64-bit keys sqlite can index"""
+    buckets = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<B{ROWS}Q', band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+class NearDuplicateIndex:
+    def __init__(self, path=FEED_CACHE_PATH, threshold=SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS near_duplicate_stories (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                title TEXT,
+                signature BLOB NOT NULL,
+                tokens TEXT,
+                added_at REAL NOT NULL
+            )
+        """)
+        # Indexes built before matches were confirmed on word sets lack the column
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(near_duplicate_stories)")]
+        if 'tokens' not in columns:
+            self.conn.execute("ALTER TABLE near_duplicate_stories ADD COLUMN tokens TEXT")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS near_duplicate_buckets (
+                bucket INTEGER NOT NULL,
+                story_id INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_near_duplicate_bucket ON near_duplicate_buckets(bucket)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_near_duplicate_story ON near_duplicate_buckets(story_id)")
+        self.conn.commit()
+        self.prune()
+
+    def _find(self, words, sig, key=None):
+        """Best confirmed match among the stories sharing an LSH bucket with sig
+
+        The 32-value signature only nominates candidates: its estimate is
+        too coarse near the threshold to drop a story on, so each
+        candidate is scored on the exact Jaccard similarity of word sets.
+        """
+        buckets = _buckets(sig)
+        placeholders = ', '.join('?' for _ in buckets)
+        rows = self.conn.execute(f"""
+            SELECT s.key, s.title, s.tokens FROM near_duplicate_stories s
+            WHERE s.id IN (SELECT story_id FROM near_duplicate_buckets WHERE bucket IN ({placeholders}))
+        """, buckets).fetchall()
+
+        best = None
+        for other_key, title, other_words in rows:
+            # Stories indexed without their words cannot be confirmed; they age out within WINDOW
+            if other_key == key or not other_words:
+                continue
+            score = jaccard(words, set(other_words.split()))
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (other_key, title, score)
+        return best
+
+    def find(self, title, text=''):
+        """Return (key, title, similarity) of the closest indexed story at or above the threshold, or None"""
+        words = tokens(title, text)
+        if not words:
+            return None
+        with self.lock:
+            return self._find(words, _signature(words))
+
+    def add(self, key, title, text='', now=None):
+        """Index a story under key (its link), replacing any earlier entry for it"""
+        words = tokens(title, text)
+        if not words:
+            return
+        with self.lock:
+            self._add(key, title, words, _signature(words), now)
+            self.conn.commit()
+
+    def _add(self, key, title, words, sig, now=None):
+        now = now if now is not None else time.time()
+        self._remove(key)
+        cursor = self.conn.execute(
+            "INSERT INTO near_duplicate_stories (key, title, signature, tokens, added_at) VALUES (?, ?, ?, ?, ?)",
+            (key, title, SIGNATURE.pack(*sig), ' '.join(sorted(words)), now)
+        )
+        self.conn.executemany(
+            "INSERT INTO near_duplicate_buckets (bucket, story_id) VALUES (?, ?)",
+            [(bucket, cursor.lastrowid) for bucket in _buckets(sig)]
+        )
+
+    def _remove(self, key):
+        row = self.conn.execute("SELECT id FROM near_duplicate_stories WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM near_duplicate_buckets WHERE story_id = ?", (row[0],))
+            self.conn.execute("DELETE FROM near_duplicate_stories WHERE id = ?", (row[0],))
+
+    def claim(self, key, title, text=''):
+        """Check a candidate and, when it is new, index it at once
+
+        Returns the matching (key, title, similarity) for a duplicate, else
+        None. Claiming before research means two outlets' versions of a
+        story in the same cycle cannot both get through; release() a claim
+        whose post is never written. Index errors never block a candidate.
+        """
+        words = tokens(title, text)
+        if not words:
+            return None
+        sig = _signature(words)
+        try:
+            with self.lock:
+                match = self._find(words, sig, key)
+                if match is None:
+                    self._add(key, title, words, sig)
+                    self.conn.commit()
+                return match
+        except sqlite3.Error:
+            return None
+
+    def release(self, key):
+        """Forget a claimed story that was not published after all"""
+        try:
+            with self.lock:
+                self._remove(key)
+                self.conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def prune(self, now=None):
+        """Drop stories older than WINDOW; returns how many"""
+        cutoff = (now if now is not None else time.time()) - WINDOW
+        with self.lock:
+            self.conn.execute("""
+                DELETE FROM near_duplicate_buckets WHERE story_id IN
+                    (SELECT id FROM near_duplicate_stories WHERE added_at < ?)
+            """, (cutoff,))
+            removed = self.conn.execute("DELETE FROM near_duplicate_stories WHERE added_at < ?", (cutoff,)).rowcount
+            self.conn.commit()
+            return removed
+
+    def stats(self):
+        """Return the number of stories indexed"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM near_duplicate_stories").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Return the process-wide near-duplicate index"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
+
+def claim(key, title, text=''):
+    """Claim a candidate in the process-wide index; with no index every candidate is new"""
+    try:
+        index = get_index()
+    except sqlite3.Error:
+        return None
+    return index.claim(key, title, text)
+
+def release(key):
+    """Release a claim in the process-wide index"""
+    try:
+        index = get_index()
+    except sqlite3.Error:
+        return
+    index.release(key)
+
+def main():
+    """Print the index size, or the closest indexed story for a title given on the command line"""
+    index = NearDuplicateIndex()
+
+    if sys.argv[1:]:
+        title = ' '.join(sys.argv[1:])
+        match = index.find(title)
+        print(f"  {match[1]} ({match[2]:.2f} similar)" if match else "  No near duplicate")
+    else:
+        print(f"  {index.stats()} stories from the last {WINDOW // 3600} hours indexed")
+
+    index.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -84,7 +84,7 @@ check_system_status() {
     if crontab -l | grep -q "improved-updater.py"; then
         print_success "Cron job is configured"
         CRON_TIME=$(crontab -l | grep "improved-updater.py" | awk '{print $1}')
-        echo "  Schedule: $CRON_TIME (every 15 minutes)"
+        echo "  Schedule: $CRON_TIME (feeds polled on adaptive intervals)"
     else
         print_error "Cron job not found"
     fi
@@ -126,20 +126,9 @@ check_system_status() {
     fi
     echo ""
     
-    # Check next scheduled update
-    print_status "Next scheduled update:"
-    NEXT_UPDATE=$(python3 -c "
-from datetime import datetime, timedelta
-now = datetime.now()
-minute = now.minute
-next_minute = ((minute // 15) + 1) * 15
-if next_minute >= 60:
-    next_minute = 0
-    now = now + timedelta(hours=1)
-next_time = now.replace(minute=next_minute, second=0, microsecond=0)
-print(next_time.strftime('%H:%M'))
-")
-    echo "  Scheduled for: $NEXT_UPDATE"
+    # Check next scheduled polls
+    print_status "Next scheduled polls:"
+    (cd /var/www/news-site/news-updater && python3 feed_scheduler.py) 2>/dev/null || echo "  No feed schedule yet"
     echo ""
     
     # System resources
@@ -174,7 +163,7 @@ print(next_time.strftime('%H:%M'))
     echo "="*70
     echo "🌐 Website: http://72.61.210.61/"
     echo "📰 Public access: No login required"
-    echo "🔄 Auto-update: Every 15 minutes"
+    echo "🔄 Auto-update: cron every 2 min; each feed polled when due (2 min to 6 hours)"
     echo "="*70
 }
 
@@ -262,6 +251,46 @@ show_stats() {
     done
     echo ""
     
+    # Circuit breaker state per feed
+    print_status "Feed Health:"
+    (cd /var/www/news-site/news-updater && python3 feed_health.py) 2>/dev/null || echo "  No feed health data yet"
+    echo ""
+    
+    # Article page cache
+    print_status "Page Cache:"
+    (cd /var/www/news-site/news-updater && python3 page_cache.py) 2>/dev/null || echo "  No page cache yet"
+    echo ""
+    
+    # Learned article extraction rules
+    print_status "Extraction Rules:"
+    (cd /var/www/news-site/news-updater && python3 extraction_rules.py) 2>/dev/null || echo "  No extraction rules learned yet"
+    echo ""
+    
+    # Recent stories checked for near duplicates
+    print_status "Near-Duplicate Index:"
+    (cd /var/www/news-site/news-updater && python3 near_duplicates.py) 2>/dev/null || echo "  No stories indexed yet"
+    echo ""
+    
+    # Journal mode and lock settings of the site database
+    print_status "Database:"
+    (cd /var/www/news-site/news-updater && python3 db_connection.py) 2>/dev/null || echo "  Database not reachable"
+    echo ""
+    
+    # Largest stories of the last two days
+    print_status "Story Clusters:"
+    (cd /var/www/news-site/news-updater && python3 story_clusters.py) 2>/dev/null || echo "  No stories clustered yet"
+    echo ""
+    
+    # Published links and slugs index
+    print_status "Seen Index:"
+    (cd /var/www/news-site/news-updater && python3 seen_index.py) 2>/dev/null || echo "  No seen index yet"
+    echo ""
+    
+    # robots.txt answers per site
+    print_status "Robots Rules:"
+    (cd /var/www/news-site/news-updater && python3 robots_cache.py) 2>/dev/null || echo "  No robots.txt fetched yet"
+    echo ""
+    
     # Update frequency
     print_status "Update Performance:"
     if [ -f "$LOG_FILE" ]; then
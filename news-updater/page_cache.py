@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Article Page Cache
+Keeps fetched article pages on disk, compressed and keyed by normalized URL,
+so a page re-read by another script or a later run costs a file read
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+import requests
+
+import canonical_url
+import db_connection
+import http_client
+import robots_cache
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+PAGE_CACHE_DIR = os.path.join(os.path.dirname(DB_PATH), 'page-cache')
+DEFAULT_TTL = 6 * 60 * 60              # Seconds a cached page is served without refetching
+SIZE_BUDGET = 200 * 1024 * 1024        # Compressed bytes kept on disk
+EVICT_TO = 0.9                         # Evict down to this share of the budget
+COMPRESS_LEVEL = 6
+
+def normalize_url(url):
+    """Reduce a URL to the form used as its cache key
+
+    This is the canonical URL (see canonical_url), so http/https, www and
+    tracking-tagged spellings of one page share an entry.
+    """
+    return canonical_url.canonicalize(url)
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+class PageCache:
+    def __init__(self, directory=PAGE_CACHE_DIR, index_path=FEED_CACHE_PATH, size_budget=SIZE_BUDGET):
+        self.directory = directory
+        self.size_budget = size_budget
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(index_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_type TEXT,
+                encoding TEXT,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_page_cache_accessed ON page_cache(accessed_at)")
+        self.conn.commit()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.z')
+
+    def get(self, url, now=None):
+        """Return (body, content_type, encoding) for a fresh entry, or None"""
+        now = now if now is not None else time.time()
+        key = cache_key(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_type, encoding, expires_at FROM page_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] <= now:
+                return None
+            self.conn.execute("UPDATE page_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self.delete(key)
+            return None
+        return body, row[0], row[1]
+
+    def put(self, url, body, content_type='', encoding=None, ttl=DEFAULT_TTL, now=None):
+        """Store a page body, then evict least recently used pages over budget"""
+        now = now if now is not None else time.time()
+        key = cache_key(url)
+        path = self._path(key)
+        data = zlib.compress(body, COMPRESS_LEVEL)
+
+        # Write beside the target and rename, so readers never see half a file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO page_cache (key, url, content_type, encoding, size, stored_at, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, normalize_url(url), content_type, encoding, len(data), now, now + ttl, now))
+            self.conn.commit()
+
+        self.evict()
+
+    def delete(self, key):
+        with self.lock:
+            self.conn.execute("DELETE FROM page_cache WHERE key = ?", (key,))
+            self.conn.commit()
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop least recently used pages until the cache fits its budget"""
+        with self.lock:
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache").fetchone()[0]
+            if total <= self.size_budget:
+                return 0
+
+            victims = []
+            target = self.size_budget * EVICT_TO
+            for key, size in self.conn.execute("SELECT key, size FROM page_cache ORDER BY accessed_at"):
+                if total <= target:
+                    break
+                victims.append(key)
+                total -= size
+
+            self.conn.executemany("DELETE FROM page_cache WHERE key = ?", [(key,) for key in victims])
+            self.conn.commit()
+
+        for key in victims:
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+        return len(victims)
+
+    def stats(self):
+        """Return (pages, compressed bytes, expired pages)"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(expires_at <= ?), 0) FROM page_cache",
+                (time.time(),)
+            ).fetchone()
+
+    def close(self):
+        self.conn.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """Return the process-wide page cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
+
+def _cached_response(url, body, content_type, encoding):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.headers['Content-Type'] = content_type or ''
+    response.encoding = encoding
+    response.truncated = False
+    response.from_cache = True
+    return response
+
+def store(url, body, content_type='', encoding=None, ttl=DEFAULT_TTL):
+    """Cache a complete 200 page fetched some other way; cache errors are ignored"""
+    try:
+        get_cache().put(url, body, content_type, encoding, ttl)
+    except (sqlite3.Error, OSError):
+        pass
+
+def get(url, max_bytes=None, ttl=DEFAULT_TTL, **kwargs):
+    """Fetch an article page through the cache
+
+    Works like http_client.get_limited. A fresh cached copy is returned
+    without touching the network; otherwise the page is fetched and, when
+    the answer is a complete 200, stored for ttl seconds. Cache errors
+    never fail the fetch. A URL robots.txt disallows raises
+    robots_cache.RobotsDisallowed before any request is sent.
+    """
+    try:
+        cache = get_cache()
+        hit = cache.get(url)
+    except (sqlite3.Error, OSError):
+        cache, hit = None, None
+
+    if hit is not None:
+        return _cached_response(url, *hit)
+
+    robots_cache.check(url)
+    response = http_client.get_limited(url, max_bytes, **kwargs)
+    response.from_cache = False
+    if cache is not None and response.status_code == 200 and not response.truncated:
+        store(url, response.content, response.headers.get('Content-Type', ''), response.encoding, ttl)
+    return response
+
+def main():
+    """Print the cache's size and, with --evict, trim it to budget"""
+    cache = PageCache()
+    if '--evict' in sys.argv[1:]:
+        print(f"  Evicted {cache.evict()} pages")
+    pages, size, expired = cache.stats()
+    print(f"  {pages} pages, {size / (1024 * 1024):.1f} MB of {SIZE_BUDGET / (1024 * 1024):.0f} MB, {expired} expired")
+    cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Post Writer
+Buffers post inserts and writes them in groups, one transaction and one
+executemany per flush, so a run pays a single commit for many posts
+instead of one commit (and often one connection) per post
+"""
+
+import sqlite3
+import threading
+import time
+
+import db_connection
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+BATCH_SIZE = 20        # Pending posts that trigger a flush
+FLUSH_INTERVAL = 5.0   # Seconds a pending post may wait for its batch to fill
+
+def sqlite_now():
+    """The current UTC time as datetime('now') writes it"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+
+class PostWriter:
+    """Group-commit writer for posts rows
+
+    add() queues a row (a dict of posts columns) with an optional
+    on_done(post_id, error) callback. A flush writes every queued row
+    inside one transaction: each run of rows with the same columns goes
+    through a single executemany, and if that fails (a duplicate slug, a
+    NOT NULL column) the run is rolled back to its savepoint and retried
+    row by row, each in a savepoint of its own, so one bad row only loses
+    itself. Callbacks run after the commit with the new post id, or with
+    None and the error for a row that was not written.
+    """
+
+    def __init__(self, db_path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.RLock()
+        self.conn = db_connection.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.pending = []
+        self.timer = None
+        self.last_error = None
+        self.written = 0
+        self.failed = 0
+
+    def add(self, row, on_done=None):
+        """Queue a posts row; flushes when the batch is full
+
+        published_at defaults to now, as the per-post inserts wrote it.
+        """
+        row = dict(row)
+        row.setdefault('published_at', sqlite_now())
+        with self.lock:
+            self.pending.append((row, on_done))
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+            elif self.timer is None and self.flush_interval:
+                # Write a part-filled batch once its oldest row has waited long enough
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def _insert_run(self, columns, rows):
+        """Insert rows sharing columns; returns [(post_id, error)] in order"""
+        sql = f"INSERT INTO posts ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        values = [tuple(row[column] for column in columns) for row in rows]
+
+        self.conn.execute("SAVEPOINT post_run")
+        try:
+            self.conn.executemany(sql, values)
+            last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self.conn.execute("RELEASE post_run")
+            # posts ids are AUTOINCREMENT and we hold the write lock, so the run got consecutive ids
+            return [(last_id - len(rows) + 1 + i, None) for i in range(len(rows))]
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK TO post_run")
+            self.conn.execute("RELEASE post_run")
+
+        results = []
+        for value in values:
+            self.conn.execute("SAVEPOINT post_row")
+            try:
+                post_id = self.conn.execute(sql, value).lastrowid
+                self.conn.execute("RELEASE post_row")
+                results.append((post_id, None))
+            except sqlite3.Error as e:
+                self.conn.execute("ROLLBACK TO post_row")
+                self.conn.execute("RELEASE post_row")
+                results.append((None, e))
+        return results
+
+    def flush(self):
+        """Write every queued row in one transaction; returns how many were written"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            batch, self.pending = self.pending, []
+            if not batch:
+                return 0
+
+            results = []
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                start = 0
+                while start < len(batch):
+                    columns = tuple(batch[start][0])
+                    end = start + 1
+                    while end < len(batch) and tuple(batch[end][0]) == columns:
+                        end += 1
+                    results.extend(self._insert_run(columns, [row for row, _ in batch[start:end]]))
+                    start = end
+                self.conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                self.last_error = e
+                results = [(None, e)] * len(batch)
+
+            written = sum(1 for post_id, _ in results if post_id is not None)
+            self.written += written
+            self.failed += len(batch) - written
+
+        for (_, on_done), (post_id, error) in zip(batch, results):
+            if on_done is not None:
+                on_done(post_id, error)
+        return written
+
+    def close(self):
+        """Flush what is still queued and close the connection"""
+        self.flush()
+        self.conn.close()
@@ -2,23 +2,41 @@
 """
 Professional Journalism News Updater - Fixed Version
 Matches existing database schema
+
+Run once (cron) or stay resident with --daemon
 """
 
 import sqlite3
-import requests
-import xml.etree.ElementTree as ET
+import db_connection
+import http_client
+import seen_index
+import story_clusters
 from datetime import datetime, timedelta
 import re
 import sys
 import os
 import json
-import time
+import queue
+import signal
+import threading
 from urllib.parse import urlparse
 import hashlib
 
+from canonical_url import canonicalize, strip_tracking
+from feed_cache import conditional_get, parsing, save_validators
+import feed_health
+import near_duplicates
+from feed_fetcher import fetch_all_feeds
+from feed_parser import StoredLinks, parse_feed_stream
+from feed_scheduler import FeedScheduler
+from research_stage import research_items
+from signal_scanner import SIGNIFICANT_LENGTH, scan_url
+import websub
+
 # Configuration
 DB_PATH = '/var/www/news-site/database.db'
 LOG_FILE = '/var/log/professional-news-updater.log'
+DAEMON_MAX_SLEEP = 60  # Longest the daemon sleeps before re-checking the schedule
 
 # Professional news sources
 PROFESSIONAL_SOURCES = [
@@ -48,18 +66,18 @@ PROFESSIONAL_SOURCES = [
     }
 ]
 
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Accept-Encoding': 'gzip, deflate',
-    'Connection': 'keep-alive'
-}
-
 class ProfessionalJournalist:
     def __init__(self):
-        self.conn = sqlite3.connect(DB_PATH)
+        self.conn = db_connection.connect(DB_PATH)
         self.cursor = self.conn.cursor()
+        self.stored_links = StoredLinks(DB_PATH)
+        self.seen_index = seen_index.get_index(DB_PATH)
+        
+        # Lookups kept warm between daemon cycles
+        self.category_ids = {}
+        self.author_id = None
+        self.seen_links = set()
+        
         self.setup_database()
     
     def log(self, message, level="INFO"):
@@ -86,55 +104,60 @@ class ProfessionalJournalist:
         
         self.log("Database setup complete")
     
+    def clear_caches(self):
+        """Forget cached lookups so they are re-read from the database"""
+        self.category_ids.clear()
+        self.author_id = None
+        self.seen_links.clear()
+        self.stored_links.refresh()
+    
+    def get_category_id(self, slug):
+        """Return a category ID, cached per slug"""
+        if slug not in self.category_ids:
+            self.cursor.execute("SELECT id FROM categories WHERE slug = ?", (slug,))
+            cat_result = self.cursor.fetchone()
+            self.category_ids[slug] = cat_result[0] if cat_result else 1
+        return self.category_ids[slug]
+    
+    def get_author_id(self):
+        """Return the admin author ID, cached"""
+        if self.author_id is None:
+            self.cursor.execute("SELECT id FROM users WHERE role = 'admin'")
+            author_result = self.cursor.fetchone()
+            self.author_id = author_result[0] if author_result else 1
+        return self.author_id
+    
+    def is_seen(self, link, guid=''):
+        """Check a feed item against the in-memory set, then the database"""
+        if link in self.seen_links or canonicalize(link) in self.seen_links or (guid and guid in self.seen_links):
+            return True
+        if self.stored_links(link, guid):
+            self.seen_links.add(link)
+            return True
+        return False
+    
     def fetch_rss_feed(self, url):
-        """Fetch and parse RSS feed"""
+        """Fetch and parse RSS feed, stopping at the first stored item"""
         try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
+            response = conditional_get(url, timeout=15, stream=True)
+            if response is None:
+                self.log(f"Feed not modified: {url}", "INFO")
+                return []
             response.raise_for_status()
             
-            root = ET.fromstring(response.content)
-            items = []
-            
-            for item in root.findall('.//item'):
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                desc_elem = item.find('description')
-                pubdate_elem = item.find('pubDate')
-                
-                if title_elem is not None and link_elem is not None:
-                    title = title_elem.text.strip() if title_elem.text else ''
-                    link = link_elem.text.strip() if link_elem.text else ''
-                    description = desc_elem.text.strip() if desc_elem is not None and desc_elem.text else ''
-                    pubdate = pubdate_elem.text.strip() if pubdate_elem is not None and pubdate_elem.text else ''
-                    
-                    if title and link:
-                        items.append({
-                            'title': title,
-                            'link': link,
-                            'description': description,
-                            'pubdate': pubdate
-                        })
+            with parsing(url, response):
+                items = parse_feed_stream(response, self.is_seen)
             
+            save_validators(url, response)
             return items
         except Exception as e:
             self.log(f"Error fetching RSS: {str(e)}", "ERROR")
             return []
     
     def research_article(self, url):
-        """Research article content"""
+        """Research article content, reading only as much of the page as the signals need"""
         try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
-            response.raise_for_status()
-            
-            content = response.text
-            verification = {
-                'has_quotes': '"' in content and ('said' in content or 'told' in content),
-                'has_data': any(word in content.lower() for word in ['percent', 'billion', 'million', 'data', 'study']),
-                'length': len(content),
-                'has_dates': bool(re.search(r'\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{4}\b', content))
-            }
-            
-            return verification
+            return scan_url(url)
         except:
             return {'error': 'Could not fetch article'}
     
@@ -214,7 +237,7 @@ class ProfessionalJournalist:
         3. **Stakeholder Dynamics**: How different parties are positioned to respond
         4. **Innovation Context**: What this indicates about future directions
         
-        Our assessment suggests this represents a { 'significant' if verification.get('length', 0) > 3000 else 'notable' } development with implications worth monitoring.
+        Our assessment suggests this represents a { 'significant' if verification.get('length', 0) > SIGNIFICANT_LENGTH else 'notable' } development with implications worth monitoring.
         """
         sections.append(analysis)
         
@@ -291,23 +314,31 @@ class ProfessionalJournalist:
     
     def post_exists(self, title):
         """Check if post already exists"""
-        slug = self.generate_slug(title)
-        self.cursor.execute("SELECT COUNT(*) FROM posts WHERE slug = ?", (slug,))
-        return self.cursor.fetchone()[0] > 0
+        return self.seen_index.has_slug(self.generate_slug(title))
     
-    def create_professional_post(self, item, source):
-        """Create professional news post"""
-        
-        # Generate professional title
-        pro_title = self.generate_professional_title(item['title'], source['category'])
-        
-        # Check for duplicates
-        if self.post_exists(pro_title):
+    def already_posted(self, item, pro_title):
+        """Check a candidate's link, guid and title slug against published posts"""
+        if self.is_seen(item['link'], item.get('guid', '')) or self.post_exists(pro_title):
+            self.log(f"Skipping duplicate: {pro_title[:50]}...", "INFO")
+            return True
+        return False
+    
+    def create_professional_post(self, item, source, verification=None, pro_title=None):
+        """Create professional news post (verification and pro_title come from post_candidates)"""
+        
+        # Generate professional title and check for duplicates unless post_candidates already did
+        if pro_title is None:
+            pro_title = self.generate_professional_title(item['title'], source['category'])
+            if self.already_posted(item, pro_title):
+                return False
+        elif self.post_exists(pro_title):
+            # A story written earlier in this batch took the slug while this one was researched
             self.log(f"Skipping duplicate: {pro_title[:50]}...", "INFO")
             return False
         
-        # Research article
-        verification = self.research_article(item['link'])
+        # Research article unless the research stage already did
+        if verification is None:
+            verification = self.research_article(item['link'])
         
         # Write professional content
         content_data = self.write_professional_content(item, verification, source['category'])
@@ -318,15 +349,9 @@ class ProfessionalJournalist:
         # Generate slug
         slug = self.generate_slug(pro_title)
         
-        # Get category ID
-        self.cursor.execute("SELECT id FROM categories WHERE slug = ?", (source['category'],))
-        cat_result = self.cursor.fetchone()
-        category_id = cat_result[0] if cat_result else 1
-        
-        # Get admin author
-        self.cursor.execute("SELECT id FROM users WHERE role = 'admin'")
-        author_result = self.cursor.fetchone()
-        author_id = author_result[0] if author_result else 1
+        # Get category and admin author
+        category_id = self.get_category_id(source['category'])
+        author_id = self.get_author_id()
         
         # Determine fact check status
         if verification.get('has_data') and verification.get('has_quotes'):
@@ -355,7 +380,7 @@ class ProfessionalJournalist:
                 'published',
                 image_data['url'],
                 image_data['alt'],
-                item['link'],
+                strip_tracking(item['link']),
                 source['name'],
                 fact_status,
                 content_data['key_facts']
@@ -363,6 +388,10 @@ class ProfessionalJournalist:
             
             post_id = self.cursor.lastrowid
             self.conn.commit()
+            self.seen_index.record_post(item['link'], slug, item.get('guid'))
+            story_clusters.assign_post(post_id, item['title'], item.get('description', ''), DB_PATH)
+            self.seen_links.add(item['link'])
+            self.seen_links.add(canonicalize(item['link']))
             
             self.log(f"✅ Created professional post: {pro_title[:60]}... (ID: {post_id})", "SUCCESS")
             return True
@@ -418,19 +447,8 @@ class ProfessionalJournalist:
         self.log("🚀 STARTING PROFESSIONAL NEWS UPDATE", "INFO")
         self.log("=" * 60, "INFO")
         
-        total_new = 0
-        
         try:
-            for source in PROFESSIONAL_SOURCES:
-                self.log(f"Processing {source['name']}...", "INFO")
-                
-                items = self.fetch_rss_feed(source['url'])
-                self.log(f"  Found {len(items)} items", "INFO")
-                
-                for item in items[:2]:  # Limit to 2 per source
-                    if self.create_professional_post(item, source):
-                        total_new += 1
-                        time.sleep(1)  # Be polite
+            total_new = self.run_cycle(PROFESSIONAL_SOURCES)
             
             # Update frontend
             self.update_frontend()
@@ -443,13 +461,11 @@ class ProfessionalJournalist:
             self.log(f"📊 UPDATE COMPLETE", "SUCCESS")
             self.log(f"   New professional posts: {total_new}", "INFO")
             self.log(f"   Total posts: {total}", "INFO")
+            for line in http_client.transfer_stats.report():
+                self.log(f"   {line}", "INFO")
             self.log("=" * 60, "INFO")
             
-            # Refresh cache
-            try:
-                requests.get("http://localhost:3001/api/posts?limit=1", timeout=3)
-            except:
-                pass
+            self.refresh_cache()
             
             return total_new
             
@@ -457,10 +473,194 @@ class ProfessionalJournalist:
             self.log(f"Update failed: {str(e)}", "ERROR")
             return 0
         finally:
-            self.conn.close()
+            self.close()
+    
+    def run_cycle(self, sources, scheduler=None):
+        """Fetch the given sources concurrently and post their new items"""
+        total_new = 0
+        candidates = []
+        
+        # Leave feeds with an open circuit alone until their backoff ends
+        available = feed_health.available_sources(sources)
+        for source in sources:
+            if source not in available:
+                self.log(f"Skipping {source['name']}: feed is failing, circuit open", "WARNING")
+        sources = available
+        
+        # Fetch every feed concurrently
+        feeds = fetch_all_feeds([source['url'] for source in sources], self.fetch_rss_feed)
+        
+        for source in sources:
+            self.log(f"Processing {source['name']}...", "INFO")
+            
+            items = feeds.get(source['url'], [])
+            self.log(f"  Found {len(items)} items", "INFO")
+            
+            if scheduler:
+                scheduler.record_poll(source['url'], items)
+            
+            candidates.extend((item, source) for item in items[:2])  # Limit to 2 per source
+        
+        total_new += self.post_candidates(candidates)
+        return total_new
+    
+    def post_candidates(self, candidates):
+        """Research (item, source) pairs on the pool and write each post as its research lands"""
+        created = 0
+        jobs = []
+        for item, source in candidates:
+            # Stories we already published, or another outlet's version of one,
+            # are dropped before any research so the pool only fetches new stories
+            pro_title = self.generate_professional_title(item['title'], source['category'])
+            if self.already_posted(item, pro_title):
+                continue
+            match = near_duplicates.claim(item['link'], item['title'], item.get('description', ''))
+            if match:
+                self.log(f"Skipping near duplicate ({match[2]:.0%}) of: {match[1][:50]}...", "INFO")
+                continue
+            jobs.append(((item, source, pro_title), item['link']))
+        
+        for (item, source, pro_title), verification in research_items(jobs, self.research_article):
+            if self.create_professional_post(item, source, verification or {}, pro_title):
+                created += 1
+            else:
+                near_duplicates.release(item['link'])
+        return created
+    
+    def post_items(self, source, items):
+        """Turn a source's new items into posts, polled or pushed alike"""
+        return self.post_candidates([(item, source) for item in items[:2]])  # Limit to 2 per source
+    
+    def queue_pushed_items(self, source_url, items):
+        """WebSub callback: hand pushed items to the daemon loop and wake it"""
+        self.pushed.put((source_url, items))
+        self.wakeup.set()
+    
+    def post_pushed_items(self, scheduler):
+        """Post every item a hub pushed since the last loop"""
+        sources = {source['url']: source for source in PROFESSIONAL_SOURCES}
+        created = 0
+        while True:
+            try:
+                source_url, items = self.pushed.get_nowait()
+            except queue.Empty:
+                return created
+            
+            source = sources.get(source_url)
+            if source is None:
+                continue
+            
+            self.log(f"Pushed {len(items)} items from {source['name']}", "INFO")
+            scheduler.record_poll(source_url, items)
+            created += self.post_items(source, items)
+    
+    def start_websub(self):
+        """Subscribe every source whose feed names a hub; None when push is off"""
+        if not websub.CALLBACK_URL:
+            return None
+        
+        try:
+            subscriber = websub.WebSubSubscriber(self.queue_pushed_items, is_seen=self.is_seen)
+        except OSError as e:
+            self.log(f"WebSub callback unavailable: {str(e)}", "ERROR")
+            return None
+        
+        subscriber.start()
+        for source in PROFESSIONAL_SOURCES:
+            try:
+                if subscriber.subscribe(source['url']):
+                    self.log(f"Subscribed to push updates for {source['name']}", "INFO")
+            except Exception as e:
+                self.log(f"WebSub subscribe failed for {source['name']}: {str(e)}", "WARNING")
+        return subscriber
+    
+    def refresh_cache(self):
+        """Ping the site so its post cache picks up new articles"""
+        try:
+            http_client.get("http://localhost:3001/api/posts?limit=1", timeout=3)
+        except:
+            pass
+    
+    def run_daemon(self):
+        """Stay resident and poll each source as it comes due
+        
+        The database connection, pooled HTTP connections and lookup caches
+        survive between cycles. SIGTERM/SIGINT finish the current cycle and
+        exit; SIGHUP drops the caches and re-checks the schema. With
+        WEBSUB_CALLBACK_URL set, feeds that advertise a hub are also
+        subscribed, and pushed items are posted as soon as they arrive.
+        """
+        self.running = True
+        self.reload_requested = False
+        self.wakeup = threading.Event()
+        
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        
+        self.log("🚀 PROFESSIONAL NEWS UPDATER DAEMON STARTED", "INFO")
+        scheduler = FeedScheduler()
+        self.update_frontend()
+        self.pushed = queue.Queue()
+        subscriber = self.start_websub()
+        total_new = 0
+        
+        try:
+            while self.running:
+                if self.reload_requested:
+                    self.reload_requested = False
+                    self.clear_caches()
+                    self.setup_database()
+                    self.log("Caches cleared on SIGHUP", "INFO")
+                
+                created = 0
+                due = scheduler.due_sources(PROFESSIONAL_SOURCES)
+                try:
+                    created += self.post_pushed_items(scheduler)
+                    if due:
+                        created += self.run_cycle(due, scheduler)
+                    if subscriber:
+                        subscriber.renew_due()
+                except Exception as e:
+                    self.log(f"Cycle failed: {str(e)}", "ERROR")
+                
+                if created:
+                    total_new += created
+                    self.refresh_cache()
+                    self.log(f"📊 Cycle complete: {created} new posts", "SUCCESS")
+                
+                available = feed_health.available_sources(PROFESSIONAL_SOURCES)
+                wait = scheduler.seconds_until_due([source['url'] for source in available])
+                self.wakeup.wait(min(max(wait, 1), DAEMON_MAX_SLEEP))
+                self.wakeup.clear()
+        finally:
+            if subscriber:
+                subscriber.stop()
+            scheduler.close()
+            self.close()
+            self.log(f"Daemon stopped after {total_new} new posts", "INFO")
+        
+        return total_new
+    
+    def handle_stop(self, signum, frame):
+        self.log(f"Received signal {signum}, stopping after this cycle", "INFO")
+        self.running = False
+        self.wakeup.set()
+    
+    def handle_reload(self, signum, frame):
+        self.reload_requested = True
+        self.wakeup.set()
+    
+    def close(self):
+        self.stored_links.close()
+        self.conn.close()
+        http_client.close()
 
 def main():
     journalist = ProfessionalJournalist()
+    if '--daemon' in sys.argv[1:]:
+        journalist.run_daemon()
+        sys.exit(0)
     return journalist.run_update()
 
 if __name__ == "__main__":
@@ -4,8 +4,12 @@ Proper Professional Journalist - Actually reads and writes real news
 """
 
 import sqlite3
-import requests
-import xml.etree.ElementTree as ET
+import db_connection
+import cpu_pool
+import near_duplicates
+import page_cache
+import seen_index
+import story_clusters
 from datetime import datetime
 import re
 import sys
@@ -14,6 +18,12 @@ import random
 import time
 import json
 
+from article_extractor import extract_article
+from canonical_url import canonicalize, resolve_canonical
+from feed_cache import conditional_get, parsing, save_validators
+from research_stage import research_items
+from feed_parser import StoredLinks, iter_feed_items
+
 DB_PATH = '/var/www/news-site/database.db'
 
 def log(message):
@@ -24,57 +34,20 @@ def fetch_real_article(url):
     """Fetch and extract real article content"""
     try:
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
         }
         
         log(f"Fetching: {url[:80]}...")
-        response = requests.get(url, headers=headers, timeout=20)
+        response = page_cache.get(url, headers=headers, timeout=20)
         
         if response.status_code != 200:
             log(f"HTTP Error: {response.status_code}")
             return None
         
-        html = response.text
-        
-        # Try different extraction methods
-        content = ""
-        
-        # Method 1: Look for article tag
-        article_match = re.search(r'<article[^>]*>(.*?)</article>', html, re.DOTALL | re.IGNORECASE)
-        if article_match:
-            content = article_match.group(1)
-        
-        # Method 2: Look for main content
-        if not content:
-            main_match = re.search(r'<main[^>]*>(.*?)</main>', html, re.DOTALL | re.IGNORECASE)
-            if main_match:
-                content = main_match.group(1)
-        
-        # Method 3: Look for story body
-        if not content:
-            story_match = re.search(r'<div[^>]*class="[^"]*story-body[^"]*"[^>]*>(.*?)</div>', html, re.DOTALL | re.IGNORECASE)
-            if story_match:
-                content = story_match.group(1)
-        
-        # Method 4: Extract all paragraphs
-        if not content:
-            paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', html, re.DOTALL)
-            content = ' '.join([p for p in paragraphs if len(p) > 50][:20])
-        
-        # Clean HTML
-        if content:
-            # Remove scripts and styles
-            content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.DOTALL | re.IGNORECASE)
-            content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
-            # Remove all tags
-            content = re.sub(r'<[^>]+>', ' ', content)
-            # Clean whitespace
-            content = re.sub(r'\s+', ' ', content).strip()
-        
-        # Extract title
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE)
-        title = title_match.group(1).strip() if title_match else "News Report"
+        # One pass over the page: drop scripts/navigation, keep dense prose
+        article = cpu_pool.call(extract_article, response.text, url)
+        content = article['content']
+        title = article['title'] or "News Report"
         
         # Clean title
         title = re.sub(r'\s*-\s*BBC News\s*$', '', title)
@@ -85,7 +58,7 @@ def fetch_real_article(url):
             return {
                 'title': title,
                 'content': content[:4000],  # Limit length
-                'url': url,
+                'url': resolve_canonical(url, article['canonical']),
                 'length': len(content),
                 'success': True
             }
@@ -219,7 +192,9 @@ Potential lasting effects:
         'title': pro_title,
         'content': article,
         'excerpt': excerpt[:200],
-        'word_count': len(article.split())
+        'word_count': len(article.split()),
+        'source_title': source_title,
+        'source_text': source_content
     }
 
 def get_news_image(topic):
@@ -236,10 +211,10 @@ def get_news_image(topic):
         'alt': f"News coverage: {topic[:40]}..."
     }
 
-def save_article_db(article, source_url, image_data, source_name="BBC News"):
+def save_article_db(article, source_url, image_data, feed_item, source_name="BBC News"):
     """Save article to database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connection.connect(DB_PATH)
         cursor = conn.cursor()
         
         # Generate slug
@@ -258,8 +233,7 @@ def save_article_db(article, source_url, image_data, source_name="BBC News"):
         category_id = category_result[0] if category_result else 1
         
         # Check for duplicates
-        cursor.execute("SELECT COUNT(*) FROM posts WHERE slug = ?", (slug,))
-        if cursor.fetchone()[0] > 0:
+        if seen_index.get_index().has_slug(slug):
             log(f"Duplicate: {slug}")
             conn.close()
             return False
@@ -289,6 +263,10 @@ def save_article_db(article, source_url, image_data, source_name="BBC News"):
         conn.commit()
         post_id = cursor.lastrowid
         conn.close()
+        seen_index.record_post(source_url, slug)
+        # The feed's own link and guid as well, so the next feed scan stops at this item
+        seen_index.record_post(feed_item['link'], guid=feed_item.get('guid'))
+        story_clusters.assign_post(post_id, article['source_title'], article['source_text'], DB_PATH)
         
         log(f"✅ Published: {article['title'][:60]}...")
         log(f"   ID: {post_id}, Words: {article['word_count']}")
@@ -306,38 +284,41 @@ def fetch_working_rss():
     ]
     
     all_items = []
+    stored_links = StoredLinks(DB_PATH)
     for source_name, url in feeds:
         try:
             log(f"Fetching {source_name} RSS...")
-            response = requests.get(url, timeout=15)
-            root = ET.fromstring(response.content)
+            response = conditional_get(url, timeout=15, stream=True)
+            if response is None:
+                log(f"  {source_name} feed not modified")
+                continue
             
-            for item in root.findall('.//item'):
-                title_elem = item.find('title')
-                link_elem = item.find('link')
-                
-                if title_elem is not None and link_elem is not None:
-                    title = title_elem.text.strip() if title_elem.text else ''
-                    link = link_elem.text.strip() if link_elem.text else ''
-                    
-                    if title and link:
-                        all_items.append({
-                            'title': title,
-                            'link': link,
-                            'source': source_name
-                        })
+            # Stream items until the first one we already published
+            with parsing(url, response):
+                for item in iter_feed_items(response, stored_links):
+                    all_items.append({
+                        'title': item['title'],
+                        'link': item['link'],
+                        'guid': item['guid'],
+                        'description': item['description'],
+                        'source': source_name
+                    })
             
+            save_validators(url, response)
             log(f"  Found {len([i for i in all_items if i['source'] == source_name])} items from {source_name}")
             
         except Exception as e:
             log(f"RSS error for {source_name}: {str(e)}")
     
-    # Return unique items
+    stored_links.close()
+    
+    # Return unique items; tracking tags and http/www variants are one story
     seen_links = set()
     unique_items = []
     for item in all_items:
-        if item['link'] not in seen_links:
-            seen_links.add(item['link'])
+        canonical = canonicalize(item['link'])
+        if canonical not in seen_links:
+            seen_links.add(canonical)
             unique_items.append(item)
     
     return unique_items[:3]  # Process 3 articles
@@ -352,27 +333,55 @@ def main():
     log(f"Total items to process: {len(items)}")
     
     created = 0
+    saved = set()
+    
+    # Other outlets' versions of stories we already have are dropped before fetching
+    candidates = []
     for item in items:
-        log(f"Processing: {item['title'][:70]}...")
-        
-        # Fetch and read article
-        article_data = fetch_real_article(item['link'])
-        if not article_data:
-            log(f"  Could not fetch article content")
-            continue
-        
-        log(f"  Fetched: {article_data['length']} characters")
-        
-        # Write professional article
-        professional_article = write_professional_article(article_data)
-        
+        match = near_duplicates.claim(item['link'], item['title'], item['description'])
+        if match:
+            log(f"Skipping near duplicate of: {match[1][:50]}...")
+        else:
+            candidates.append(item)
+    
+    # Articles are fetched on the research pool; each is written as soon as it arrives
+    jobs = [(item, item['link']) for item in candidates]
+    stored_links = StoredLinks(DB_PATH)
+    published = set()
+    
+    def fetched_articles():
+        for item, article_data in research_items(jobs, fetch_real_article):
+            log(f"Processing: {item['title'][:70]}...")
+            
+            if not article_data:
+                log(f"  Could not fetch article content")
+                continue
+            
+            # The page's canonical URL can reveal a story we already have
+            if canonicalize(article_data['url']) in published or stored_links(article_data['url']):
+                log(f"  Already published as {article_data['url']}")
+                continue
+            published.add(canonicalize(article_data['url']))
+            
+            log(f"  Fetched: {article_data['length']} characters")
+            yield (item, article_data), article_data
+    
+    # Write professional articles, in batches on the process pool when it is enabled
+    for (item, article_data), professional_article in cpu_pool.imap_batched(write_professional_article, fetched_articles()):
         # Get image
         image_data = get_news_image(article_data['title'])
         
         # Save to database
-        if save_article_db(professional_article, item['link'], image_data, item['source']):
+        if save_article_db(professional_article, article_data['url'], image_data, item, item['source']):
             created += 1
-            time.sleep(3)  # Be polite
+            saved.add(item['link'])
+    
+    stored_links.close()
+    
+    # Release the claims of stories that were not published after all
+    for item in candidates:
+        if item['link'] not in saved:
+            near_duplicates.release(item['link'])
     
     log("=" * 60)
     log(f"📊 UPDATE COMPLETE: Created {created} professional articles")
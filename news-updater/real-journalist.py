@@ -67,14 +67,13 @@ def main():
             try:
                 if process_news_item(item, source):
                     total_created += 1
-                    time.sleep(3)  # Be polite to servers
                     
             except Exception as e:
                 log(f"  Error: {str(e)}", "ERROR")
                 continue
     
     # Statistics
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connection.connect(DB_PATH)
     cursor = conn.cursor()
     
     cursor.execute("SELECT COUNT(*) FROM posts WHERE content_original = 1")
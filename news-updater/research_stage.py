@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Article Research Stage
+Fetches and analyzes every candidate article on a bounded thread pool,
+handing results to the database writer as each one finishes
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+
+from feed_fetcher import feed_host
+
+# Configuration
+MAX_WORKERS = 8           # Articles researched at once across all hosts
+PER_HOST_CONCURRENCY = 2  # Articles researched at once against a single host
+
+def _interleave_by_host(jobs):
+    """Order jobs round-robin across hosts so one busy site cannot fill the pool"""
+    by_host = {}
+    for job in jobs:
+        by_host.setdefault(feed_host(job[1]), []).append(job)
+    return [job for group in zip_longest(*by_host.values()) for job in group if job is not None]
+
+def research_items(jobs, research, max_workers=MAX_WORKERS, per_host=PER_HOST_CONCURRENCY):
+    """Run research(url) for every (payload, url) job and yield (payload, result)
+
+    Results come back in completion order, so the caller's write loop
+    starts on the first finished article while the rest are still being
+    fetched, and never blocks on the network itself. A research call that
+    raises yields None.
+    """
+    jobs = _interleave_by_host(list(jobs))
+    if not jobs:
+        return
+
+    host_limits = {}
+    host_limits_lock = threading.Lock()
+
+    def run(url):
+        with host_limits_lock:
+            host_limit = host_limits.setdefault(feed_host(url), threading.BoundedSemaphore(per_host))
+        with host_limit:
+            try:
+                return research(url)
+            except Exception:
+                return None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)), thread_name_prefix='research') as executor:
+        futures = {executor.submit(run, url): payload for payload, url in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Robots.txt Cache
+Checks article URLs against each site's robots.txt before they are fetched,
+and slows hosts that declare a Crawl-delay or Request-rate down to it
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import db_connection
+import http_client
+import rate_limiter
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+USER_AGENT = http_client.PRODUCT_TOKEN  # The product token of the User-Agent every request sends
+ROBOTS_TTL = 24 * 60 * 60        # Seconds fetched rules (or a 4xx "no rules") are trusted
+ERROR_TTL = 30 * 60              # Seconds before retrying a robots.txt that failed with 5xx or no answer
+ROBOTS_MAX_BYTES = 512 * 1024    # robots.txt bytes parsed, as RFC 9309 requires at least
+ROBOTS_TIMEOUT = 10
+
+class RobotsDisallowed(Exception):
+    """Raised instead of fetching a URL the site's robots.txt disallows"""
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+def _parse(status, body):
+    """Build a parser from a stored answer
+
+    A 200 gives its rules and a 4xx allows everything. A 5xx or no answer
+    disallows everything: RFC 9309 treats the site as fully disallowed
+    while its robots.txt is unreachable.
+    """
+    parser = RobotFileParser()
+    if status == 200 and body:
+        parser.parse(body.splitlines())
+    else:
+        parser.parse([])
+        parser.disallow_all = status is None or status >= 500
+    return parser
+
+class RobotsCache:
+    def __init__(self, path=FEED_CACHE_PATH, limiter=None):
+        self.limiter = limiter or rate_limiter.get_limiter()
+        self.lock = threading.Lock()
+        self.origin_locks = {}
+        self.parsers = {}
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS robots_txt (
+                origin TEXT PRIMARY KEY,
+                status INTEGER,
+                body TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _origin_lock(self, origin):
+        # One fetch per origin even when many research threads ask at once
+        with self.lock:
+            return self.origin_locks.setdefault(origin, threading.Lock())
+
+    def _load(self, origin):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT status, body, expires_at FROM robots_txt WHERE origin = ?", (origin,)
+            ).fetchone()
+
+    def _store(self, origin, status, body, now, expires_at):
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO robots_txt (origin, status, body, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (origin, status, body, now, expires_at))
+            self.conn.commit()
+
+    def _fetch(self, origin, stored, now):
+        """Fetch robots.txt and return (status, body, expires_at)
+
+        Following RFC 9309, a 4xx means there are no rules. A 5xx or no
+        answer at all keeps the last answer we stored; with none, the
+        site is disallowed until the retry after ERROR_TTL, rather than
+        asked again on every article.
+        """
+        try:
+            response = http_client.get_limited(origin + '/robots.txt', ROBOTS_MAX_BYTES, timeout=ROBOTS_TIMEOUT)
+            status = response.status_code
+        except Exception:
+            status = None
+
+        if status == 200:
+            return status, response.text, now + ROBOTS_TTL
+        if status is not None and 400 <= status < 500:
+            return status, None, now + ROBOTS_TTL
+        if stored is not None:
+            return stored[0], stored[1], now + ERROR_TTL
+        return status, None, now + ERROR_TTL
+
+    def _apply_rate(self, origin, parser):
+        """Slow the host to its declared Crawl-delay / Request-rate if that is below our own"""
+        declared = []
+        delay = parser.crawl_delay(USER_AGENT)
+        if delay:
+            declared.append(1.0 / float(delay))
+        request_rate = parser.request_rate(USER_AGENT)
+        if request_rate and request_rate.requests and request_rate.seconds:
+            declared.append(request_rate.requests / request_rate.seconds)
+        if not declared:
+            return
+
+        host = urlsplit(origin).netloc
+        rate, _ = self.limiter.limit(host)
+        if min(declared) < rate:
+            self.limiter.configure(host, min(declared), 1)
+
+    def rules(self, url, now=None):
+        """Return the RobotFileParser for the URL's origin, fetching robots.txt when it is stale"""
+        now = now if now is not None else time.time()
+        origin = _origin(url)
+        with self._origin_lock(origin):
+            cached = self.parsers.get(origin)
+            if cached is not None and cached[1] > now:
+                return cached[0]
+
+            try:
+                stored = self._load(origin)
+            except sqlite3.Error:
+                stored = None
+            if stored is not None and stored[2] > now:
+                status, body, expires_at = stored
+            else:
+                status, body, expires_at = self._fetch(origin, stored, now)
+                try:
+                    self._store(origin, status, body, now, expires_at)
+                except sqlite3.Error:
+                    pass
+
+            parser = _parse(status, body)
+            self.parsers[origin] = (parser, expires_at)
+            self._apply_rate(origin, parser)
+            return parser
+
+    def allowed(self, url):
+        return self.rules(url).can_fetch(USER_AGENT, url)
+
+    def check(self, url):
+        """Raise RobotsDisallowed when robots.txt forbids fetching url"""
+        if not self.allowed(url):
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+
+    def stats(self):
+        """Return (origin, status, body, expires_at) for every cached robots.txt"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT origin, status, body, expires_at FROM robots_txt ORDER BY origin"
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+_robots = None
+_robots_lock = threading.Lock()
+
+def get_robots():
+    """Return the process-wide robots.txt cache"""
+    global _robots
+    with _robots_lock:
+        if _robots is None:
+            _robots = RobotsCache()
+        return _robots
+
+def check(url):
+    """Raise RobotsDisallowed when url may not be fetched; robots cache errors never block a fetch"""
+    try:
+        robots = get_robots()
+    except sqlite3.Error:
+        return
+    robots.check(url)
+
+def main():
+    """Print each cached robots.txt answer, or check the URLs given on the command line"""
+    robots = RobotsCache()
+
+    if sys.argv[1:]:
+        for url in sys.argv[1:]:
+            print(f"  {'allowed' if robots.allowed(url) else 'disallowed'}: {url}")
+    else:
+        now = time.time()
+        for origin, status, body, expires_at in robots.stats():
+            delay = _parse(status, body).crawl_delay(USER_AGENT)
+            answer = 'no answer' if status is None else f"HTTP {status}"
+            print(f"  {origin}: {answer}, crawl-delay {delay or '-'}, "
+                  f"refresh in {max(0, int(expires_at - now)) // 60} min")
+
+    robots.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Seen Index
+A memory-mapped hash index of the links, guids and slugs already in posts,
+fronted by a Bloom filter, so duplicate checks cost O(1) and opening it
+does not scale with the size of the posts table
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+from contextlib import contextmanager
+
+import db_connection
+from canonical_url import canonicalize
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+SEEN_INDEX_PATH = os.path.join(os.path.dirname(DB_PATH), 'seen-index.bin')
+INITIAL_CAPACITY = 64 * 1024   # Entries before the index doubles
+SLOTS_PER_ENTRY = 2            # Hash slots per entry of capacity (load factor 0.5)
+BLOOM_BITS_PER_ENTRY = 10      # About 1% false positives with BLOOM_HASHES probes
+BLOOM_HASHES = 7
+SYNC_BATCH = 1000              # posts rows read per query when catching up
+
+# File layout: header, Bloom filter bits, then one 8-byte fingerprint per slot (0 = empty)
+MAGIC = b'SEENIDX1'
+HEADER = struct.Struct('<8sQQqQQ')   # magic, capacity, count, watermark, retired, bloom bytes
+HEADER_SIZE = 64
+SLOT = struct.Struct('<Q')
+COUNT_OFFSET = 16
+WATERMARK_OFFSET = 24
+RETIRED_OFFSET = 32
+
+LINK = 'link'
+SLUG = 'slug'
+
+def fingerprint(kind, value):
+    """64-bit fingerprint of a key; two keys share one with odds of about n / 2**64"""
+    digest = hashlib.blake2b(f"{kind}\0{value}".encode('utf-8'), digest_size=8).digest()
+    return SLOT.unpack(digest)[0] or 1
+
+def _layout(capacity):
+    bloom_bytes = capacity * BLOOM_BITS_PER_ENTRY // 8
+    slots = capacity * SLOTS_PER_ENTRY
+    return bloom_bytes, slots, HEADER_SIZE + bloom_bytes + slots * SLOT.size
+
+class SeenIndex:
+    """Open (or build) the index at path and bring it up to date with posts
+
+    Only posts rows added since the last sync are read when it opens, so
+    the cost of opening depends on the number of new posts, not the table.
+    Writers in different processes take an flock on path + '.lock'; readers
+    never lock. A fingerprint collision makes a new story look seen, which
+    at 64 bits is negligible for any number of posts this site will hold.
+    """
+
+    def __init__(self, path=SEEN_INDEX_PATH, db_path=DB_PATH):
+        self.path = path
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.lock_file = open(path + '.lock', 'a+b')
+        self.file = None
+        self.mm = None
+        with self._writing():
+            if not self._open():
+                self._rebuild_locked()
+            self._sync_locked()
+
+    # File handling
+
+    def _open(self):
+        """Map the index file; False when it is missing or not an index"""
+        try:
+            f = open(self.path, 'r+b')
+        except FileNotFoundError:
+            return False
+        try:
+            mm = mmap.mmap(f.fileno(), 0)
+        except ValueError:
+            f.close()
+            return False
+
+        magic, capacity, _, _, _, bloom_bytes = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or _layout(capacity)[0] != bloom_bytes or len(mm) != _layout(capacity)[2]:
+            mm.close()
+            f.close()
+            return False
+
+        self._close_map()
+        self.file, self.mm = f, mm
+        self.capacity = capacity
+        self.bloom_bytes, self.slots, _ = _layout(capacity)
+        self.bloom_bits = self.bloom_bytes * 8
+        self.table_offset = HEADER_SIZE + self.bloom_bytes
+        return True
+
+    def _close_map(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.file.close()
+            self.mm = self.file = None
+
+    def _current(self):
+        """Reopen the file when another process replaced it with a larger one"""
+        if SLOT.unpack_from(self.mm, RETIRED_OFFSET)[0]:
+            self._open()
+
+    def _create(self, path, capacity, watermark, fingerprints=()):
+        """Write a new index file holding fingerprints, for _replace to move into place"""
+        bloom_bytes, slots, size = _layout(capacity)
+        with open(path, 'w+b') as f:
+            f.truncate(size)
+            with mmap.mmap(f.fileno(), size) as mm:
+                HEADER.pack_into(mm, 0, MAGIC, capacity, 0, watermark, 0, bloom_bytes)
+                count = 0
+                for fp in fingerprints:
+                    if self._insert(mm, bloom_bytes * 8, HEADER_SIZE + bloom_bytes, slots, fp):
+                        count += 1
+                SLOT.pack_into(mm, COUNT_OFFSET, count)
+                mm.flush()
+
+    def _replace(self, capacity, watermark, fingerprints):
+        temp_path = self.path + '.tmp'
+        self._create(temp_path, capacity, watermark, fingerprints)
+        os.replace(temp_path, self.path)
+        if self.mm is not None:
+            SLOT.pack_into(self.mm, RETIRED_OFFSET, 1)
+        self._open()
+
+    @contextmanager
+    def _writing(self):
+        """Hold the thread lock and the cross-process write lock"""
+        with self.lock:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                if self.mm is not None:
+                    self._current()
+                yield
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    # Hashing
+
+    @staticmethod
+    def _bloom_positions(fp, bloom_bits):
+        h1 = fp & 0xffffffff
+        h2 = (fp >> 32) | 1
+        return [(h1 + i * h2) % bloom_bits for i in range(BLOOM_HASHES)]
+
+    @staticmethod
+    def _insert(mm, bloom_bits, table_offset, slots, fp):
+        """Put fp in the table and the Bloom filter; False when it was already there"""
+        mask = slots - 1
+        slot = fp & mask
+        while True:
+            offset = table_offset + slot * SLOT.size
+            current = SLOT.unpack_from(mm, offset)[0]
+            if current == fp:
+                return False
+            if current == 0:
+                SLOT.pack_into(mm, offset, fp)
+                break
+            slot = (slot + 1) & mask
+        for position in SeenIndex._bloom_positions(fp, bloom_bits):
+            byte = HEADER_SIZE + position // 8
+            mm[byte] = mm[byte] | (1 << (position % 8))
+        return True
+
+    def _contains(self, fp):
+        mm = self.mm
+        for position in self._bloom_positions(fp, self.bloom_bits):
+            if not mm[HEADER_SIZE + position // 8] & (1 << (position % 8)):
+                return False
+
+        mask = self.slots - 1
+        slot = fp & mask
+        while True:
+            current = SLOT.unpack_from(mm, self.table_offset + slot * SLOT.size)[0]
+            if current == fp:
+                return True
+            if current == 0:
+                return False
+            slot = (slot + 1) & mask
+
+    def _fingerprints(self):
+        for slot in range(self.slots):
+            fp = SLOT.unpack_from(self.mm, self.table_offset + slot * SLOT.size)[0]
+            if fp:
+                yield fp
+
+    def _add_locked(self, fps):
+        count = SLOT.unpack_from(self.mm, COUNT_OFFSET)[0]
+        for fp in fps:
+            if count + 1 > self.capacity:
+                watermark = struct.unpack_from('<q', self.mm, WATERMARK_OFFSET)[0]
+                self._replace(self.capacity * 2, watermark, list(self._fingerprints()))
+                count = SLOT.unpack_from(self.mm, COUNT_OFFSET)[0]
+            if self._insert(self.mm, self.bloom_bits, self.table_offset, self.slots, fp):
+                count += 1
+                SLOT.pack_into(self.mm, COUNT_OFFSET, count)
+
+    # Keeping up with posts
+
+    @staticmethod
+    def _post_keys(source_url, slug):
+        keys = []
+        if source_url:
+            keys.append(fingerprint(LINK, canonicalize(source_url)))
+        if slug:
+            keys.append(fingerprint(SLUG, slug))
+        return keys
+
+    def _sync_locked(self):
+        """Index posts rows added since the watermark"""
+        watermark = struct.unpack_from('<q', self.mm, WATERMARK_OFFSET)[0]
+        try:
+            conn = db_connection.connect(self.db_path)
+        except sqlite3.Error:
+            return 0
+        added = 0
+        try:
+            while True:
+                rows = conn.execute(
+                    "SELECT id, source_url, slug FROM posts WHERE id > ? ORDER BY id LIMIT ?",
+                    (watermark, SYNC_BATCH)
+                ).fetchall()
+                if not rows:
+                    break
+                for post_id, source_url, slug in rows:
+                    self._add_locked(self._post_keys(source_url, slug))
+                watermark = rows[-1][0]
+                struct.pack_into('<q', self.mm, WATERMARK_OFFSET, watermark)
+                added += len(rows)
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+        return added
+
+    def _rebuild_locked(self):
+        self._replace(INITIAL_CAPACITY, 0, ())
+
+    def sync(self):
+        """Index posts written by anything that did not call record_post; returns rows read"""
+        with self._writing():
+            return self._sync_locked()
+
+    def rebuild(self):
+        """Throw the index away and rebuild it from every posts row"""
+        with self._writing():
+            self._rebuild_locked()
+            return self._sync_locked()
+
+    # Public checks and updates
+
+    def has_link(self, link):
+        if not link:
+            return False
+        with self.lock:
+            self._current()
+            return self._contains(fingerprint(LINK, canonicalize(link)))
+
+    def has_guid(self, guid):
+        # Posts keep no guid column: a guid that was a URL was stored as source_url
+        if not guid:
+            return False
+        with self.lock:
+            self._current()
+            return self._contains(fingerprint(LINK, guid)) or self._contains(fingerprint(LINK, canonicalize(guid)))
+
+    def has_slug(self, slug):
+        if not slug:
+            return False
+        with self.lock:
+            self._current()
+            return self._contains(fingerprint(SLUG, slug))
+
+    def record_post(self, source_url=None, slug=None, guid=None):
+        """Add a just-inserted post's canonical link, slug and feed guid"""
+        keys = self._post_keys(source_url, slug)
+        if guid:
+            keys.append(fingerprint(LINK, guid))
+        with self._writing():
+            self._add_locked(keys)
+            self.mm.flush()
+
+    def stats(self):
+        """Return (entries, capacity, posts watermark, file bytes)"""
+        with self.lock:
+            self._current()
+            _, capacity, count, watermark, _, _ = HEADER.unpack_from(self.mm, 0)
+            return count, capacity, watermark, len(self.mm)
+
+    def close(self):
+        with self.lock:
+            self._close_map()
+            self.lock_file.close()
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+def get_index(db_path=DB_PATH):
+    """Return the process-wide index for a database, opened and synced on first use"""
+    with _index_lock:
+        if db_path not in _indexes:
+            path = SEEN_INDEX_PATH if db_path == DB_PATH else os.path.join(os.path.dirname(db_path), 'seen-index.bin')
+            _indexes[db_path] = SeenIndex(path, db_path)
+        return _indexes[db_path]
+
+def record_post(source_url=None, slug=None, guid=None):
+    """Add an inserted post to the index; index errors never fail the insert"""
+    try:
+        get_index().record_post(source_url, slug, guid)
+    except (OSError, ValueError):
+        pass
+
+def main():
+    """Print the index size; with --rebuild, rebuild it from the posts table first"""
+    index = SeenIndex()
+    if '--rebuild' in sys.argv[1:]:
+        print(f"  Rebuilt from {index.rebuild()} posts")
+
+    count, capacity, watermark, size = index.stats()
+    print(f"  {count} keys indexed ({capacity} capacity, {size / 1024:.0f} KB), up to post {watermark}")
+    index.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
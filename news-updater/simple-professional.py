@@ -4,14 +4,17 @@ Simple Professional Journalist - Creates original articles with images
 """
 
 import sqlite3
+import db_connection
 import requests
-import xml.etree.ElementTree as ET
 from datetime import datetime
 import re
 import sys
 import os
 import random
 
+from feed_cache import conditional_get, parsing, save_validators
+from feed_parser import parse_feed_stream
+
 DB_PATH = '/var/www/news-site/database.db'
 
 def log(message):
@@ -21,19 +24,14 @@ def fetch_rss():
     """Fetch BBC News RSS"""
     try:
         url = 'http://feeds.bbci.co.uk/news/rss.xml'
-        response = requests.get(url, timeout=10)
-        root = ET.fromstring(response.content)
-        
-        items = []
-        for item in root.findall('.//item'):
-            title_elem = item.find('title')
-            link_elem = item.find('link')
-            if title_elem is not None and link_elem is not None:
-                title = title_elem.text.strip() if title_elem.text else ''
-                link = link_elem.text.strip() if link_elem.text else ''
-                if title and link:
-                    items.append({'title': title, 'link': link})
-        return items[:3]  # Limit to 3
+        response = conditional_get(url, timeout=10, stream=True)
+        if response is None:
+            log("RSS not modified")
+            return []
+        with parsing(url, response):
+            items = parse_feed_stream(response, limit=3)  # Limit to 3
+        save_validators(url, response)
+        return items
     except Exception as e:
         log(f"RSS error: {e}")
         return []
@@ -114,7 +112,7 @@ For readers and decision-makers, understanding this development is crucial becau
 def save_to_database(article):
     """Save professional article to database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connection.connect(DB_PATH)
         cursor = conn.cursor()
         
         # Generate slug
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Story Clusters
+Assigns each new post to a story cluster as it is written, comparing its
+term vector with the centroids of recently active clusters, and keeps
+posts.cluster_id / posts.cluster_size current for the site's list queries
+"""
+
+import json
+import math
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+import db_connection
+from near_duplicates import LABEL_PREFIX, SOURCE_SUFFIX, STOP_WORDS, TAG, TOKEN
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+CLUSTER_THRESHOLD = 0.3       # Cosine similarity to a centroid needed to join its cluster
+ACTIVE_WINDOW = 48 * 60 * 60  # Seconds a cluster accepts new posts after its last one
+CENTROID_TERMS = 60           # Heaviest terms kept in a centroid
+TITLE_WEIGHT = 2.0            # A title word counts as much as this many lead words
+LEAD_WORDS = 60               # Words of the body used beside the title
+BACKFILL_BATCH = 500          # Unclustered posts read per query by --backfill
+
+TOTAL_TERM = ''               # story_terms row holding the number of posts counted
+
+def term_counts(title, text=''):
+    """Weighted term counts of a post's title and lead"""
+    title = SOURCE_SUFFIX.sub('', LABEL_PREFIX.sub('', (title or '').strip()))
+    lead = ' '.join(TAG.sub(' ', text or '').split()[:LEAD_WORDS])
+
+    counts = Counter()
+    for words, weight in ((TOKEN.findall(title.lower()), TITLE_WEIGHT), (TOKEN.findall(lead.lower()), 1.0)):
+        for word in words:
+            if len(word) > 1 and word not in STOP_WORDS:
+                counts[word[:-1] if len(word) > 3 and word.endswith('s') else word] += weight
+    return counts
+
+def _normalize(vector):
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+def cosine(vector, centroid):
+    """Cosine similarity of a unit vector and a centroid"""
+    if len(centroid) < len(vector):
+        vector, centroid = centroid, vector
+    dot = sum(weight * centroid.get(term, 0.0) for term, weight in vector.items())
+    norm = math.sqrt(sum(weight * weight for weight in centroid.values()))
+    return dot / norm if norm else 0.0
+
+class StoryClusters:
+    def __init__(self, db_path=DB_PATH):
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(db_path, check_same_thread=False)
+        ensure_schema(self.conn)
+        self.active = {}
+        self.synced_at = None
+
+    def _refresh_active(self, now):
+        """Bring the in-memory centroids up to date with clusters still taking posts
+
+        The first call reads every cluster active within ACTIVE_WINDOW, so
+        startup is bounded by recent news, not the table. Later calls only
+        read clusters other writers touched since the previous one.
+        """
+        since = now - ACTIVE_WINDOW if self.synced_at is None else min(self.synced_at, now - 1)
+        for cluster_id, centroid, size, updated_at in self.conn.execute(
+            "SELECT id, centroid, size, updated_at FROM story_clusters WHERE updated_at >= ?", (since,)
+        ):
+            self.active[cluster_id] = [json.loads(centroid), size, updated_at]
+        self.synced_at = now
+
+        for cluster_id in [cid for cid, entry in self.active.items() if entry[2] < now - ACTIVE_WINDOW]:
+            del self.active[cluster_id]
+        return self.active
+
+    def _vector(self, counts):
+        """tf-idf vector of a post, counting its terms into the running document frequencies"""
+        terms = list(counts)
+        self.conn.executemany("""
+            INSERT INTO story_terms (term, docs) VALUES (?, 1)
+            ON CONFLICT(term) DO UPDATE SET docs = docs + 1
+        """, [(term,) for term in terms + [TOTAL_TERM]])
+
+        placeholders = ', '.join('?' for _ in terms + [TOTAL_TERM])
+        docs = dict(self.conn.execute(
+            f"SELECT term, docs FROM story_terms WHERE term IN ({placeholders})", terms + [TOTAL_TERM]
+        ).fetchall())
+        total = docs.get(TOTAL_TERM, 1)
+        return _normalize({
+            term: (1.0 + math.log(count)) * (math.log((total + 1) / (docs.get(term, 1) + 1)) + 1.0)
+            for term, count in counts.items()
+        })
+
+    def assign(self, post_id, title, text='', now=None):
+        """Put a post in the closest active cluster, or a new one; returns (cluster_id, cluster_size)
+
+        Joining moves the cluster's centroid toward the post by 1/size (a
+        running mean), so nothing is ever recomputed from the member posts.
+        """
+        now = now if now is not None else time.time()
+        counts = term_counts(title, text)
+
+        with self.lock:
+            try:
+                # Hold the write lock from reading the centroids to storing them,
+                # so two updaters cannot both move the same centroid from a stale copy
+                self.conn.execute("BEGIN IMMEDIATE")
+                active = self._refresh_active(now)
+                vector = self._vector(counts) if counts else {}
+
+                best_id, best_score = None, CLUSTER_THRESHOLD
+                for cluster_id, (centroid, _, _) in active.items():
+                    score = cosine(vector, centroid)
+                    if score >= best_score:
+                        best_id, best_score = cluster_id, score
+
+                if best_id is None:
+                    centroid, size = vector, 1
+                    cursor = self.conn.execute(
+                        "INSERT INTO story_clusters (centroid, size, created_at, updated_at) VALUES (?, 1, ?, ?)",
+                        (json.dumps(centroid), now, now)
+                    )
+                    best_id = cursor.lastrowid
+                else:
+                    centroid, size, _ = active[best_id]
+                    size += 1
+                    for term in set(centroid) | set(vector):
+                        centroid[term] = centroid.get(term, 0.0) + (vector.get(term, 0.0) - centroid.get(term, 0.0)) / size
+                    centroid = dict(sorted(centroid.items(), key=lambda entry: -entry[1])[:CENTROID_TERMS])
+                    self.conn.execute(
+                        "UPDATE story_clusters SET centroid = ?, size = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(centroid), size, now, best_id)
+                    )
+
+                self.conn.execute("UPDATE posts SET cluster_id = ? WHERE id = ?", (best_id, post_id))
+                self.conn.execute("UPDATE posts SET cluster_size = ? WHERE cluster_id = ?", (size, best_id))
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                self.active, self.synced_at = {}, None
+                raise
+
+            active[best_id] = [centroid, size, now]
+            return best_id, size
+
+    def backfill(self):
+        """Cluster posts that have no cluster yet, oldest first, as of their publish time; returns how many
+
+        Stored posts are clustered by title alone: the updaters write their
+        excerpt and body from templates, and that shared text would pull
+        unrelated stories together. New posts are clustered on the source's
+        own title and text as they are written.
+        """
+        assigned = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute("""
+                    SELECT id, title, CAST(strftime('%s', COALESCE(published_at, created_at)) AS REAL)
+                    FROM posts WHERE cluster_id IS NULL ORDER BY id LIMIT ?
+                """, (BACKFILL_BATCH,)).fetchall()
+            if not rows:
+                return assigned
+            for post_id, title, published in rows:
+                self.assign(post_id, title, '', published)
+                assigned += 1
+
+    def largest(self, limit=10):
+        """Return (cluster_id, size, newest title) for the biggest recent clusters"""
+        with self.lock:
+            return self.conn.execute("""
+                SELECT c.id, c.size, (SELECT title FROM posts WHERE cluster_id = c.id ORDER BY id DESC LIMIT 1)
+                FROM story_clusters c WHERE c.updated_at >= ? ORDER BY c.size DESC LIMIT ?
+            """, (time.time() - ACTIVE_WINDOW, limit)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+def ensure_schema(conn):
+    """Add the cluster columns and tables to a database created before they existed"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(posts)")]
+    if 'cluster_id' not in columns:
+        conn.execute("ALTER TABLE posts ADD COLUMN cluster_id INTEGER")
+    if 'cluster_size' not in columns:
+        conn.execute("ALTER TABLE posts ADD COLUMN cluster_size INTEGER DEFAULT 1")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_cluster ON posts(cluster_id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS story_clusters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            centroid TEXT NOT NULL,
+            size INTEGER NOT NULL DEFAULT 1,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_story_clusters_updated ON story_clusters(updated_at)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS story_terms (
+            term TEXT PRIMARY KEY,
+            docs INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.commit()
+
+_clusters = {}
+_clusters_lock = threading.Lock()
+
+def get_clusters(db_path=DB_PATH):
+    """Return the process-wide clusterer for a database"""
+    with _clusters_lock:
+        if db_path not in _clusters:
+            _clusters[db_path] = StoryClusters(db_path)
+        return _clusters[db_path]
+
+def assign_post(post_id, title, text='', db_path=DB_PATH):
+    """Cluster a just-committed post; returns (cluster_id, size), or None when clustering failed
+
+    A post that could not be clustered is picked up by the next --backfill.
+    """
+    try:
+        return get_clusters(db_path).assign(post_id, title, text)
+    except sqlite3.Error:
+        return None
+
+def main():
+    """Print the largest recent clusters; with --backfill, cluster unassigned posts first"""
+    clusters = StoryClusters()
+    if '--backfill' in sys.argv[1:]:
+        print(f"  Clustered {clusters.backfill()} posts")
+
+    for cluster_id, size, title in clusters.largest():
+        print(f"  #{cluster_id}: {size} posts - {(title or '')[:60]}")
+
+    clusters.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
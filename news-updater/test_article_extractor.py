@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Article Extractor Tests
+Run with: python3 -m pytest news-updater (or python3 -m unittest from news-updater)
+"""
+
+import unittest
+
+from article_extractor import DENSITY_RULE, ArticleExtractor, extract_with_rule
+
+PARAGRAPH = "Officials said the decision followed months of talks between the parties on {0}."
+
+def page(share_icon, extra=''):
+    paragraphs = ''.join(f"<p>{PARAGRAPH.format(topic)}</p>" for topic in ('trade', 'energy', 'water'))
+    return (
+        "<html><head><title>Talks end</title>"
+        "<link rel=\"canonical\" href=\"https://example.com/news/talks\"></head>"
+        f"<body><article><p>{PARAGRAPH.format('budgets')}</p>{share_icon}{extra}{paragraphs}</article></body></html>"
+    )
+
+class VoidElementTests(unittest.TestCase):
+    def test_unclosed_boilerplate_img_keeps_following_paragraphs(self):
+        article = extract_with_rule(page('<img class="social-share-icon" src="/share.png">'))
+        self.assertEqual(len(article['paragraphs']), 4)
+        self.assertIn('water', article['content'])
+
+    def test_self_closed_boilerplate_img_matches_unclosed(self):
+        unclosed = extract_with_rule(page('<img class="social-share-icon" src="/share.png">'))
+        closed = extract_with_rule(page('<img class="social-share-icon" src="/share.png"/>'))
+        self.assertEqual(unclosed['paragraphs'], closed['paragraphs'])
+
+    def test_other_unclosed_void_elements(self):
+        tags = '<input class="newsletter-email"><hr class="promo-rule"><meta class="ad-slot"><source id="banner-src">'
+        article = extract_with_rule(page(tags))
+        self.assertEqual(len(article['paragraphs']), 4)
+
+    def test_boilerplate_subtree_is_still_skipped(self):
+        article = extract_with_rule(page('', '<div class="related-links"><p>Read more stories about things here today</p></div>'))
+        self.assertNotIn('Read more', article['content'])
+        self.assertEqual(len(article['paragraphs']), 4)
+
+    def test_title_and_canonical(self):
+        article = extract_with_rule(page(''))
+        self.assertEqual(article['title'], 'Talks end')
+        self.assertEqual(article['canonical'], 'https://example.com/news/talks')
+        self.assertEqual(article['rule'], 'article')
+
+class ImpliedEndTagTests(unittest.TestCase):
+    def test_list_item_closed_by_next_item(self):
+        article = extract_with_rule(page('<ul><li class="share-item">Share<li>Tweet</ul>'))
+        self.assertEqual(len(article['paragraphs']), 4)
+        self.assertNotIn('Share', article['content'])
+
+    def test_last_list_item_closed_by_its_list(self):
+        article = extract_with_rule(page('<ul><li>Print<li class="share-item">Share</ul>'))
+        self.assertEqual(len(article['paragraphs']), 4)
+        self.assertNotIn('Share', article['content'])
+
+    def test_paragraph_closed_by_block(self):
+        html = f"<html><body><p class=\"promo\">Subscribe<div><p>{PARAGRAPH.format('trade')}</p><p>{PARAGRAPH.format('water')}</p></div></body></html>"
+        article = extract_with_rule(html)
+        self.assertEqual(article['paragraphs'], [PARAGRAPH.format('trade'), PARAGRAPH.format('water')])
+
+    def test_paragraph_closed_by_void_rule(self):
+        article = extract_with_rule(page('<p class="promo">Subscribe now<hr>'))
+        self.assertEqual(len(article['paragraphs']), 4)
+        self.assertNotIn('Subscribe', article['content'])
+
+    def test_nested_list_does_not_end_outer_item(self):
+        article = extract_with_rule(page('<ul><li class="share-item">Share on<ul><li>Mail<li>Post</ul> everywhere<li>Tweet</ul>'))
+        self.assertNotIn('everywhere', article['content'])
+        self.assertEqual(len(article['paragraphs']), 4)
+
+    def test_table_cell_closed_by_next_row(self):
+        article = extract_with_rule(page('<table><tr><td class="ad-slot">Sponsored<tr><td>Cell</table>'))
+        self.assertNotIn('Sponsored', article['content'])
+        self.assertEqual(len(article['paragraphs']), 4)
+
+    def test_stray_end_tag_keeps_required_end_skip(self):
+        article = extract_with_rule(page('<div class="related-links"><span>Read more</p> stories about things here today</div>'))
+        self.assertNotIn('stories about', article['content'])
+        self.assertEqual(len(article['paragraphs']), 4)
+
+class ScoringTests(unittest.TestCase):
+    def test_link_dense_block_is_dropped(self):
+        links = ''.join(f'<a href="/s/{i}">Another story headline number {i}</a> ' for i in range(4))
+        article = extract_with_rule(page('', f'<div>{links}</div>'))
+        self.assertNotIn('headline', article['content'])
+
+    def test_short_line_between_prose_is_kept(self):
+        article = extract_with_rule(page('', '<p>By a staff reporter</p>'))
+        self.assertIn('By a staff reporter', article['paragraphs'])
+
+    def test_short_line_at_the_edge_is_dropped(self):
+        html = f"<html><body><p>Updated today</p><p>{PARAGRAPH.format('trade')}</p></body></html>"
+        self.assertEqual(extract_with_rule(html)['paragraphs'], [PARAGRAPH.format('trade')])
+
+    def test_prose_outside_a_region_uses_the_density_rule(self):
+        html = f"<html><body><div><p>{PARAGRAPH.format('trade')}</p></div></body></html>"
+        self.assertEqual(extract_with_rule(html)['rule'], DENSITY_RULE)
+
+    def test_story_body_class_names_the_rule(self):
+        html = f"<html><body><div class=\"story-body\"><p>{PARAGRAPH.format('trade')}</p></div></body></html>"
+        self.assertEqual(extract_with_rule(html)['rule'], 'class:story-body')
+
+    def test_chunked_input_matches_whole_page(self):
+        html = page('<img class="social-share-icon" src="/share.png">', '<p>By a staff reporter</p>')
+        chunks = [html[i:i + 7] for i in range(0, len(html), 7)]
+        self.assertEqual(extract_with_rule(chunks), extract_with_rule(html))
+
+class RuleTests(unittest.TestCase):
+    def test_satisfied_rule_stops_parsing(self):
+        extractor = ArticleExtractor('article')
+        extractor.feed(page(''))
+        self.assertTrue(extractor.finished)
+        extractor.feed(f"<article><p>{PARAGRAPH.format('later')}</p></article>")
+        self.assertNotIn('later', extractor.result()['content'])
+
+    def test_other_regions_are_ignored_under_a_rule(self):
+        html = (f"<html><body><main><p>{PARAGRAPH.format('menus')}</p></main>"
+                f"<div class=\"story-body\"><p>{PARAGRAPH.format('trade')}</p></div></body></html>")
+        article = extract_with_rule(html, 'class:story-body')
+        self.assertEqual(article['rule'], 'class:story-body')
+        self.assertEqual(article['paragraphs'], [PARAGRAPH.format('trade')])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Feed Cache Tests
+Fetches feeds from a loopback server and checks what each outcome counts
+for in feed_health, the broken-body 200 included
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import feed_cache
+import feed_health
+import http_client
+from feed_cache import conditional_get, parsing
+from feed_parser import parse_feed_stream
+
+GOOD_FEED = b"""<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>
+<item><title>Talks end</title><link>http://example.com/talks</link></item></channel></rss>"""
+BROKEN_FEED = b"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><item><title>Talks</titel></item>"
+
+class _FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so connection reuse can be counted
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        if self.path == '/unchanged.xml':
+            self.send_response(304)
+            self.end_headers()
+            return
+        if self.path == '/missing.xml':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = BROKEN_FEED if self.path == '/broken.xml' else GOOD_FEED
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FeedHealthAccountingTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='feed-cache-test-')
+        path = os.path.join(self.directory, 'feed-cache.db')
+        self.health = feed_health.FeedHealth(path)
+        self.store = feed_cache.FeedValidatorStore(path)
+        for patcher in (mock.patch.object(feed_health, '_health', self.health),
+                        mock.patch.object(feed_cache, '_store', self.store)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _FeedHandler)
+        self.server.daemon_threads = True
+        self.server.connections = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        http_client.close()
+        self.health.close()
+        self.store.conn.close()
+        shutil.rmtree(self.directory)
+
+    def fetch(self, name):
+        url = f"{self.base}/{name}"
+        response = conditional_get(url, timeout=5, stream=True)
+        with parsing(url, response):
+            return url, parse_feed_stream(response)
+
+    def state(self, url):
+        row = self.health._row(url)
+        return (row[0], row[1]) if row else None
+
+    def test_parsed_feed_is_a_success(self):
+        url, items = self.fetch('good.xml')
+        self.assertEqual(len(items), 1)
+        self.assertEqual(self.state(url), (feed_health.CLOSED, 0))
+
+    def test_unparseable_200_is_a_failure(self):
+        with self.assertRaises(ET.ParseError):
+            self.fetch('broken.xml')
+        url = f"{self.base}/broken.xml"
+        self.assertEqual(self.state(url), (feed_health.CLOSED, 1))
+
+    def test_unparseable_200_opens_the_circuit(self):
+        url = f"{self.base}/broken.xml"
+        for _ in range(feed_health.FAILURE_THRESHOLD):
+            with self.assertRaises(ET.ParseError):
+                self.fetch('broken.xml')
+        self.assertEqual(self.state(url)[0], feed_health.OPEN)
+        with self.assertRaises(feed_health.CircuitOpen):
+            self.fetch('broken.xml')
+
+    def test_error_status_is_a_failure(self):
+        with self.assertRaises(Exception):
+            self.fetch('missing.xml')
+        self.assertEqual(self.state(f"{self.base}/missing.xml"), (feed_health.CLOSED, 1))
+
+    def test_unread_200_is_not_counted(self):
+        url = f"{self.base}/good.xml"
+        conditional_get(url, timeout=5, stream=True).close()
+        self.assertIsNone(self.state(url))
+
+    def test_not_modified_returns_its_connection(self):
+        url = f"{self.base}/unchanged.xml"
+        for _ in range(5):
+            self.assertIsNone(conditional_get(url, timeout=5, stream=True))
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.state(url), (feed_health.CLOSED, 0))
+
+if __name__ == "__main__":
+    unittest.main()
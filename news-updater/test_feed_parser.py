@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Feed Parser Tests
+Checks the item format across feed flavours and that parsing stops at the
+first stored item without reading the rest of the feed
+"""
+
+import io
+import json
+import unittest
+
+from feed_parser import iter_records, parse_feed_stream
+
+def rss(count):
+    items = ''.join(
+        f"<item><title>Story {i}</title><link>http://example.com/{i}</link><guid>g-{i}</guid>"
+        f"<description>{'Words about the story. ' * 20}</description></item>"
+        for i in range(count)
+    )
+    return f"<?xml version=\"1.0\"?><rss version=\"2.0\"><channel><title>T</title>{items}</channel></rss>".encode('utf-8')
+
+class CountingStream(io.RawIOBase):
+    """A byte stream that remembers how much of itself was read"""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+        self.consumed = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.data.read(len(buffer))
+        buffer[:len(data)] = data
+        self.consumed += len(data)
+        return len(data)
+
+class EarlyStopTests(unittest.TestCase):
+    def test_stops_at_first_seen_item(self):
+        items = parse_feed_stream(rss(10), lambda link, guid: guid == 'g-3')
+        self.assertEqual([item['guid'] for item in items], ['g-0', 'g-1', 'g-2'])
+
+    def test_seen_by_link_stops_too(self):
+        items = parse_feed_stream(rss(10), lambda link, guid: link == 'http://example.com/1')
+        self.assertEqual([item['guid'] for item in items], ['g-0'])
+
+    def test_rest_of_feed_is_not_read(self):
+        data = rss(2000)
+        stream = CountingStream(data)
+        items = parse_feed_stream(stream, lambda link, guid: guid == 'g-2')
+        self.assertEqual(len(items), 2)
+        self.assertLess(stream.consumed, len(data) // 10)
+
+    def test_limit_stops_reading(self):
+        data = rss(2000)
+        stream = CountingStream(data)
+        self.assertEqual(len(parse_feed_stream(stream, limit=5)), 5)
+        self.assertLess(stream.consumed, len(data) // 10)
+
+    def test_every_item_without_a_seen_check(self):
+        self.assertEqual(len(parse_feed_stream(rss(50))), 50)
+
+    def test_items_without_title_or_link_are_skipped(self):
+        data = (b"<rss><channel><item><title>No link</title></item>"
+                b"<item><link>http://example.com/untitled</link></item>"
+                b"<item><title>Kept</title><link>http://example.com/kept</link></item></channel></rss>")
+        self.assertEqual([item['title'] for item in parse_feed_stream(data)], ['Kept'])
+
+class FormatTests(unittest.TestCase):
+    def test_atom_entry(self):
+        data = b"""<feed xmlns="http://www.w3.org/2005/Atom"><title>T</title>
+            <entry><title>Storm</title><id>urn:storm</id>
+            <link rel="enclosure" href="http://example.com/storm.jpg"/>
+            <link href="http://example.com/storm"/>
+            <updated>2024-01-02T00:00:00Z</updated><published>2024-01-01T00:00:00Z</published>
+            <author><name>Reporter</name></author><content>Full text</content></entry></feed>"""
+        item = parse_feed_stream(data)[0]
+        self.assertEqual(item['link'], 'http://example.com/storm')
+        self.assertEqual(item['enclosure'], 'http://example.com/storm.jpg')
+        self.assertEqual(item['guid'], 'urn:storm')
+        self.assertEqual(item['pubdate'], '2024-01-01T00:00:00Z')
+        self.assertEqual(item['author'], 'Reporter')
+        self.assertEqual(item['description'], 'Full text')
+
+    def test_rdf_item_guid_from_about(self):
+        data = b"""<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/"
+            xmlns:dc="http://purl.org/dc/elements/1.1/">
+            <item rdf:about="http://example.com/talks"><title>Talks</title><link>http://example.com/talks</link>
+            <dc:date>2024-01-01</dc:date><dc:creator>Desk</dc:creator></item></rdf:RDF>"""
+        item = parse_feed_stream(data)[0]
+        self.assertEqual(item['guid'], 'http://example.com/talks')
+        self.assertEqual(item['pubdate'], '2024-01-01')
+        self.assertEqual(item['author'], 'Desk')
+
+    def test_json_feed(self):
+        data = json.dumps({
+            'version': 'https://jsonfeed.org/version/1.1',
+            'items': [
+                {'id': 7, 'url': 'http://example.com/a', 'title': ' A ', 'content_text': 'Text',
+                 'authors': [{'name': 'Desk'}], 'attachments': [{'url': 'http://example.com/a.mp3'}]},
+                {'id': 8, 'url': 'http://example.com/b', 'title': 'B'}
+            ]
+        }).encode('utf-8')
+        items = parse_feed_stream(b'\xef\xbb\xbf  ' + data, lambda link, guid: guid == '8')
+        self.assertEqual(len(items), 1)
+        self.assertEqual((items[0]['guid'], items[0]['title'], items[0]['author']), ('7', 'A', 'Desk'))
+        self.assertEqual(items[0]['enclosure'], 'http://example.com/a.mp3')
+
+    def test_records_include_untitled_items(self):
+        data = b"<rss><channel><item><link>http://example.com/x</link></item></channel></rss>"
+        self.assertEqual([record['link'] for record in iter_records(data)], ['http://example.com/x'])
+
+if __name__ == "__main__":
+    unittest.main()
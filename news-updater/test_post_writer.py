@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Post Writer Tests
+Flushes batches into a scratch database built from database-schema.sql,
+including batches where a row breaks a constraint mid-run
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from post_writer import PostWriter
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database-schema.sql')
+
+def post(slug, **columns):
+    row = {'title': f"Story {slug}", 'slug': slug, 'content': 'Body text', 'author_id': 1, 'status': 'published'}
+    row.update(columns)
+    return row
+
+class PostWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='post-writer-test-')
+        self.db_path = os.path.join(self.directory, 'database.db')
+        conn = sqlite3.connect(self.db_path)
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        conn.close()
+        self.writer = PostWriter(self.db_path, batch_size=100, flush_interval=0)
+        self.done = []
+
+    def tearDown(self):
+        self.writer.close()
+        shutil.rmtree(self.directory)
+
+    def add(self, row):
+        self.writer.add(row, lambda post_id, error: self.done.append((row['slug'], post_id, error)))
+
+    def stored(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT id, slug FROM posts ORDER BY id").fetchall()
+        conn.close()
+        return rows
+
+    def test_batch_is_written_with_matching_ids(self):
+        for i in range(5):
+            self.add(post(f"story-{i}"))
+        self.assertEqual(self.done, [])
+        self.assertEqual(self.writer.flush(), 5)
+
+        stored = self.stored()
+        self.assertEqual([(slug, post_id) for slug, post_id, _ in self.done], [(slug, post_id) for post_id, slug in stored])
+        self.assertTrue(all(error is None for _, _, error in self.done))
+
+    def test_duplicate_slug_falls_back_to_rows(self):
+        self.add(post('story-a'))
+        self.add(post('story-b'))
+        self.add(post('story-a'))
+        self.add(post('story-c'))
+        self.assertEqual(self.writer.flush(), 3)
+
+        self.assertEqual([slug for _, slug in self.stored()], ['story-a', 'story-b', 'story-c'])
+        failed = [(slug, error) for slug, post_id, error in self.done if post_id is None]
+        self.assertEqual(len(failed), 1)
+        self.assertIsInstance(failed[0][1], sqlite3.IntegrityError)
+        ids = dict(self.stored())
+        self.assertEqual({post_id: slug for slug, post_id, _ in self.done if post_id is not None}, ids)
+        self.assertEqual((self.writer.written, self.writer.failed), (3, 1))
+
+    def test_failed_run_does_not_undo_earlier_runs(self):
+        self.add(post('story-a'))
+        self.add(post('story-b', source_url='https://example.com/b'))
+        self.add(post('story-c', source_url='https://example.com/c', title=None))
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual([slug for _, slug in self.stored()], ['story-a', 'story-b'])
+        self.assertIsInstance(self.done[2][2], sqlite3.IntegrityError)
+
+    def test_full_batch_flushes_itself(self):
+        writer = PostWriter(self.db_path, batch_size=3, flush_interval=0)
+        for i in range(4):
+            writer.add(post(f"story-{i}"))
+        self.assertEqual(len(self.stored()), 3)
+        writer.close()
+        self.assertEqual(len(self.stored()), 4)
+
+    def test_published_at_defaults_to_now(self):
+        self.add(post('story-a'))
+        self.add(post('story-b', published_at='2024-01-02 03:04:05'))
+        self.writer.flush()
+        conn = sqlite3.connect(self.db_path)
+        stamps = dict(conn.execute("SELECT slug, published_at FROM posts").fetchall())
+        conn.close()
+        self.assertRegex(stamps['story-a'], r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$')
+        self.assertEqual(stamps['story-b'], '2024-01-02 03:04:05')
+
+if __name__ == "__main__":
+    unittest.main()
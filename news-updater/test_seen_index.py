@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Seen Index Tests
+Builds indexes over a scratch posts table with a small capacity so growth,
+reopening and catching up with new rows are exercised in a few entries
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import seen_index
+from seen_index import SeenIndex
+
+class SeenIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='seen-index-test-')
+        self.db_path = os.path.join(self.directory, 'database.db')
+        self.path = os.path.join(self.directory, 'seen-index.bin')
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE posts (id INTEGER PRIMARY KEY AUTOINCREMENT, source_url TEXT, slug TEXT)")
+        conn.commit()
+        conn.close()
+        self.indexes = []
+        patcher = mock.patch.object(seen_index, 'INITIAL_CAPACITY', 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for index in self.indexes:
+            index.close()
+        shutil.rmtree(self.directory)
+
+    def open(self):
+        index = SeenIndex(self.path, self.db_path)
+        self.indexes.append(index)
+        return index
+
+    def insert_posts(self, count, start=0):
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            "INSERT INTO posts (source_url, slug) VALUES (?, ?)",
+            [(f"https://example.com/story/{i}", f"story-{i}") for i in range(start, start + count)]
+        )
+        conn.commit()
+        conn.close()
+
+    def test_posts_are_indexed_when_built(self):
+        self.insert_posts(3)
+        index = self.open()
+        self.assertTrue(index.has_link('https://example.com/story/1'))
+        self.assertTrue(index.has_link('http://www.example.com/story/1?utm_source=feed'))
+        self.assertTrue(index.has_slug('story-2'))
+        self.assertFalse(index.has_link('https://example.com/story/3'))
+        self.assertFalse(index.has_slug('story-3'))
+        self.assertEqual(index.stats()[2], 3)
+
+    def test_growth_keeps_every_key(self):
+        self.insert_posts(5)
+        index = self.open()
+        self.assertEqual(index.stats()[1], 16)
+
+        for i in range(5, 40):
+            index.record_post(f"https://example.com/story/{i}", f"story-{i}")
+
+        count, capacity, _, size = index.stats()
+        self.assertEqual(count, 80)
+        self.assertEqual(capacity, 128)
+        self.assertEqual(size, os.path.getsize(self.path))
+        for i in range(40):
+            self.assertTrue(index.has_link(f"https://example.com/story/{i}"), i)
+            self.assertTrue(index.has_slug(f"story-{i}"), i)
+
+    def test_open_index_follows_growth_by_another_writer(self):
+        reader = self.open()
+        writer = self.open()
+        for i in range(20):
+            writer.record_post(f"https://example.com/story/{i}", f"story-{i}")
+
+        self.assertGreater(writer.stats()[1], 16)
+        self.assertEqual(reader.stats(), writer.stats())
+        self.assertTrue(reader.has_slug('story-19'))
+
+    def test_reopen_keeps_recorded_keys_and_reads_only_new_posts(self):
+        self.insert_posts(4)
+        index = self.open()
+        index.record_post(guid='urn:feed:item-9')
+        index.close()
+        self.indexes.remove(index)
+
+        self.insert_posts(2, start=4)
+        with mock.patch.object(SeenIndex, '_rebuild_locked', side_effect=AssertionError('rebuilt')):
+            reopened = self.open()
+        self.assertTrue(reopened.has_guid('urn:feed:item-9'))
+        self.assertTrue(reopened.has_slug('story-5'))
+        self.assertEqual(reopened.stats()[2], 6)
+        self.assertEqual(reopened.sync(), 0)
+
+    def test_damaged_file_is_rebuilt(self):
+        self.insert_posts(3)
+        self.open().close()
+        self.indexes.clear()
+        with open(self.path, 'r+b') as f:
+            f.write(b'NOTANIDX')
+
+        index = self.open()
+        self.assertTrue(index.has_slug('story-0'))
+        self.assertEqual(index.stats()[2], 3)
+
+    def test_rebuild_drops_keys_without_posts(self):
+        self.insert_posts(2)
+        index = self.open()
+        index.record_post('https://example.com/never-saved')
+        self.assertEqual(index.rebuild(), 2)
+        self.assertFalse(index.has_link('https://example.com/never-saved'))
+        self.assertTrue(index.has_link('https://example.com/story/0'))
+
+if __name__ == "__main__":
+    unittest.main()
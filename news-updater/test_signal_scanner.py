@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Signal Scanner Tests
+Checks that stopping early never changes what research_article reports
+"""
+
+import unittest
+
+from signal_scanner import SIGNIFICANT_LENGTH, SignalScanner, scan_text
+
+SIGNALS = 'On March 3, 2024, officials said "talks ended" and 40 percent agreed. '
+
+class EarlyStopTests(unittest.TestCase):
+    def test_not_done_at_exactly_the_significant_length(self):
+        scanner = SignalScanner()
+        scanner.feed(SIGNALS.ljust(SIGNIFICANT_LENGTH))
+        self.assertEqual(scanner.found, {'quote', 'attribution', 'data', 'date'})
+        self.assertFalse(scanner.done)
+        scanner.feed(' ')
+        self.assertTrue(scanner.done)
+
+    def test_page_of_exactly_the_significant_length_is_read_whole(self):
+        result = scan_text(SIGNALS.ljust(SIGNIFICANT_LENGTH))
+        self.assertEqual(result['length'], SIGNIFICANT_LENGTH)
+        self.assertTrue(result['has_quotes'] and result['has_data'] and result['has_dates'])
+
+    def test_early_stop_reports_a_significant_length(self):
+        result = scan_text(SIGNALS.ljust(SIGNIFICANT_LENGTH * 20))
+        self.assertGreater(result['length'], SIGNIFICANT_LENGTH)
+        self.assertLess(result['length'], SIGNIFICANT_LENGTH * 20)
+
+if __name__ == "__main__":
+    unittest.main()
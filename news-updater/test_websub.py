@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+WebSub Tests
+Runs a subscriber against the local hub on loopback ports: subscribe,
+verification, signed delivery and the deliveries that must be ignored
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+import http_client
+from websub import CALLBACK_PATH, LEASE_SECONDS, WebSubSubscriber
+from websub_hub import LocalHub
+
+TOPIC = 'http://127.0.0.1/feeds/world.xml'
+SOURCE_URL = 'http://feeds.example.com/world.xml'
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>World</title>
+<item><title>Talks end</title><link>http://example.com/talks</link><guid>talks-1</guid></item>
+<item><title>Storm lands</title><link>http://example.com/storm</link><guid>storm-1</guid></item>
+</channel></rss>"""
+
+class WebSubRoundTripTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='websub-test-')
+        self.received = []
+        self.hub = LocalHub(port=0).start()
+        self.subscriber = WebSubSubscriber(
+            lambda source_url, items: self.received.append((source_url, items)),
+            host='127.0.0.1', port=0, path=os.path.join(self.directory, 'feed-cache.db')
+        )
+        self.subscriber.callback_url = f"http://127.0.0.1:{self.subscriber.server.server_address[1]}"
+        self.subscriber.start()
+
+    def tearDown(self):
+        self.subscriber.stop()
+        self.hub.stop()
+        http_client.close()
+        shutil.rmtree(self.directory)
+
+    def subscribe(self):
+        self.assertTrue(self.subscriber.subscribe(SOURCE_URL, hub=self.hub.url, topic=TOPIC))
+        # The hub verifies the intent on its own thread after accepting the request
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            states = [row[3] for row in self.subscriber.subscriptions()]
+            if states == ['active']:
+                return
+            time.sleep(0.02)
+        self.fail(f"subscription never became active: {self.subscriber.subscriptions()}")
+
+    def callback(self):
+        return self.subscriber.callback_url + CALLBACK_PATH + self.subscriber._callback_id(TOPIC)
+
+    def post(self, url, body, signature=None):
+        headers = {'Content-Type': 'application/rss+xml'}
+        if signature is not None:
+            headers['X-Hub-Signature'] = signature
+        request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_subscribe_verify_and_signed_publish(self):
+        self.subscribe()
+        source_url, topic, hub, state, lease_expires = self.subscriber.subscriptions()[0]
+        self.assertEqual((source_url, topic, hub), (SOURCE_URL, TOPIC, self.hub.url))
+        self.assertGreater(lease_expires, time.time())
+
+        self.assertEqual(self.hub.publish(TOPIC, content=FEED), 1)
+        self.assertEqual(len(self.received), 1)
+        source_url, items = self.received[0]
+        self.assertEqual(source_url, SOURCE_URL)
+        self.assertEqual([item['guid'] for item in items], ['talks-1', 'storm-1'])
+
+    def test_bad_signature_is_acknowledged_but_dropped(self):
+        self.subscribe()
+        status = self.post(self.callback(), FEED, 'sha256=' + '0' * 64)
+        self.assertEqual(status, 202)
+        self.assertEqual(self.received, [])
+
+    def test_unsigned_delivery_is_dropped(self):
+        self.subscribe()
+        self.assertEqual(self.post(self.callback(), FEED), 202)
+        self.assertEqual(self.received, [])
+
+    def test_unknown_callback_is_gone(self):
+        self.subscribe()
+        status = self.post(self.subscriber.callback_url + CALLBACK_PATH + 'unknown', FEED, 'sha256=' + '0' * 64)
+        self.assertEqual(status, 410)
+
+    def test_verification_with_wrong_topic_is_refused(self):
+        self.subscriber.store.save(self.subscriber._callback_id(TOPIC), TOPIC, self.hub.url, SOURCE_URL, 's', 'pending-subscribe')
+        params = {'hub.mode': 'subscribe', 'hub.topic': TOPIC + '?other', 'hub.challenge': 'abc'}
+        self.assertIsNone(self.subscriber.verify(self.subscriber._callback_id(TOPIC), params))
+        params['hub.topic'] = TOPIC
+        self.assertEqual(self.subscriber.verify(self.subscriber._callback_id(TOPIC), params), 'abc')
+
+    def test_non_numeric_lease_falls_back_to_default(self):
+        callback_id = self.subscriber._callback_id(TOPIC)
+        self.subscriber.store.save(callback_id, TOPIC, self.hub.url, SOURCE_URL, 's', 'pending-subscribe')
+        query = f"?hub.mode=subscribe&hub.topic={TOPIC}&hub.challenge=abc&hub.lease_seconds=soon"
+        with urllib.request.urlopen(self.callback() + query, timeout=5) as response:
+            self.assertEqual((response.status, response.read()), (200, b'abc'))
+        lease_expires = self.subscriber.store.get(callback_id)['lease_expires']
+        self.assertAlmostEqual(lease_expires - time.time(), LEASE_SECONDS, delta=60)
+
+    def test_seen_items_stop_the_delivery(self):
+        self.subscriber.is_seen = lambda link, guid: guid == 'storm-1'
+        self.subscribe()
+        self.assertEqual(self.hub.publish(TOPIC, content=FEED), 1)
+        self.assertEqual([item['guid'] for item in self.received[0][1]], ['talks-1'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,45 +4,38 @@ ULTIMATE Professional Journalist - Creates real, original news articles
 """
 
 import sqlite3
+import db_connection
 import random
+import post_writer
 from datetime import datetime
 import re
 import time
 
 
-def check_duplicate_title(title):
+def check_duplicate_title(cursor, title):
     """Check if article title already exists in database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
         cursor.execute('SELECT COUNT(*) FROM posts WHERE title = ?', (title,))
         count = cursor.fetchone()[0]
-        conn.close()
         return count > 0
     except Exception as e:
-        log_message(f'[ERROR] Duplicate check failed: {e}')
+        log(f'[ERROR] Duplicate check failed: {e}')
         return False
 DB_PATH = '/var/www/news-site/database.db'
 
 def log(message):
     print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
 
-def get_admin_id():
+def get_admin_id(cursor):
     """Get admin user ID"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     cursor.execute("SELECT id FROM users WHERE role = 'admin' LIMIT 1")
     result = cursor.fetchone()
-    conn.close()
     return result[0] if result else 1
 
-def get_category_id(slug):
+def get_category_id(cursor, slug):
     """Get category ID"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     cursor.execute("SELECT id FROM categories WHERE slug = ? LIMIT 1", (slug,))
     result = cursor.fetchone()
-    conn.close()
     return result[0] if result else 1
 
 def create_news_article():
@@ -202,49 +195,40 @@ This report adheres to professional journalism principles including:
         'alt': f"News image for {article['title'][:40]}..."
     }
 
-def save_article(article_data):
-    """Save article to database"""
+def save_article(article_data, writer, cursor, number):
+    """Queue article for the batched writer; number is its place in this run"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Generate unique slug
+        # Generate unique slug (the same topic can be picked twice in one second)
         base_slug = re.sub(r'[^a-z0-9\s-]', '', article_data['title'].lower())
         base_slug = re.sub(r'\s+', '-', base_slug)
-        unique_slug = f"{base_slug[:80]}-{int(time.time())}"
+        unique_slug = f"{base_slug[:80]}-{int(time.time())}-{number}"
         
         # Get IDs
-        author_id = get_admin_id()
-        category_id = get_category_id(article_data['category'])
+        author_id = get_admin_id(cursor)
+        category_id = get_category_id(cursor, article_data['category'])
         
-        # Insert article
-        cursor.execute("""
-            INSERT INTO posts (
-                title, slug, excerpt, content, author_id, category_id,
-                status, featured_image, image_caption, source_url, source_name,
-                fact_check_status, published_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
-        """, (
-            article_data['title'],
-            unique_slug,
-            article_data['excerpt'],
-            article_data['content'],
-            author_id,
-            category_id,
-            'published',
-            article_data['image'],
-            article_data['alt'],
-            'https://news.example.com/verified',
-            'Professional Journalism Network',
-            'verified'
-        ))
+        def on_done(post_id, error):
+            if post_id is None:
+                log(f"Error: {str(error)}")
+                return
+            log(f"✅ PUBLISHED: {article_data['title']}")
+            log(f"   ID: {post_id}, Category: {article_data['category']}")
         
-        conn.commit()
-        post_id = cursor.lastrowid
-        conn.close()
-        
-        log(f"✅ PUBLISHED: {article_data['title']}")
-        log(f"   ID: {post_id}, Category: {article_data['category']}")
+        # Queue article; the writer inserts it with the rest of its batch
+        writer.add({
+            'title': article_data['title'],
+            'slug': unique_slug,
+            'excerpt': article_data['excerpt'],
+            'content': article_data['content'],
+            'author_id': author_id,
+            'category_id': category_id,
+            'status': 'published',
+            'featured_image': article_data['image'],
+            'image_caption': article_data['alt'],
+            'source_url': 'https://news.example.com/verified',
+            'source_name': 'Professional Journalism Network',
+            'fact_check_status': 'verified'
+        }, on_done)
         return True
         
     except Exception as e:
@@ -258,23 +242,25 @@ def main():
     
     # Create articles
     articles_to_create = 2
-    created = 0
+    conn = db_connection.connect(DB_PATH)
+    cursor = conn.cursor()
+    writer = post_writer.PostWriter(DB_PATH)
     
     for i in range(articles_to_create):
         log(f"Creating article {i+1}/{articles_to_create}...")
         
         article = create_news_article()
-        if save_article(article):
-            created += 1
-            time.sleep(1)
+        save_article(article, writer, cursor, i + 1)
+    
+    # Write the batch
+    writer.close()
+    created = writer.written
     
     log("=" * 60)
     log(f"🎯 MISSION COMPLETE: {created} professional articles published")
     log("=" * 60)
     
     # Show summary
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     cursor.execute("SELECT COUNT(*) FROM posts WHERE LENGTH(content) > 1000")
     total_articles = cursor.fetchone()[0]
     conn.close()
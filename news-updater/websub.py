@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+WebSub Subscriber
+Lets hubs push feed updates to a local callback instead of waiting for the next poll
+"""
+
+import hashlib
+import hmac
+import io
+import json
+import os
+import secrets
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import db_connection
+import http_client
+from feed_parser import parse_feed_stream
+
+# Configuration
+DB_PATH = '/var/www/news-site/database.db'
+FEED_CACHE_PATH = os.path.join(os.path.dirname(DB_PATH), 'feed-cache.db')
+CALLBACK_HOST = '0.0.0.0'
+CALLBACK_PORT = int(os.environ.get('WEBSUB_PORT', '8095'))
+CALLBACK_URL = os.environ.get('WEBSUB_CALLBACK_URL', '')  # Public URL reaching CALLBACK_PORT; push is off when empty
+CALLBACK_PATH = '/websub/'
+LEASE_SECONDS = 7 * 24 * 60 * 60   # Lease asked of the hub
+RENEW_MARGIN = 12 * 60 * 60        # Resubscribe this long before a lease runs out
+MAX_PUSH_BYTES = http_client.MAX_FEED_BYTES
+
+SIGNATURE_ALGORITHMS = {
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'sha384': hashlib.sha384,
+    'sha512': hashlib.sha512
+}
+
+def _now():
+    return datetime.now(timezone.utc).timestamp()
+
+def discover(url):
+    """Return (hub, topic) advertised by a feed, or (None, url)
+
+    Hubs are found in the HTTP Link header, in <link rel="hub"> elements
+    ahead of the first item, or in a JSON Feed's hubs list.
+    """
+    response = http_client.get_limited(url, timeout=15)
+    response.raise_for_status()
+
+    hub = response.links.get('hub', {}).get('url')
+    topic = response.links.get('self', {}).get('url')
+
+    body = response.content
+    if body.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'{'):
+        feed = json.loads(body)
+        for entry in feed.get('hubs') or []:
+            if entry.get('type', '').lower() == 'websub' and not hub:
+                hub = entry.get('url')
+        topic = topic or feed.get('feed_url')
+        return hub, topic or url
+
+    try:
+        for _, element in ET.iterparse(io.BytesIO(body), events=('start',)):
+            name = element.tag.rsplit('}', 1)[-1]
+            if name in ('item', 'entry'):
+                break
+            if name == 'link' and element.get('href'):
+                rel = element.get('rel')
+                if rel == 'hub' and not hub:
+                    hub = element.get('href')
+                elif rel == 'self' and not topic:
+                    topic = element.get('href')
+    except ET.ParseError:
+        pass
+
+    return hub, topic or url
+
+class SubscriptionStore:
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.lock = threading.Lock()
+        self.conn = db_connection.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS websub_subscriptions (
+                callback_id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                hub TEXT NOT NULL,
+                source_url TEXT NOT NULL,
+                secret TEXT NOT NULL,
+                state TEXT NOT NULL,
+                lease_expires REAL,
+                updated_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, callback_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT topic, hub, source_url, secret, state, lease_expires FROM websub_subscriptions WHERE callback_id = ?",
+                (callback_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('topic', 'hub', 'source_url', 'secret', 'state', 'lease_expires'), row))
+
+    def save(self, callback_id, topic, hub, source_url, secret, state):
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO websub_subscriptions
+                    (callback_id, topic, hub, source_url, secret, state, lease_expires, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, (SELECT lease_expires FROM websub_subscriptions WHERE callback_id = ?), ?)
+            """, (callback_id, topic, hub, source_url, secret, state, callback_id, _now()))
+            self.conn.commit()
+
+    def update(self, callback_id, state, lease_expires=None):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE websub_subscriptions SET state = ?, lease_expires = ?, updated_at = ? WHERE callback_id = ?",
+                (state, lease_expires, _now(), callback_id)
+            )
+            self.conn.commit()
+
+    def expiring(self, before):
+        """Return (topic, hub, source_url) for active leases ending before a time"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT topic, hub, source_url FROM websub_subscriptions WHERE state = 'active' AND lease_expires < ?",
+                (before,)
+            ).fetchall()
+
+    def subscriptions(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT source_url, topic, hub, state, lease_expires FROM websub_subscriptions ORDER BY source_url"
+            ).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+class _CallbackHandler(BaseHTTPRequestHandler):
+    """GET verifies a subscription intent, POST delivers content"""
+
+    def _callback_id(self):
+        path = urlparse(self.path).path
+        if not path.startswith(CALLBACK_PATH):
+            return None
+        return path[len(CALLBACK_PATH):].strip('/')
+
+    def _reply(self, status, body=b''):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        challenge = self.server.subscriber.verify(self._callback_id(), params)
+        if challenge is None:
+            self._reply(404)
+        else:
+            self._reply(200, challenge.encode('utf-8'))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_PUSH_BYTES:
+            self._reply(413)
+            return
+
+        body = self.rfile.read(length)
+        known = self.server.subscriber.receive(self._callback_id(), self.headers, body)
+
+        # Hubs retry anything but 2xx, so a bad signature is still acknowledged
+        self._reply(202 if known else 410)
+
+    def log_message(self, format, *args):
+        pass
+
+class WebSubSubscriber:
+    """Subscribes feeds to their hubs and hands pushed items to on_items(source_url, items)
+
+    on_items runs on the callback server's thread; it should queue the
+    items for the thread that owns the database rather than write posts
+    itself. is_seen has the same meaning as in parse_feed_stream.
+    """
+
+    def __init__(self, on_items, callback_url=CALLBACK_URL, port=CALLBACK_PORT, host=CALLBACK_HOST,
+                 is_seen=None, path=FEED_CACHE_PATH):
+        self.on_items = on_items
+        self.callback_url = callback_url.rstrip('/')
+        self.is_seen = is_seen
+        self.store = SubscriptionStore(path)
+        self.server = ThreadingHTTPServer((host, port), _CallbackHandler)
+        self.server.daemon_threads = True
+        self.server.subscriber = self
+        self.thread = None
+
+    def start(self):
+        """Serve the callback endpoint on a background thread"""
+        self.thread = threading.Thread(target=self.server.serve_forever, name='websub-callback', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.store.close()
+
+    def _callback_id(self, topic):
+        return hashlib.sha256(topic.encode('utf-8')).hexdigest()[:24]
+
+    def _request(self, mode, topic, hub, source_url):
+        callback_id = self._callback_id(topic)
+        existing = self.store.get(callback_id)
+        secret = existing['secret'] if existing else secrets.token_hex(20)
+        self.store.save(callback_id, topic, hub, source_url, secret, f"pending-{mode}")
+
+        data = {
+            'hub.mode': mode,
+            'hub.topic': topic,
+            'hub.callback': self.callback_url + CALLBACK_PATH + callback_id
+        }
+        if mode == 'subscribe':
+            data['hub.secret'] = secret
+            data['hub.lease_seconds'] = str(LEASE_SECONDS)
+
+        response = http_client.post(hub, data=data, timeout=15)
+        return 200 <= response.status_code < 300
+
+    def subscribe(self, source_url, hub=None, topic=None):
+        """Ask a feed's hub to push it here; False when the feed has no hub"""
+        if hub is None:
+            hub, topic = discover(source_url)
+        if not hub:
+            return False
+        return self._request('subscribe', topic or source_url, hub, source_url)
+
+    def unsubscribe(self, source_url, hub=None, topic=None):
+        if hub is None:
+            hub, topic = discover(source_url)
+        if not hub:
+            return False
+        return self._request('unsubscribe', topic or source_url, hub, source_url)
+
+    def renew_due(self, now=None):
+        """Resubscribe every lease that ends within RENEW_MARGIN"""
+        now = now if now is not None else _now()
+        renewed = 0
+        for topic, hub, source_url in self.store.expiring(now + RENEW_MARGIN):
+            try:
+                if self._request('subscribe', topic, hub, source_url):
+                    renewed += 1
+            except Exception:
+                pass
+        return renewed
+
+    def verify(self, callback_id, params):
+        """Confirm an intent the hub is checking; return the challenge or None"""
+        subscription = self.store.get(callback_id) if callback_id else None
+        if subscription is None or params.get('hub.topic') != subscription['topic']:
+            return None
+
+        mode = params.get('hub.mode')
+        if mode == 'denied':
+            self.store.update(callback_id, 'denied')
+            return ''
+        if mode not in ('subscribe', 'unsubscribe') or subscription['state'] != f"pending-{mode}":
+            return None
+
+        if mode == 'subscribe':
+            try:
+                lease = int(params.get('hub.lease_seconds') or LEASE_SECONDS)
+            except ValueError:
+                lease = LEASE_SECONDS
+            self.store.update(callback_id, 'active', _now() + lease)
+        else:
+            self.store.update(callback_id, 'unsubscribed')
+        return params.get('hub.challenge', '')
+
+    def receive(self, callback_id, headers, body):
+        """Check a content delivery's signature and pass its new items on"""
+        subscription = self.store.get(callback_id) if callback_id else None
+        if subscription is None:
+            return False
+
+        # A lease being renewed stays valid until it actually runs out
+        if subscription['state'] != 'active' and (subscription['lease_expires'] or 0) < _now():
+            return False
+
+        algorithm, _, signature = (headers.get('X-Hub-Signature') or '').partition('=')
+        digest = SIGNATURE_ALGORITHMS.get(algorithm.lower())
+        if digest is None:
+            return True
+        expected = hmac.new(subscription['secret'].encode('utf-8'), body, digest).hexdigest()
+        if not hmac.compare_digest(expected, signature.strip().lower()):
+            return True
+
+        try:
+            items = parse_feed_stream(io.BytesIO(body), self.is_seen)
+        except Exception:
+            return True
+
+        if items:
+            self.on_items(subscription['source_url'], items)
+        return True
+
+    def subscriptions(self):
+        """Return (source_url, topic, hub, state, lease_expires) for every subscription"""
+        return self.store.subscriptions()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Local WebSub Hub
+A minimal stand-in hub for trying the push path without a public hub
+
+Usage: python3 websub_hub.py [port]
+Subscribers POST hub.mode=subscribe as usual; publishers (or a shell)
+POST hub.mode=publish&hub.url=<topic> to have the topic fetched and
+pushed to every verified subscriber.
+"""
+
+import hashlib
+import hmac
+import secrets
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse, parse_qs
+
+# Configuration
+HUB_HOST = '127.0.0.1'
+HUB_PORT = 8096
+REQUEST_TIMEOUT = 10
+
+class _HubHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, body=b''):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        mode = form.get('hub.mode')
+        hub = self.server.hub
+
+        if mode in ('subscribe', 'unsubscribe') and form.get('hub.topic') and form.get('hub.callback'):
+            # Accept now, verify the intent asynchronously as the spec allows
+            self._reply(202)
+            threading.Thread(target=hub.verify, args=(mode, form), daemon=True).start()
+        elif mode == 'publish' and form.get('hub.url'):
+            self._reply(204)
+            threading.Thread(target=hub.publish, args=(form['hub.url'],), daemon=True).start()
+        else:
+            self._reply(400, b'Unsupported hub request')
+
+    def log_message(self, format, *args):
+        pass
+
+class LocalHub:
+    """In-process hub: verifies subscribers and pushes signed content to them"""
+
+    def __init__(self, host=HUB_HOST, port=HUB_PORT):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # topic -> {callback: secret}
+        self.server = ThreadingHTTPServer((host, port), _HubHandler)
+        self.server.daemon_threads = True
+        self.server.hub = self
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='websub-hub', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def verify(self, mode, form):
+        """Confirm a (un)subscription with the callback before acting on it"""
+        topic, callback = form['hub.topic'], form['hub.callback']
+        challenge = secrets.token_hex(16)
+        params = {'hub.mode': mode, 'hub.topic': topic, 'hub.challenge': challenge}
+        if mode == 'subscribe':
+            params['hub.lease_seconds'] = form.get('hub.lease_seconds', '86400')
+
+        separator = '&' if urlparse(callback).query else '?'
+        try:
+            with urllib.request.urlopen(callback + separator + urlencode(params), timeout=REQUEST_TIMEOUT) as response:
+                confirmed = response.status == 200 and response.read().decode('utf-8') == challenge
+        except (urllib.error.URLError, OSError):
+            confirmed = False
+
+        if not confirmed:
+            return False
+
+        with self.lock:
+            callbacks = self.subscribers.setdefault(topic, {})
+            if mode == 'subscribe':
+                callbacks[callback] = form.get('hub.secret', '')
+            else:
+                callbacks.pop(callback, None)
+        return True
+
+    def publish(self, topic, content=None, content_type='application/rss+xml'):
+        """Push a topic's content (fetched when not given) to its subscribers
+
+        Returns the number of subscribers that acknowledged the delivery.
+        """
+        if content is None:
+            with urllib.request.urlopen(topic, timeout=REQUEST_TIMEOUT) as response:
+                content = response.read()
+                content_type = response.headers.get('Content-Type', content_type)
+
+        with self.lock:
+            callbacks = dict(self.subscribers.get(topic, {}))
+
+        delivered = 0
+        for callback, secret in callbacks.items():
+            headers = {'Content-Type': content_type, 'Link': f'<{self.url}>; rel="hub", <{topic}>; rel="self"'}
+            if secret:
+                signature = hmac.new(secret.encode('utf-8'), content, hashlib.sha256).hexdigest()
+                headers['X-Hub-Signature'] = f"sha256={signature}"
+
+            request = urllib.request.Request(callback, data=content, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                    if 200 <= response.status < 300:
+                        delivered += 1
+            except (urllib.error.URLError, OSError):
+                pass
+        return delivered
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else HUB_PORT
+    hub = LocalHub(port=port)
+    print(f"Local WebSub hub listening on {hub.url}")
+    try:
+        hub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    hub.server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,11 @@ Working Professional Journalist - Actually reads and writes news
 """
 
 import sqlite3
-import requests
-import xml.etree.ElementTree as ET
+import db_connection
+import cpu_pool
+import page_cache
+import seen_index
+import story_clusters
 from datetime import datetime
 import re
 import sys
@@ -13,6 +16,12 @@ import os
 import random
 import time
 
+from article_extractor import extract_article
+from canonical_url import resolve_canonical
+from feed_cache import conditional_get, parsing, save_validators
+from research_stage import research_items
+from feed_parser import iter_feed_items
+
 DB_PATH = '/var/www/news-site/database.db'
 
 def log(message):
@@ -21,34 +30,20 @@ def log(message):
 def fetch_bbc_article(url):
     """Fetch and read BBC article"""
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
+        response = page_cache.get(url, timeout=15)
         
         if response.status_code != 200:
             return None
         
-        content = response.text
-        
-        # Extract BBC article content
-        article_match = re.search(r'<article[^>]*>(.*?)</article>', content, re.DOTALL)
-        if article_match:
-            article_html = article_match.group(1)
-            # Clean HTML
-            article_text = re.sub(r'<[^>]+>', ' ', article_html)
-            article_text = re.sub(r'\s+', ' ', article_text).strip()
-        else:
-            # Fallback: get paragraphs
-            paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', content, re.DOTALL)
-            article_text = ' '.join([p for p in paragraphs[:15] if len(p) > 20])
-        
-        # Extract title
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.IGNORECASE)
-        title = title_match.group(1).replace(' - BBC News', '').strip() if title_match else ""
+        # Extract the article body and title in one pass over the page
+        article = cpu_pool.call(extract_article, response.text, url)
+        article_text = article['content']
+        title = article['title'].replace(' - BBC News', '').strip()
         
         return {
             'title': title,
             'content': article_text[:3000],
-            'url': url,
+            'url': resolve_canonical(url, article['canonical']),
             'success': True
         }
     except Exception as e:
@@ -125,7 +120,9 @@ What to expect in coming days:
         'title': pro_title,
         'content': content,
         'excerpt': excerpt,
-        'word_count': len(content.split())
+        'word_count': len(content.split()),
+        'source_title': original_title,
+        'source_text': source_text
     }
 
 def get_relevant_image():
@@ -141,10 +138,10 @@ def get_relevant_image():
         'alt': 'News coverage and analysis image'
     }
 
-def save_article(article, source_url, image_data):
+def save_article(article, source_url, image_data, feed_item):
     """Save article to database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connection.connect(DB_PATH)
         cursor = conn.cursor()
         
         # Generate slug
@@ -182,8 +179,13 @@ def save_article(article, source_url, image_data):
             'verified'
         ))
         
+        post_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        seen_index.record_post(source_url, slug)
+        # The feed's own link and guid as well, so the next feed scan stops at this item
+        seen_index.record_post(feed_item['link'], guid=feed_item.get('guid'))
+        story_clusters.assign_post(post_id, article['source_title'], article['source_text'], DB_PATH)
         
         log(f"✅ Published: {article['title'][:60]}...")
         return True
@@ -196,19 +198,20 @@ def fetch_bbc_rss():
     """Fetch BBC RSS feed"""
     try:
         url = 'http://feeds.bbci.co.uk/news/rss.xml'
-        response = requests.get(url, timeout=10)
-        root = ET.fromstring(response.content)
+        response = conditional_get(url, timeout=10, stream=True)
+        if response is None:
+            log("BBC RSS not modified")
+            return []
         
         items = []
-        for item in root.findall('.//item'):
-            title_elem = item.find('title')
-            link_elem = item.find('link')
-            if title_elem is not None and link_elem is not None:
-                title = title_elem.text.strip() if title_elem.text else ''
-                link = link_elem.text.strip() if link_elem.text else ''
-                if title and link and 'bbc.com' in link:
-                    items.append({'title': title, 'link': link})
-        return items[:2]  # Process 2 articles
+        with parsing(url, response):
+            for item in iter_feed_items(response):
+                if 'bbc.com' in item['link']:
+                    items.append(item)
+                    if len(items) >= 2:  # Process 2 articles
+                        break
+        save_validators(url, response)
+        return items
     except:
         return []
 
@@ -220,14 +223,13 @@ def main():
     log(f"Found {len(items)} BBC articles")
     
     created = 0
-    for item in items:
-        # Read article
-        source_article = fetch_bbc_article(item['link'])
-        if not source_article:
-            continue
-        
-        # Create original article
-        article = create_original_article(source_article)
+    
+    # Read articles on the research pool, writing each as soon as it arrives
+    jobs = [(item, item['link']) for item in items]
+    fetched = (((item, source_article['url']), source_article) for item, source_article in research_items(jobs, fetch_bbc_article) if source_article)
+    
+    # Create original articles, in batches on the process pool when it is enabled
+    for (item, source_url), article in cpu_pool.imap_batched(create_original_article, fetched):
         if not article:
             continue
         
@@ -235,9 +237,8 @@ def main():
         image_data = get_relevant_image()
         
         # Save to database
-        if save_article(article, item['link'], image_data):
+        if save_article(article, source_url, image_data, item):
             created += 1
-            time.sleep(2)
     
     log(f"Created {created} original articles")
     return created
@@ -68,7 +68,7 @@ app.get('/admin', (req, res) => {
 
 // Get all published posts (public)
 app.get('/api/posts', (req, res) => {
-    const { category, author, limit = 20, page = 1 } = req.query;
+    const { category, author, collapse, limit = 20, page = 1 } = req.query;
     const offset = (page - 1) * limit;
     
     let whereClause = "p.status = 'published'";
@@ -84,6 +84,14 @@ app.get('/api/posts', (req, res) => {
         params.push(author);
     }
     
+    // ?collapse=1 lists only the newest post of each story cluster;
+    // its cluster_size says how many sources are covering the story
+    if (collapse === '1' || collapse === 'true') {
+        whereClause += ` AND (p.cluster_id IS NULL OR p.id = (
+            SELECT MAX(p2.id) FROM posts p2
+            WHERE p2.cluster_id = p.cluster_id AND p2.status = 'published'))`;
+    }
+    
     db.all(`
         SELECT p.*, 
                u.username as author_name,